@@ -0,0 +1,93 @@
+"""Benchmark the binary table format of raisin.box.binary against pickle
+
+Encodes and decodes an expression table of 100k rows, and compares reading
+all the rows, a single column and the first row.
+
+Reading all the rows of a binary table is slower than unpickling them with
+protocol 2, as each row is built from the columns in Python. The binary
+format only pays off when a box reads a few columns or the first row, as
+get_lines does.
+
+    python benchmarks/binary_tables.py
+"""
+
+import time
+import random
+import cPickle
+
+from raisin.box import binary
+
+
+def make_table(rows):
+    """Make an expression table with the given number of rows"""
+    random.seed(0)
+    description = [('Gene ID', 'string'),
+                   ('Transcript ID', 'string'),
+                   ('Reads', 'number'),
+                   ('RPKM 1', 'number'),
+                   ('RPKM 2', 'number'),
+                   ('Detected', 'boolean')]
+    data = []
+    for row in range(0, rows):
+        data.append(['ENSG%011d' % row,
+                     'ENST%011d' % row,
+                     random.randint(0, 100000),
+                     random.random() * 1000,
+                     random.random() * 1000,
+                     random.random() > 0.5])
+    return {'table_description': description, 'table_data': data}
+
+
+def best(function, repeat=5):
+    """Get the best time of a function in milliseconds"""
+    times = []
+    for index in range(0, repeat):
+        start = time.time()
+        function()
+        times.append(time.time() - start)
+    return min(times) * 1000
+
+
+def main():
+    """Time the formats on 100k rows"""
+    table = make_table(100000)
+    formats = (('pickle 0',
+                lambda: cPickle.dumps(table),
+                cPickle.loads),
+               ('pickle 2',
+                lambda: cPickle.dumps(table, cPickle.HIGHEST_PROTOCOL),
+                cPickle.loads),
+               ('binary',
+                lambda: binary.encode(table),
+                binary.decode))
+    print "%-10s %10s %12s %12s %12s %12s %12s" % ('format', 'size (kB)',
+                                                   'encode (ms)',
+                                                   'decode (ms)',
+                                                   'rows (ms)',
+                                                   'column (ms)',
+                                                   'first (ms)')
+    rows = {}
+    for name, encode, decode in formats:
+        content = encode()
+        assert decode(content) == table
+        rows[name] = best(lambda: decode(content)['table_data'])
+        print "%-10s %10d %12.1f %12.1f %12.1f %12.1f %12.1f" % (
+            name,
+            len(content) / 1024,
+            best(encode),
+            best(lambda: decode(content)),
+            rows[name],
+            best(lambda: [row[3] for row in
+                          decode(content)['table_data']]
+                 if name != 'binary' else decode(content).column(3)),
+            best(lambda: decode(content)['table_data'][0]
+                 if name != 'binary' else decode(content).row(0)))
+    if rows['binary'] > rows['pickle 2']:
+        print
+        print ("Reading all the rows is %.1f times slower in the binary "
+               "format than with pickle 2." %
+               (rows['binary'] / rows['pickle 2']))
+
+
+if __name__ == '__main__':
+    main()
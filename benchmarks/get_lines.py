@@ -0,0 +1,56 @@
+"""Benchmark reading the first line of a table in raisin.box.boxes.get_lines
+
+Compares the direct mapping of the column labels onto the first row with the
+CSV export of a gviz_api.DataTable on wide and long tables.
+
+    python benchmarks/get_lines.py
+"""
+
+import timeit
+
+from raisin.box import boxes
+from raisin.box.config import PICKLED
+
+
+def make_box(columns, rows):
+    """Make a box with a table of the given size"""
+    description = []
+    for column in range(0, columns):
+        if column % 2:
+            description.append(('Column %s' % column, 'number'))
+        else:
+            description.append(('Column %s' % column, 'string'))
+    data = []
+    for row in range(0, rows):
+        line = []
+        for column in range(0, columns):
+            if column % 2:
+                line.append(row * column)
+            else:
+                line.append('Row %s Column %s' % (row, column))
+        data.append(line)
+    return {PICKLED: {'table_description': description, 'table_data': data}}
+
+
+def main():
+    """Time both ways of reading the first line"""
+    print "%-12s %8s %12s %12s %8s" % ('table', 'cells', 'csv (ms)',
+                                        'direct (ms)', 'speedup')
+    for name, columns, rows in (('project', 8, 1),
+                                ('wide', 200, 10),
+                                ('long', 8, 10000),
+                                ('wide long', 200, 1000)):
+        box = make_box(columns, rows)
+        assert boxes.get_lines(box) == boxes._get_csv_lines(box)
+        number = max(1, 20000 / (columns * rows))
+        csv_time = timeit.Timer(lambda: boxes._get_csv_lines(box)).timeit(number)
+        direct_time = timeit.Timer(lambda: boxes.get_lines(box)).timeit(number)
+        print "%-12s %8s %12.3f %12.3f %7.0fx" % (name,
+                                                  columns * rows,
+                                                  csv_time * 1000 / number,
+                                                  direct_time * 1000 / number,
+                                                  csv_time / direct_time)
+
+
+if __name__ == '__main__':
+    main()
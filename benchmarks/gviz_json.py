@@ -0,0 +1,63 @@
+"""Benchmark writing the Google Visualization JSON of a pickled table
+
+Compares raisin.box.gviz.to_json, writing the JSON straight from the table,
+with building a gviz_api.DataTable and calling its ToJSon method.
+
+    python benchmarks/gviz_json.py
+"""
+
+import time
+import random
+
+from raisin.box import gviz
+from raisin.box.table import Table
+
+
+def make_table(rows):
+    """Make an expression table with the given number of rows"""
+    random.seed(0)
+    description = [('gene_id', 'string', 'Gene ID'),
+                   ('chromosome', 'string', 'Chromosome'),
+                   ('reads', 'number', 'Reads'),
+                   ('rpkm', 'number', 'RPKM'),
+                   ('detected', 'boolean', 'Detected')]
+    data = []
+    for row in range(0, rows):
+        data.append(['ENSG%011d' % row,
+                     'chr%s' % random.randint(1, 22),
+                     random.randint(0, 100000),
+                     random.random() * 1000,
+                     random.random() > 0.5])
+    return {'table_description': description, 'table_data': data}
+
+
+def best(function, repeat=3):
+    """Get the best time of a function in milliseconds"""
+    times = []
+    for index in range(0, repeat):
+        start = time.time()
+        function()
+        times.append(time.time() - start)
+    return min(times) * 1000
+
+
+def main():
+    """Time both ways of writing the JSON"""
+    print "%-8s %-8s %14s %14s %8s" % ('rows', 'table', 'DataTable (ms)',
+                                       'to_json (ms)', 'speedup')
+    for rows in (100, 10000, 100000):
+        table = make_table(rows)
+        columnar = Table.from_table(table)
+        expected = gviz.gviz_to_json(table)
+        assert gviz.to_json(table) == expected
+        assert gviz.to_json(columnar) == expected
+        gviz_time = best(lambda: gviz.gviz_to_json(table))
+        for name, value in (('rows', table), ('columns', columnar)):
+            direct_time = best(lambda: gviz.to_json(value))
+            print "%-8s %-8s %14.1f %14.1f %7.1fx" % (rows, name, gviz_time,
+                                                      direct_time,
+                                                      gviz_time / direct_time)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Benchmark the time it takes to import raisin.box
+
+Each statement is run in a fresh interpreter, and the median wall time of
+the runs is reported, including the start up of the interpreter itself.
+
+    python benchmarks/import_time.py
+"""
+
+import sys
+import time
+import subprocess
+
+STATEMENTS = (('interpreter', 'pass'),
+              ('config', 'import raisin.box.config'),
+              ('raisin.box', 'import raisin.box'),
+              ('BOXES', 'import raisin.box; raisin.box.BOXES.keys()'),
+              ('registry', 'import raisin.box; '
+                           'raisin.box.RESOURCES_REGISTRY.get("projects")'))
+
+RUNS = 20
+
+
+def measure(statement):
+    """Get the median time of running the statement in a new interpreter"""
+    times = []
+    for run in range(0, RUNS):
+        start = time.time()
+        subprocess.check_call([sys.executable, '-c', statement])
+        times.append(time.time() - start)
+    times.sort()
+    return times[len(times) / 2]
+
+
+def main():
+    """Time the imports"""
+    print "%-12s %10s" % ('import', 'time (ms)')
+    for name, statement in STATEMENTS:
+        print "%-12s %10.1f" % (name, measure(statement) * 1000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark the read distribution box for experiments with many lanes
+
+Each lane has the overall distribution and one distribution for each of the
+length ranges. The time per lane stays flat as the number of lanes grows.
+Both the filtered sparklines and the sliced sparklines are timed.
+
+    python benchmarks/read_distribution.py
+"""
+
+import time
+
+from raisin.box import boxes
+from raisin.box.config import PICKLED
+
+# The starts of the length ranges, 0 being the overall distribution
+STARTS = (0, 1, 100, 1000, 5000)
+
+# The number of positions in each distribution
+POSITIONS = 10
+
+
+def make_box(lanes):
+    """Make a read distribution box with the given number of lanes"""
+    data = []
+    for lane in range(0, lanes):
+        for start in STARTS:
+            for position in range(0, POSITIONS):
+                data.append(['Replicate %s' % (lane / 2),
+                             'Lane %s' % lane,
+                             start,
+                             position,
+                             lane + start + position])
+    return {PICKLED: {'table_data': data}, 'title': 'Read Distribution'}
+
+
+def main():
+    """Time the read distribution for a growing number of lanes"""
+    # Import the boxes module before timing
+    read_distribution = boxes._read_distribution
+    print "%-10s %8s %12s %14s %12s" % ('sparklines', 'lanes', 'time (ms)',
+                                        'per lane (us)', 'size (kB)')
+    for sparklines in ('filtered', 'sliced'):
+        for lanes in (10, 100, 1000, 10000):
+            box = make_box(lanes)
+            box['sparklines'] = sparklines
+            start = time.time()
+            read_distribution(None, box, 'lane')
+            duration = time.time() - start
+            print "%-10s %8s %12.1f %14.1f %12.0f" % (
+                sparklines,
+                lanes,
+                duration * 1000,
+                duration * 1000000 / lanes,
+                len(box['javascript']) / 1024.0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark matching URLs onto the path patterns of boxes.ini
+
+Compares raisin.box.routes.Router, a trie of the path segments, with trying
+a regular expression for each section of boxes.ini in turn, on a URL for
+each section.
+
+    python benchmarks/routes.py
+"""
+
+import re
+import time
+
+from raisin.box import BOXES
+from raisin.box.routes import Router
+
+
+def compile_patterns(boxes):
+    """Compile a regular expression for the path of each section"""
+    patterns = []
+    for name in boxes:
+        path = boxes[name]['path']
+        expression = re.sub(r':(\w+)', r'(?P<\1>[^/]+)', path.strip('/'))
+        patterns.append((name, re.compile('^%s$' % expression)))
+    return patterns
+
+
+def match_regex(patterns, path):
+    """Match a path with the regular expression of each section in turn"""
+    path = path.split('?', 1)[0].strip('/')
+    for name, pattern in patterns:
+        found = pattern.match(path)
+        if found is not None:
+            parameters = found.groupdict()
+            if parameters.get('box_name', name) == name:
+                return name, parameters
+    return None
+
+
+def make_urls(boxes):
+    """Make a URL for each section, naming the section as box_name"""
+    urls = []
+    for index, name in enumerate(boxes):
+        path = boxes[name]['path']
+        values = {'box_name': name}
+        url = re.sub(r':(\w+)',
+                     lambda found: values.get(found.group(1),
+                                              'value%s' % index),
+                     path)
+        urls.append(url)
+    return urls
+
+
+def best(function, repeat=5):
+    """Get the best time of a function in milliseconds"""
+    times = []
+    for index in range(0, repeat):
+        start = time.time()
+        function()
+        times.append(time.time() - start)
+    return min(times) * 1000
+
+
+def main():
+    """Time both ways of matching the URLs"""
+    boxes = BOXES
+    urls = make_urls(boxes) * 100
+    start = time.time()
+    router = Router(boxes)
+    trie_build = (time.time() - start) * 1000
+    start = time.time()
+    patterns = compile_patterns(boxes)
+    regex_build = (time.time() - start) * 1000
+    for url in urls:
+        assert router.match(url) == match_regex(patterns, url), url
+    regex_time = best(lambda: [match_regex(patterns, url) for url in urls])
+    trie_time = best(lambda: [router.match(url) for url in urls])
+    print "%s sections, %s URLs" % (len(patterns), len(urls))
+    print "%-8s %12s %12s %12s" % ('', 'build (ms)', 'match (ms)',
+                                    'per URL (us)')
+    print "%-8s %12.2f %12.1f %12.1f" % ('regex', regex_build, regex_time,
+                                         regex_time * 1000 / len(urls))
+    print "%-8s %12.2f %12.1f %12.1f" % ('trie', trie_build, trie_time,
+                                         trie_time * 1000 / len(urls))
+    print "speedup: %.1fx" % (regex_time / trie_time)
+
+
+if __name__ == '__main__':
+    main()
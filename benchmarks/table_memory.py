@@ -0,0 +1,74 @@
+"""Benchmark the memory used by a table stored by rows or by column
+
+Compares the table_data of a PICKLED expression table of 60k genes, as lists
+of rows, with a raisin.box.table.Table storing it by column. The sizes are
+those of the objects only referenced by the table.
+
+    python benchmarks/table_memory.py
+"""
+
+import sys
+import time
+import random
+import cPickle
+
+from raisin.box.table import Table
+
+
+def make_table(rows):
+    """Make an expression table with the given number of genes"""
+    random.seed(0)
+    description = [('Gene ID', 'string'),
+                   ('Chromosome', 'string'),
+                   ('Start', 'number'),
+                   ('RPKM 1', 'number'),
+                   ('RPKM 2', 'number'),
+                   ('Detected', 'boolean')]
+    data = []
+    for row in range(0, rows):
+        data.append(['ENSG%011d' % row,
+                     'chr%s' % random.randint(1, 22),
+                     random.randint(0, 10 ** 8),
+                     random.random() * 1000,
+                     random.random() * 1000,
+                     random.random() > 0.5])
+    return {'table_description': description, 'table_data': data}
+
+
+def get_size(value, seen=None):
+    """Get the size in bytes of an object and the objects it holds"""
+    if seen is None:
+        seen = set()
+    if id(value) in seen or value in (None, True, False):
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(get_size(item, seen) for item in value)
+    elif isinstance(value, dict):
+        size += sum(get_size(key, seen) + get_size(item, seen)
+                    for key, item in value.items())
+    elif isinstance(value, Table):
+        size += get_size(value.columns, seen)
+    return size
+
+
+def main():
+    """Compare the sizes of the two ways of storing the table"""
+    # The tables are unpickled, as in the boxes, so that the strings are
+    # not shared between the rows
+    rows = cPickle.loads(cPickle.dumps(make_table(60000), 2))
+    start = time.time()
+    columns = Table.from_table(rows)
+    conversion = time.time() - start
+    by_rows = get_size(rows['table_data'])
+    by_column = get_size(columns)
+    print "%-10s %12s" % ('storage', 'size (MB)')
+    print "%-10s %12.1f" % ('rows', by_rows / 1024.0 ** 2)
+    print "%-10s %12.1f" % ('columns', by_column / 1024.0 ** 2)
+    print "%.1fx less memory, converted in %.0f ms" % (
+        float(by_rows) / by_column, conversion * 1000)
+
+
+if __name__ == '__main__':
+    main()
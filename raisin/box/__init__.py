@@ -10,6 +10,9 @@ BOXES: Read from the boxes.ini file
 
     * Used by raisin.restyler to get meta information about the boxes
 
+RESOURCES and BOXES are read from the compiled snapshot of both files when it
+is up to date, see raisin.box.snapshot. Both are only loaded on first access.
+
 RESOURCES_REGISTRY: A list of registered resources. For each resource contains
 
     * the name of the resource
@@ -18,7 +21,11 @@ RESOURCES_REGISTRY: A list of registered resources. For each resource contains
 
     * the list of formats that the augmentation method needs
 
-boxes: contains methods augmenting the information in BOXES.
+    The list is a Registry, which also looks up the method and formats of a
+    resource by name, and the formats to fetch for all the boxes of a tab.
+
+boxes: contains methods augmenting the information in BOXES. The module is
+only imported on first access, or when RESOURCES_REGISTRY is first read.
 
     * Used for injection of Javascript
 
@@ -29,16 +36,39 @@ boxes: contains methods augmenting the information in BOXES.
         * add log scales
 
     * Rendering the title and description of the boxes
+
+batch.augment_many: augments all the boxes of a tab together, sharing the
+decoded resources and the first lines of their tables.
+
+routes.ROUTER: finds the box and the parameters a URL refers to, from the
+path patterns of boxes.ini.
 """
 
-import os
-from configobj import ConfigObj
+import threading
+from raisin.box.lazy import LazyProxy
+from raisin.box.lazy import import_module
+from raisin.box.registry import Registry
+
+# The RESOURCES and BOXES configurations, once loaded
+_CONFIGURATIONS = []
+_CONFIGURATIONS_LOCK = threading.Lock()
+
+
+def _configuration(index):
+    """Get a function loading one of the configurations"""
+    def load():
+        """Load both configurations and return the requested one"""
+        with _CONFIGURATIONS_LOCK:
+            if not _CONFIGURATIONS:
+                from raisin.box import snapshot
+                _CONFIGURATIONS.extend(snapshot.load())
+        return _CONFIGURATIONS[index]
+    return load
 
-RESOURCES = ConfigObj(os.path.join(os.path.dirname(__file__), "resources.ini"),
-                      interpolation=False)
-BOXES = ConfigObj(os.path.join(os.path.dirname(__file__), "boxes.ini"))
+RESOURCES = LazyProxy(_configuration(0))
+BOXES = LazyProxy(_configuration(1))
 
 # All boxes are registered here
-RESOURCES_REGISTRY = []
+RESOURCES_REGISTRY = Registry(modules=('raisin.box.boxes',))
 
-from raisin.box import boxes
+boxes = LazyProxy(lambda: import_module('raisin.box.boxes'))
@@ -0,0 +1,121 @@
+"""Augmenting all the boxes of a tab together
+
+The boxes of a tab often show the same resource. When they are augmented
+together with augment_many, each pickled resource is only decoded once, and
+the first line of each table is only read once for all the boxes.
+"""
+
+import time
+import cPickle
+import threading
+from raisin.box import RESOURCES_REGISTRY
+from raisin.box.binary import BinaryTable
+from raisin.box.binary import decode as decode_table
+from raisin.box.binary import is_binary
+from raisin.box.config import PICKLED
+from raisin.box.counters import DECODING
+from raisin.box.table import Table
+
+# What is shared between the augmenters of the batch being augmented in the
+# current thread. The first lines of the tables read by get_lines are kept
+# in SHARED.lines, keyed by the id of the table.
+SHARED = threading.local()
+
+
+def _unpickle(payload):
+    """Unpickle a PICKLED resource, counting it"""
+    DECODING.add('unpickled')
+    return cPickle.loads(payload)
+
+
+def to_columnar(resource):
+    """Store a decoded table as a raisin.box.table.Table.
+
+    Resources that are not plain tables are given back as they are.
+    """
+    if isinstance(resource, BinaryTable):
+        return Table.from_columns(resource.description,
+                                  [resource.column(index) for index
+                                   in range(0, len(resource.description))])
+    if (isinstance(resource, dict) and
+            sorted(resource) == ['table_data', 'table_description']):
+        try:
+            return Table.from_table(resource)
+        except (TypeError, ValueError):
+            pass
+    return resource
+
+
+def decode(box, decoded=None, columnar=False):
+    """Decode the PICKLED resource of a box if it is still pickled.
+
+    The resource is either pickled or, when the backend sent it as TABLE, in
+    the binary format of raisin.box.binary. Only the header of a binary table
+    is read, and the rows are read when table_data is first used, as many
+    augmenters only look at the description or at some of the columns. A
+    pickled resource can not be read in part, so it is unpickled right away,
+    and only binary tables are decoded lazily. The counters in
+    raisin.box.counters.DECODING show how often the whole resource was
+    decoded. With columnar=True, tables are stored by column in a
+    raisin.box.table.Table, which takes much less memory for large tables.
+
+    Resources already decoded are taken from the decoded dictionary, which
+    is keyed by the pickled resource, and new ones are added to it.
+    """
+    payload = box.get(PICKLED, None)
+    if type(payload) is str:
+        if decoded is None:
+            decoded = {}
+        if not payload in decoded:
+            DECODING.add('resources')
+            if is_binary(payload):
+                decoded[payload] = decode_table(payload)
+            else:
+                decoded[payload] = _unpickle(payload)
+            if columnar:
+                decoded[payload] = to_columnar(decoded[payload])
+        box[PICKLED] = decoded[payload]
+    return box
+
+
+def augment_many(context, boxes, columnar=False):
+    """Augment the boxes of a tab together.
+
+    The boxes are given as a dictionary, or as a list of (name, box) pairs to
+    augment them in order. The PICKLED resources can be given decoded, as
+    usual, or still pickled, in which case they are decoded once for all the
+    boxes sharing them. With columnar=True, they are decoded into tables
+    stored by column.
+
+    The JSON of the boxes whose augmenter only sets the title is forwarded
+    as it was fetched, without decoding anything, see
+    raisin.box.registry.is_passthrough.
+
+    The boxes are augmented in place, as by the augmenters. Returns a
+    dictionary with the augmented boxes, and a dictionary with the time in
+    seconds spent on each of them. Boxes without augmenter are returned as
+    they are.
+    """
+    if hasattr(boxes, 'items'):
+        boxes = boxes.items()
+    decoded = {}
+    results = {}
+    timings = {}
+    previous = getattr(SHARED, 'lines', None)
+    SHARED.lines = {}
+    try:
+        for name, box in boxes:
+            start = time.time()
+            registered = RESOURCES_REGISTRY.get(name)
+            if RESOURCES_REGISTRY.passthrough(name):
+                registered[1](context, box)
+            elif registered is not None:
+                decode(box, decoded, columnar)
+                registered[1](context, box)
+            else:
+                decode(box, decoded, columnar)
+            results[name] = box
+            timings[name] = time.time() - start
+    finally:
+        SHARED.lines = previous
+    return results, timings
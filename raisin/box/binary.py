@@ -0,0 +1,513 @@
+"""Binary format for the tables of the PICKLED resources
+
+The tables needing computation come as pickled dictionaries with a
+table_description and a table_data. Unpickling runs whatever the pickle
+says, and builds every cell of the table before the first one is looked at.
+The binary format only holds tables, and is read without running anything:
+
+    content = encode(table)
+    table = decode(content)
+
+It starts with a header giving the description and the type of each column,
+followed by one block per column. Numbers and booleans are stored as arrays
+of fixed size values, and strings as an array of offsets into their UTF-8
+bytes. Decoding only reads the header, and each column is read from the
+content when it is first used, so that looking at a few columns of a large
+table does not read the others.
+
+All integers are little endian. The header is:
+
+    'RBT' and the version, as one byte
+    uint32 number of rows, uint16 number of columns
+    for each column:
+        the description of the column, see _pack_description
+        uint8 kind of values, see KINDS
+        uint8 flags, NULLS and INTEGERS
+        uint32 offset of the block from the start, uint32 length of the block
+
+A block starts with a bitmap of the rows that are None if the NULLS flag is
+set, and one of the rows that are integers in a column of floats if the
+INTEGERS flag is set. The values follow, the rows that are None holding 0.
+
+Tables that can not be stored exactly, for example with dates or formatted
+values, make encode raise ValueError. They are still sent pickled. Content
+that is truncated or corrupted makes decoding, or reading a column, raise
+ValueError.
+"""
+
+import sys
+import array
+import struct
+from itertools import izip
+from itertools import islice
+from collections import Mapping
+from raisin.box.counters import DECODING
+
+MAGIC = 'RBT'
+VERSION = 1
+
+HEADER = struct.Struct('<3sBIH')
+COLUMN = struct.Struct('<BBII')
+LENGTH = struct.Struct('<I')
+
+# The kinds of values of a column
+INTEGER = ord('q')
+FLOAT = ord('d')
+BOOLEAN = ord('b')
+BYTES = ord('s')
+UNICODE = ord('u')
+KINDS = (INTEGER, FLOAT, BOOLEAN, BYTES, UNICODE)
+
+# The flags of a column
+NULLS = 1
+INTEGERS = 2
+
+# The containers of the description of a column
+CONTAINERS = {str: 's', unicode: 'u', tuple: 't', list: 'l'}
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+
+def _array_type(size, signed):
+    """Get the array type code of integers of the given size, if any"""
+    for code in ('bhilq' if signed else 'BHILQ'):
+        try:
+            if array.array(code).itemsize == size:
+                return code
+        except ValueError:
+            pass
+    return None
+
+ARRAY_INT64 = _array_type(8, True)
+ARRAY_UINT32 = _array_type(4, False)
+LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def is_binary(content):
+    """Check whether the content is a table in the binary format"""
+    return isinstance(content, str) and content[:3] == MAGIC
+
+
+def _pack_text(value):
+    """Pack a str or unicode string, keeping its type"""
+    if isinstance(value, unicode):
+        data = value.encode('utf-8')
+        return 'u' + LENGTH.pack(len(data)) + data
+    if isinstance(value, str):
+        return 's' + LENGTH.pack(len(value)) + value
+    raise ValueError("Not a string: %r" % (value,))
+
+
+def _unpack_text(content, offset):
+    """Unpack a string packed with _pack_text, and the offset after it"""
+    start = offset + 1 + LENGTH.size
+    if start > len(content):
+        raise ValueError("Truncated binary table")
+    kind = content[offset]
+    if not kind in ('s', 'u'):
+        raise ValueError("Corrupted binary table")
+    length, = LENGTH.unpack_from(content, offset + 1)
+    if start + length > len(content):
+        raise ValueError("Truncated binary table")
+    value = content[start:start + length]
+    if kind == 'u':
+        value = value.decode('utf-8')
+    return value, start + length
+
+
+def _pack_description(column):
+    """Pack the description of a column.
+
+    The description is a string, or a tuple or list of strings, as given to
+    gviz_api. It is packed as its container, the number of strings and the
+    strings, so that it is decoded as it was.
+    """
+    container = CONTAINERS.get(type(column), None)
+    if container is None:
+        raise ValueError("Unsupported column description: %r" % (column,))
+    if container in 'su':
+        return 's' + chr(1) + _pack_text(column)
+    if len(column) > 3:
+        raise ValueError("Unsupported column description: %r" % (column,))
+    return container + chr(len(column)) + ''.join(_pack_text(value)
+                                                  for value in column)
+
+
+def _unpack_description(content, offset):
+    """Unpack the description of a column, and the offset after it"""
+    if offset + 2 > len(content):
+        raise ValueError("Truncated binary table")
+    container = content[offset]
+    count = ord(content[offset + 1])
+    if not container in ('s', 't', 'l') or (container == 's' and count != 1):
+        raise ValueError("Corrupted binary table")
+    offset += 2
+    values = []
+    for index in range(0, count):
+        value, offset = _unpack_text(content, offset)
+        values.append(value)
+    if container == 's':
+        return values[0], offset
+    if container == 't':
+        return tuple(values), offset
+    return values, offset
+
+
+def _get_type(column):
+    """Get the gviz_api type of a column description"""
+    if isinstance(column, basestring):
+        return 'string'
+    if len(column) > 1:
+        return column[1]
+    return 'string'
+
+
+def _is_integer(value):
+    """Check whether the value is an int or long, but not a bool"""
+    return type(value) in (int, long)
+
+
+def _get_kind(column_type, values):
+    """Get the kind of values of a column, and its flags"""
+    flags = NULLS if None in values else 0
+    present = [value for value in values if value is not None]
+    if column_type == 'number':
+        if all(_is_integer(value) for value in present):
+            if present and not (INT64_MIN <= min(present) and
+                                max(present) <= INT64_MAX):
+                raise ValueError("Integer too large to store")
+            return INTEGER, flags
+        for value in present:
+            if type(value) is float:
+                continue
+            if not _is_integer(value):
+                raise ValueError("Not a number: %r" % (value,))
+            try:
+                exact = float(value) == value
+            except OverflowError:
+                exact = False
+            if not exact:
+                raise ValueError("Integer too large to store: %r" % value)
+            flags |= INTEGERS
+        return FLOAT, flags
+    if column_type == 'boolean':
+        if all(type(value) is bool for value in present):
+            return BOOLEAN, flags
+        raise ValueError("Not a boolean in a boolean column")
+    if column_type == 'string':
+        if all(type(value) is str for value in present):
+            return BYTES, flags
+        if all(type(value) is unicode for value in present):
+            return UNICODE, flags
+        raise ValueError("Not all str or all unicode in a string column")
+    raise ValueError("Unsupported column type: %s" % column_type)
+
+
+def _bitmap(values, test):
+    """Get the bitmap of the values passing the test"""
+    bits = bytearray((len(values) + 7) // 8)
+    for index, value in enumerate(values):
+        if test(value):
+            bits[index >> 3] |= 1 << (index & 7)
+    return str(bits)
+
+
+def _to_bytes(values, code, struct_code):
+    """Get the little endian bytes of an array of values"""
+    if code is None:
+        return struct.pack('<%s%s' % (len(values), struct_code), *values)
+    values = array.array(code, values)
+    if not LITTLE_ENDIAN:
+        values.byteswap()
+    return values.tostring()
+
+
+def _from_bytes(content, offset, count, code, struct_code):
+    """Read an array of little endian values from the content"""
+    if code is None:
+        return struct.unpack_from('<%s%s' % (count, struct_code),
+                                  content,
+                                  offset)
+    values = array.array(code)
+    values.fromstring(buffer(content, offset, count * values.itemsize))
+    if not LITTLE_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _to_list(values):
+    """Get a list of the values read by _from_bytes"""
+    if isinstance(values, array.array):
+        return values.tolist()
+    return list(values)
+
+
+def _get_block_size(kind, flags, rows):
+    """Get the size of the block of a column, without its strings"""
+    bitmap_size = (rows + 7) // 8
+    size = 0
+    if flags & NULLS:
+        size += bitmap_size
+    if flags & INTEGERS:
+        size += bitmap_size
+    if kind in (BYTES, UNICODE):
+        return size + 4 * (rows + 1)
+    if kind in (INTEGER, FLOAT):
+        return size + 8 * rows
+    return size + rows
+
+
+def _pack_block(kind, flags, values):
+    """Pack the values of a column"""
+    parts = []
+    if flags & NULLS:
+        parts.append(_bitmap(values, lambda value: value is None))
+    if flags & INTEGERS:
+        parts.append(_bitmap(values, _is_integer))
+    if kind in (BYTES, UNICODE):
+        if kind == UNICODE:
+            values = [value.encode('utf-8') if value is not None else ''
+                      for value in values]
+        else:
+            values = [value if value is not None else '' for value in values]
+        offsets = [0]
+        add = offsets.append
+        end = 0
+        for value in values:
+            end += len(value)
+            add(end)
+        if end > 0xffffffff:
+            raise ValueError("Strings too large to store")
+        parts.append(_to_bytes(offsets, ARRAY_UINT32, 'I'))
+        parts.append(''.join(values))
+    elif kind == INTEGER:
+        parts.append(_to_bytes([value or 0 for value in values],
+                               ARRAY_INT64,
+                               'q'))
+    elif kind == FLOAT:
+        parts.append(_to_bytes([float(value or 0) for value in values],
+                               'd',
+                               'd'))
+    else:
+        parts.append(''.join(value and '\x01' or '\x00' for value in values))
+    return ''.join(parts)
+
+
+def encode(table):
+    """Encode a table in the binary format.
+
+    The table is a dictionary with a table_description and a table_data, as
+    in the PICKLED resources. Raises ValueError if it can not be stored
+    exactly.
+    """
+    keys = set(['table_description', 'table_data'])
+    if not isinstance(table, dict) or set(table) != keys:
+        raise ValueError("Not a table")
+    description = table['table_description']
+    data = table['table_data']
+    if not isinstance(description, list):
+        raise ValueError("Unsupported table description")
+    width = len(description)
+    for row in data:
+        if type(row) is not list or len(row) != width:
+            raise ValueError("Rows must be lists with a value per column")
+    columns = []
+    blocks = []
+    for index, column in enumerate(description):
+        values = [row[index] for row in data]
+        kind, flags = _get_kind(_get_type(column), values)
+        block = _pack_block(kind, flags, values)
+        columns.append((_pack_description(column), kind, flags, len(block)))
+        blocks.append(block)
+    header = [HEADER.pack(MAGIC, VERSION, len(data), width)]
+    size = len(header[0]) + sum(len(column[0]) + COLUMN.size
+                                for column in columns)
+    offset = size
+    for packed, kind, flags, length in columns:
+        header.append(packed)
+        header.append(COLUMN.pack(kind, flags, offset, length))
+        offset += length
+    return ''.join(header + blocks)
+
+
+class BinaryTable(Mapping):
+    """Table read from the binary format.
+
+    It is used as the dictionary of the PICKLED resources, with a
+    table_description and a table_data. The values of a column are read on
+    first use, and the rows when table_data is first used.
+    """
+
+    def __init__(self, content):
+        if not is_binary(content):
+            raise ValueError("Not a binary table")
+        if len(content) < HEADER.size:
+            raise ValueError("Truncated binary table")
+        magic, version, rows, width = HEADER.unpack_from(content, 0)
+        if version != VERSION:
+            raise ValueError("Unsupported version: %s" % version)
+        self.content = content
+        self.rows = rows
+        self.description = []
+        self.layout = []
+        offset = HEADER.size
+        for index in range(0, width):
+            column, offset = _unpack_description(content, offset)
+            if offset + COLUMN.size > len(content):
+                raise ValueError("Truncated binary table")
+            kind, flags, start, length = COLUMN.unpack_from(content, offset)
+            if (kind not in KINDS or
+                    length < _get_block_size(kind, flags, rows)):
+                raise ValueError("Corrupted binary table")
+            if start + length > len(content):
+                raise ValueError("Truncated binary table")
+            offset += COLUMN.size
+            self.description.append(column)
+            self.layout.append((kind, flags, start, start + length))
+        self._columns = [None] * width
+        self._data = None
+
+    def _read_column(self, index):
+        """Read the values of a column"""
+        kind, flags, offset, end = self.layout[index]
+        content = self.content
+        rows = self.rows
+        bitmap_size = (rows + 7) // 8
+        nulls = integers = None
+        if flags & NULLS:
+            nulls = content[offset:offset + bitmap_size]
+            offset += bitmap_size
+        if flags & INTEGERS:
+            integers = content[offset:offset + bitmap_size]
+            offset += bitmap_size
+        if kind in (BYTES, UNICODE):
+            offsets = _to_list(_from_bytes(content, offset, rows + 1,
+                                           ARRAY_UINT32, 'I'))
+            start = offset + 4 * (rows + 1)
+            if start + offsets[-1] > end:
+                raise ValueError("Corrupted binary table")
+            strings = content[start:start + offsets[-1]]
+            values = [strings[begin:end] for begin, end in
+                      izip(offsets, islice(offsets, 1, None))]
+            if kind == UNICODE:
+                values = [value.decode('utf-8') for value in values]
+        elif kind == INTEGER:
+            values = _to_list(_from_bytes(content, offset, rows,
+                                          ARRAY_INT64, 'q'))
+        elif kind == FLOAT:
+            values = _to_list(_from_bytes(content, offset, rows, 'd', 'd'))
+        else:
+            values = [value != '\x00'
+                      for value in content[offset:offset + rows]]
+        if integers is not None:
+            for row in xrange(0, rows):
+                if ord(integers[row >> 3]) & (1 << (row & 7)):
+                    values[row] = int(values[row])
+        if nulls is not None:
+            for row in xrange(0, rows):
+                if ord(nulls[row >> 3]) & (1 << (row & 7)):
+                    values[row] = None
+        return values
+
+    def column(self, index):
+        """Get the values of a column, reading them on first use"""
+        if self._columns[index] is None:
+            self._columns[index] = self._read_column(index)
+            DECODING.add('columns_read')
+        return self._columns[index]
+
+    def _read_value(self, index, row):
+        """Read the value of a column in a row, without the other rows"""
+        kind, flags, offset, end = self.layout[index]
+        content = self.content
+        bitmap_size = (self.rows + 7) // 8
+        bit = 1 << (row & 7)
+        nulls = integers = False
+        if flags & NULLS:
+            nulls = ord(content[offset + (row >> 3)]) & bit
+            offset += bitmap_size
+        if flags & INTEGERS:
+            integers = ord(content[offset + (row >> 3)]) & bit
+            offset += bitmap_size
+        if nulls:
+            return None
+        if kind in (BYTES, UNICODE):
+            begin, stop = struct.unpack_from('<II', content, offset + 4 * row)
+            start = offset + 4 * (self.rows + 1)
+            if begin > stop or start + stop > end:
+                raise ValueError("Corrupted binary table")
+            value = content[start + begin:start + stop]
+            if kind == UNICODE:
+                value = value.decode('utf-8')
+        elif kind == INTEGER:
+            value, = struct.unpack_from('<q', content, offset + 8 * row)
+        elif kind == FLOAT:
+            value, = struct.unpack_from('<d', content, offset + 8 * row)
+        else:
+            value = content[offset + row] != '\x00'
+        if integers:
+            value = int(value)
+        return value
+
+    def row(self, index):
+        """Get the values of a row.
+
+        The columns already read are used, and the values of the others are
+        read from the content alone, so that looking at a single row does
+        not read the whole table.
+        """
+        if not 0 <= index < self.rows:
+            raise IndexError("Row out of range: %s" % index)
+        if self._data is not None:
+            return self._data[index]
+        return [self._read_value(column, index)
+                if self._columns[column] is None
+                else self._columns[column][index]
+                for column in range(0, len(self.description))]
+
+    @property
+    def data(self):
+        """The rows of the table, as lists"""
+        if self._data is None:
+            DECODING.add('tables_read')
+            if self.description:
+                columns = [self.column(index)
+                           for index in range(0, len(self.description))]
+                self._data = map(list, zip(*columns))
+            else:
+                self._data = [[] for row in xrange(0, self.rows)]
+        return self._data
+
+    def __getitem__(self, key):
+        if key == 'table_description':
+            return self.description
+        if key == 'table_data':
+            return self.data
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        # Without reading the rows, as Mapping does
+        return key in ('table_description', 'table_data')
+
+    def __iter__(self):
+        return iter(('table_description', 'table_data'))
+
+    def __len__(self):
+        return 2
+
+    def __reduce__(self):
+        # Pickles and copies are made from the content
+        return (decode, (self.content,))
+
+    def __repr__(self):
+        return "<BinaryTable of %s rows and %s columns>" % (
+            self.rows, len(self.description))
+
+
+def decode(content):
+    """Decode a table in the binary format.
+
+    Only the header is read, the values are read when they are used.
+    """
+    return BinaryTable(content)
@@ -1,6 +1,7 @@
 """Definition of methods augmenting resources."""
 
 import csv
+import json
 # JSON is needed for Google visualization charts
 # It is not needed for resources that are just Python dictionaries
 from raisin.box.config import JSON
@@ -9,7 +10,20 @@ from raisin.box.config import JSON
 # It is not needed when the JSON resource can be passed through as is
 from raisin.box.config import PICKLED
 from raisin.box import RESOURCES_REGISTRY
-from gvizapi import gviz_api
+from raisin.box.batch import SHARED
+from raisin.box.binary import BinaryTable
+from raisin.box.codegen import SNIPPETS
+from raisin.box.downsample import downsample
+from raisin.box.downsample import is_log_scale
+from raisin.box.gviz import to_json
+from raisin.box.library import use_library
+from raisin.box.static import TwoPhase
+from raisin.box.table import find_column
+from raisin.box.table import first_row
+from raisin.box.table import parse_description
+from raisin.box.table import top_rows
+from raisin.box.timing import TIMINGS
+from raisin.box.timing import Timed
 
 
 # pylint: disable=R0903
@@ -31,29 +45,97 @@ class augment(object):
     This is how to use the information from the pickled information:
 
     box['description'] = [{'Species': box[PICKLED]['species']}]
+
+    What only depends on the configuration of the box in boxes.ini, like
+    most chart options, can be set by a static phase, which is only run once
+    for each box, see raisin.box.static:
+
+        @augment((JSON,PICKLED), static=_position)
+
+    The methods that only set the title of a JSON box are marked as passing
+    it through, so that its JSON is forwarded as it was fetched, see
+    raisin.box.registry.is_passthrough:
+
+        @augment((JSON,), passthrough=True)
+
+    When timing is enabled, the methods are registered timed, see
+    raisin.box.timing.
     """
     # pylint: disable=C0103
     # This class is used as a decorator, so allow lower case name
-    def __init__(self, formats):
-        """Store the formats that need to be fetched for the method"""
+    def __init__(self, formats, static=None, passthrough=False):
+        """Store the formats that need to be fetched for the method, the
+        static phase of the method, if any, and whether the JSON of the box
+        is passed through"""
+        if passthrough and (tuple(formats) != (JSON,) or static is not None):
+            raise ValueError("Only JSON boxes without static phase can be "
+                             "passed through")
         self.formats = formats
+        self.static = static
+        self.passthrough = passthrough
 
     def __call__(self, wrapped=None):
         """Register the method in the RESOURCES_REGISTRY"""
         if wrapped:
+            wrapped.passthrough = self.passthrough
+            method = wrapped
+            if self.static is not None:
+                method = TwoPhase(wrapped.__name__, self.static, wrapped)
+            if TIMINGS.enabled:
+                method = Timed(wrapped.__name__, method)
             RESOURCES_REGISTRY.append((wrapped.__name__,
-                                       wrapped,
+                                       method,
                                        self.formats, ))
 
 
 def get_lines(box):
-    """Get the lines out of a data table."""
+    """Get the first line out of a data table.
+
+    The column labels are mapped directly onto the first row of the table
+    data. Only tables that can not be mapped directly go through the CSV
+    export of a gviz_api.DataTable.
+
+    While a batch of boxes is augmented, the first line of each table is
+    only read once, see raisin.box.batch.
+    """
     if not box[PICKLED]:
         return {}
+    shared = getattr(SHARED, 'lines', None)
+    if shared is None:
+        return _get_lines(box)
+    table = box[PICKLED]
+    if not id(table) in shared:
+        # Keep the table, so that its id is not reused during the batch
+        shared[id(table)] = (table, _get_lines(box))
+    return dict(shared[id(table)][1])
+
+
+def _get_lines(box):
+    """Get the first line out of a data table."""
     if not 'table_description' in box[PICKLED]:
         raise AttributeError(str(box))
     if not 'table_data' in box[PICKLED]:
         raise AttributeError(str(box))
+    table = box[PICKLED]
+    if isinstance(table, BinaryTable):
+        # Only the first row is needed, not the rows of the whole table
+        data = table.rows and [table.row(0)] or []
+    else:
+        data = table['table_data']
+    try:
+        lines = first_row(table['table_description'], data)
+    except ValueError:
+        # Let the DataTable raise its own exception for the invalid value
+        lines = None
+    if lines is None:
+        lines = _get_csv_lines(box)
+    return lines
+
+
+def _get_csv_lines(box):
+    """Get the first line out of a data table using the CSV export."""
+    # Only imported when needed, as most tables are read directly
+    from gvizapi import gviz_api
     table = gviz_api.DataTable(box[PICKLED]['table_description'],
                                box[PICKLED]['table_data'])
     reader = csv.DictReader(table.ToCsv().split('\n'),
@@ -67,6 +149,95 @@ def get_lines(box):
     return lines
 
 
+def _downsample(box):
+    """Downsample the points of a scatter chart to the maxpoints of its box
+    in boxes.ini"""
+    if not 'maxpoints' in box or not box.get(PICKLED):
+        return box
+    chartoptions = box.get('chartoptions', {})
+    table = downsample(box[PICKLED], int(box['maxpoints']),
+                       is_log_scale(chartoptions.get('hAxis', '')),
+                       is_log_scale(chartoptions.get('vAxis', '')))
+    if table is not box[PICKLED]:
+        box[PICKLED] = table
+        box[JSON] = to_json(table)
+    return box
+
+
+# The static phases of the augmenters, which need to be defined before the
+# augmenters using them
+def _custom_spaced_chart(box):
+    """Set the chart options of the custom spaced charts"""
+    box['chartoptions']['hAxis'] = '''{minValue:'0', maxValue:'100'}'''
+    golden(box, 900)
+    font_size(box)
+    title(box)
+    no_legend(box)
+    option = "{left:'20%', right:'10%', width:'70%', height:'62%'}"
+    box['chartoptions']['chartArea'] = option
+
+
+def _position(box):
+    """Set the chart options of the charts by position"""
+    golden(box, 900)
+    font_size(box)
+    title(box)
+    top_legend(box)
+    option = "{left:'20%', right:'10%', width:'70%', height:'62%'}"
+    box['chartoptions']['chartArea'] = option
+    option = "{minValue:'0'}"
+    box['chartoptions']['hAxis'] = option
+    option = "{minValue:'0', logScale:true}"
+    box['chartoptions']['vAxis'] = option
+
+
+def _mapped_reads(box):
+    """Set the chart options of the mapped reads charts"""
+    option = '{minValue:0}'
+    box['chartoptions']['hAxis'] = option
+    golden(box, 900)
+    font_size(box)
+    title(box)
+    option = "{left:'20%', right:'20%', width:'60%', height:'62%'}"
+    box['chartoptions']['chartArea'] = option
+    option = "{minValue:'0'}"
+    box['chartoptions']['hAxis'] = option
+    option = "{minValue:'0'}"
+    box['chartoptions']['vAxis'] = option
+
+
+def _gene_expression_profile(box):
+    """Set the chart options of the gene expression profiles"""
+    area = '''{left:"10%",right:"30%",width:"60%"}'''
+    box['chartoptions']['chartArea'] = area
+    golden(box, 900)
+    font_size(box)
+    title(box)
+    top_legend(box)
+    option = "{left:'20%', right:'10%', width:'70%', height:'62%'}"
+    box['chartoptions']['chartArea'] = option
+    option = "{minValue:'0', logScale:true}"
+    box['chartoptions']['hAxis'] = option
+    option = "{minValue:'0', logScale:true}"
+    box['chartoptions']['vAxis'] = option
+    return box
+
+
+def _exon_inclusion_profile(box):
+    """Set the chart options of the exon inclusion profiles"""
+    golden(box, 900)
+    font_size(box)
+    title(box)
+    top_legend(box)
+    option = "{left:'20%', right:'10%', width:'70%', height:'62%'}"
+    box['chartoptions']['chartArea'] = option
+    option = "{minValue:'0'}"
+    box['chartoptions']['hAxis'] = option
+    option = "{minValue:'0', logScale:true}"
+    box['chartoptions']['vAxis'] = option
+    return box
+
+
 # pylint: disable=W0613
 # Sometimes not all parameters are used, which is not a problem
 
@@ -131,27 +302,27 @@ def experiments(context, box):
     return box
 
 
-@augment((JSON, PICKLED))
-def project_experimentstable(context, box):
-    """Augment resource."""
-    if not box[PICKLED]:
-        return
-    column_number = len(box[PICKLED]['table_description'])
+def _experiment_link(column_number):
+    """Generate the link to the experiments for a number of columns"""
     javascript = """
-   function makeExperimentLink(dataTable, rowNum){
-       if (dataTable.getValue(rowNum, 0) != undefined) {
-           return String.fromCharCode('60') + 'a href=\"/project/' + dataTable.getValue(rowNum, 0) + '/' + dataTable.getValue(rowNum, 1) + '/' + dataTable.getValue(rowNum, 2) + '\"' + String.fromCharCode('62') + dataTable.getValue(rowNum, 2) + String.fromCharCode('60') + '/a' + String.fromCharCode('62');
-       }
-       else {
-           return '';
-       };
-   }
    view.setColumns([{calc:makeExperimentLink, type:'string', label:'Experiment'},%s]);
 """ % str(range(3, column_number))[1:-1]
     # e.g.
     # >>> str(range(2, 4))[1:-1]
     # '2, 3'
+    return javascript
+
+
+@augment((JSON, PICKLED))
+def project_experimentstable(context, box):
+    """Augment resource."""
+    if not box[PICKLED]:
+        return
+    column_number = len(box[PICKLED]['table_description'])
+    javascript = SNIPPETS.get(('experiment_link', column_number),
+                              _experiment_link, column_number)
     box['javascript'] = javascript
+    use_library(box, 'makeExperimentLink')
     title(box)
     return box
 
@@ -166,17 +337,10 @@ def project_experiment_subset_start(context, box):
 def project_experiment_subset_selection(context, box):
     """Augment resource."""
     javascript = """
-   function makeExperimentSubsetLink(dataTable, rowNum){
-       if (dataTable.getValue(rowNum, 0) != undefined) {
-           return String.fromCharCode('60') + 'a href=\"/project/' + dataTable.getValue(rowNum, 0) + '/experiment/subset/' + dataTable.getValue(rowNum, 1) + '/' + dataTable.getValue(rowNum, 2) + '\"' + String.fromCharCode('62') + dataTable.getValue(rowNum, 4) + String.fromCharCode('60') + '/a' + String.fromCharCode('62');
-       }
-       else {
-           return '';
-       };
-   }
    view.setColumns([3, {calc:makeExperimentSubsetLink, type:'string', label:'Parameter Value'}, 5]);
 """
     box['javascript'] = javascript
+    use_library(box, 'makeExperimentSubsetLink')
     return box
 
 
@@ -184,21 +348,10 @@ def project_experiment_subset_selection(context, box):
 def project_experiment_subset(context, box):
     """Augment resource."""
     column_number = len(box[PICKLED]['table_description'])
-    javascript = """
-   function makeExperimentLink(dataTable, rowNum){
-       if (dataTable.getValue(rowNum, 0) != undefined) {
-           return String.fromCharCode('60') + 'a href=\"/project/' + dataTable.getValue(rowNum, 0) + '/' + dataTable.getValue(rowNum, 1) + '/' + dataTable.getValue(rowNum, 2) + '\"' + String.fromCharCode('62') + dataTable.getValue(rowNum, 2) + String.fromCharCode('60') + '/a' + String.fromCharCode('62');
-       }
-       else {
-           return '';
-       };
-   }
-   view.setColumns([{calc:makeExperimentLink, type:'string', label:'Experiment'},%s]);
-""" % str(range(3, column_number))[1:-1]
-    # e.g.
-    # >>> str(range(2, 4))[1:-1]
-    # '2, 3'
+    javascript = SNIPPETS.get(('experiment_link', column_number),
+                              _experiment_link, column_number)
     box['javascript'] = javascript
+    use_library(box, 'makeExperimentLink')
     return box
 
 
@@ -212,29 +365,22 @@ def project_experiment_subset_pending(context, box):
 def project_downloads(context, box):
     """Augment resource."""
     javascript = """
-   function makeDownloadLink(dataTable, rowNum){
-       if (dataTable.getValue(rowNum, 0) != undefined) {
-           return String.fromCharCode('60') + 'a href=\"' + dataTable.getValue(rowNum, 3) + '\"' + String.fromCharCode('62') + dataTable.getValue(rowNum, 0) + String.fromCharCode('60') + '/a' + String.fromCharCode('62');
-       }
-       else {
-           return '';
-       };
-   }
    view.setColumns([1,2,{calc:makeDownloadLink, type:'string', label:'.csv File Download Link'}]);
     """
     box['javascript'] = javascript
+    use_library(box, 'makeDownloadLink')
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def rnadashboard(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def rnadashboard_results(context, box):
     """Augment resource."""
     title(box)
@@ -332,162 +478,162 @@ def _mapping_info(context, box):
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def experiment_read_summary(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def replicate_read_summary(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def lane_read_summary(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def experiment_mapping_summary(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def replicate_mapping_summary(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def lane_mapping_summary(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def experiment_expression_summary(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def replicate_expression_summary(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def lane_expression_summary(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def experiment_splicing_summary(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def replicate_splicing_summary(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def lane_splicing_summary(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_custom_spaced_chart)
 def experiment_reads_containing_ambiguous_nucleotides(context, box):
     """Augment resource."""
-    return _custom_spaced_chart(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_custom_spaced_chart)
 def replicate_reads_containing_ambiguous_nucleotides(context, box):
     """Augment resource."""
-    return _custom_spaced_chart(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_custom_spaced_chart)
 def experiment_reads_containing_only_unambiguous_nucleotides(context, box):
     """Augment resource."""
-    return _custom_spaced_chart(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_custom_spaced_chart)
 def replicate_reads_containing_only_unambiguous_nucleotides(context, box):
     """Augment resource."""
-    return _custom_spaced_chart(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_custom_spaced_chart)
 def experiment_average_percentage_of_unique_reads(context, box):
     """Augment resource."""
-    return _custom_spaced_chart(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_custom_spaced_chart)
 def replicate_average_percentage_of_unique_reads(context, box):
     """Augment resource."""
-    return _custom_spaced_chart(context, box)
+    return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def experiment_total_ambiguous_and_unambiguous_reads(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def replicate_total_ambiguous_and_unambiguous_reads(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def lane_total_ambiguous_and_unambiguous_reads(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def experiment_average_and_average_unique_reads(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def replicate_average_and_average_unique_reads(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def lane_average_and_average_unique_reads(context, box):
     """Augment resource."""
     title(box)
@@ -512,40 +658,40 @@ def lane_percentage_of_reads_with_ambiguous_bases(context, box):
     return _percentage_of_reads_with_ambiguous_bases(context, box)
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_position)
 def experiment_quality_score_by_position(context, box):
     """Augment resource."""
-    return _position(context, box)
+    return _downsample(box)
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_position)
 def replicate_quality_score_by_position(context, box):
     """Augment resource."""
-    return _position(context, box)
+    return _downsample(box)
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_position)
 def lane_quality_score_by_position(context, box):
     """Augment resource."""
-    return _position(context, box)
+    return _downsample(box)
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_position)
 def experiment_ambiguous_bases_per_position(context, box):
     """Augment resource."""
-    return _position(context, box)
+    return _downsample(box)
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_position)
 def replicate_ambiguous_bases_per_position(context, box):
     """Augment resource."""
-    return _position(context, box)
+    return _downsample(box)
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_position)
 def lane_ambiguous_bases_per_position(context, box):
     """Augment resource."""
-    return _position(context, box)
+    return _downsample(box)
 
 
 @augment((JSON, PICKLED))
@@ -605,9 +751,11 @@ def _read_distribution(self, box, level):
     This is the target div for the second range (100-999):
 
     <div id="read_distribution_1_2_div">
-    """
-    box['javascript'] = ""
 
+    By default each sparkline filters its rows out of the data table in the
+    browser. With "sparklines = sliced" in boxes.ini, the values of each
+    sparkline are given in the code instead.
+    """
     # Need to extract some infos from the table, so load the pickled dictionary
     table = box[PICKLED]
 
@@ -630,35 +778,43 @@ def _read_distribution(self, box, level):
             # The range goes until just before the start of the next range
             ranges[starts[pos]] = (str(starts[pos]), str(starts[pos + 1] - 1))
 
+    # The position of a replicate and lane, and the position of a start, are
+    # used in the target div ids. Both lists are sorted and free of
+    # duplicates, so the positions are the ones given by enumerate.
+    # The code is collected in a list and joined once at the end.
+    js = []
+    add = js.append
+
     # Dynamically fill in the table structure in the read distribution HTML
     # div element
-    js = ""
     # pylint: disable=C0301
-    js += """document.getElementById('%s_read_distribution_div').innerHTML='""" % level
-    js += """<table class="google-visualization-table-table"><tr class="google-visualization-table-tr-head"><td class="google-visualization-table-th">Distribution</td><td class="google-visualization-table-th">Replicate / Lane</td>"""
+    add("""document.getElementById('%s_read_distribution_div').innerHTML='""" % level)
+    add("""<table class="google-visualization-table-table"><tr class="google-visualization-table-tr-head"><td class="google-visualization-table-th">Distribution</td><td class="google-visualization-table-th">Replicate / Lane</td>""")
 
     # Ignore the first start (0), which is reserved for the overall read distribution
     for start in starts[1:]:
-        js += """<td class="google-visualization-table-th">%s - %s</td>""" % (ranges[start][0], ranges[start][1])
-    js += """</tr>"""
+        add("""<td class="google-visualization-table-th">%s - %s</td>""" % (ranges[start][0], ranges[start][1]))
+    add("""</tr>""")
     # Fill in the rows for each labe
-    for replicate_name, lane_name in replicate_lane_names:
-        js += """<tr class="google-visualization-table-tr-even"><td class="google-visualization-table-td"><div id="read_distribution_%s_0_div"></div></td><td class="google-visualization-table-td">%s / %s</td>""" % (replicate_lane_names.index((replicate_name, lane_name)), replicate_name, lane_name)
+    for lane_index, (replicate_name, lane_name) in enumerate(replicate_lane_names):
+        add("""<tr class="google-visualization-table-tr-even"><td class="google-visualization-table-td"><div id="read_distribution_%s_0_div"></div></td><td class="google-visualization-table-td">%s / %s</td>""" % (lane_index, replicate_name, lane_name))
         # Fill in the cells for the individual read distributions
-        for start in starts[1:]:
-            js += '<td class="google-visualization-table-td">'
-            js += """<div id="read_distribution_%s_%s_div"></div>""" % (replicate_lane_names.index((replicate_name, lane_name)), starts.index(start))
-            js += '</td>'
-        js += '</tr>'
-    js += """</table>'"""
-    box['javascript'] = js
+        for start_index in range(1, len(starts)):
+            add("""<td class="google-visualization-table-td"><div id="read_distribution_%s_%s_div"></div></td>""" % (lane_index, start_index))
+        add('</tr>')
+    add("""</table>'""")
 
     # Create the JavaScript code for the div tags that were just dynamically
     # added
-    for replicate_name, lane_name in replicate_lane_names:
-        for start in starts:
-            # Add a new view for each range of each lane
-            box['javascript'] = box['javascript'] + """
+    # The sparklines can be given their own values, see _sliced_sparklines
+    sliced = box.get('sparklines', 'filtered') == 'sliced'
+    if sliced:
+        js.extend(_sliced_sparklines(table, replicate_lane_names, starts))
+    else:
+        for lane_index, (replicate_name, lane_name) in enumerate(replicate_lane_names):
+            for start_index, start in enumerate(starts):
+                # Add a new view for each range of each lane
+                add("""
 var view = new google.visualization.DataView(data);
 view.setRows(data.getFilteredRows([{column: 0, value: '%s'}, {column: 1, value: '%s'}, {column: 2, value: %s}]))
 view.setColumns([4])
@@ -670,85 +826,112 @@ chart.draw(view, {width: 100, height: 62, showAxisLines: false,  showValueLabels
        # Filter on lane in the data table
        start,
        # Filter on start in the data table
-       replicate_lane_names.index((replicate_name, lane_name)),
+       lane_index,
        # The index of the replicate and lane is used for target div id
-       starts.index(start))
+       start_index))
        # The index of the range is also used for the target div id
 
+    box['javascript'] = ''.join(js)
+    if sliced:
+        use_library(box, 'drawReadDistribution')
+
     title(box)
     return box
 
 
-@augment((JSON, PICKLED))
+def _sliced_sparklines(table, replicate_lane_names, starts):
+    """
+    Create the JavaScript code drawing the read distribution sparklines from
+    the values of each sparkline, so that the browser does not need to filter
+    the whole data table for each of them. The sparklines are drawn by
+    drawReadDistribution, from raisin.box.library.
+
+    The values of the sparklines are collected in a single pass over the
+    table data, keeping the order of the rows.
+    """
+    values = {}
+    for item in table['table_data']:
+        values.setdefault((item[0], item[1], item[2]), []).append(item[4])
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    for lane_index, (replicate_name, lane_name) in enumerate(replicate_lane_names):
+        for start_index, start in enumerate(starts):
+            sparkline = values.get((replicate_name, lane_name, start), [])
+            yield "drawReadDistribution('read_distribution_%s_%s_div', %s);\n" % (
+                lane_index,
+                start_index,
+                encode(sparkline))
+
+
+@augment((JSON, PICKLED), static=_mapped_reads)
 def experiment_merged_mapped_reads(context, box):
     """Augment resource."""
-    return _mapped_reads(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_mapped_reads)
 def replicate_merged_mapped_reads(context, box):
     """Augment resource."""
-    return _mapped_reads(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_mapped_reads)
 def lane_merged_mapped_reads(context, box):
     """Augment resource."""
-    return _mapped_reads(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_mapped_reads)
 def experiment_genome_mapped_reads(context, box):
     """Augment resource."""
-    return _mapped_reads(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_mapped_reads)
 def replicate_genome_mapped_reads(context, box):
     """Augment resource."""
-    return _mapped_reads(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_mapped_reads)
 def lane_genome_mapped_reads(context, box):
     """Augment resource."""
-    return _mapped_reads(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_mapped_reads)
 def experiment_junction_mapped_reads(context, box):
     """Augment resource."""
-    return _mapped_reads(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_mapped_reads)
 def replicate_junction_mapped_reads(context, box):
     """Augment resource."""
-    return _mapped_reads(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_mapped_reads)
 def lane_junction_mapped_reads(context, box):
     """Augment resource."""
-    return _mapped_reads(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_mapped_reads)
 def experiment_split_mapped_reads(context, box):
     """Augment resource."""
-    return _mapped_reads(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_mapped_reads)
 def replicate_split_mapped_reads(context, box):
     """Augment resource."""
-    return _mapped_reads(context, box)
+    return box
 
 
-@augment((JSON, PICKLED))
+@augment((JSON, PICKLED), static=_mapped_reads)
 def lane_split_mapped_reads(context, box):
     """Augment resource."""
-    return _mapped_reads(context, box)
+    return box
 
 
 @augment((JSON, PICKLED))
@@ -769,39 +952,39 @@ def lane_detected_genes(context, box):
     return _detected_genes(context, box)
 
 
-@augment((JSON,))
+@augment((JSON, PICKLED), static=_gene_expression_profile)
 def experiment_gene_expression_profile(context, box):
     """Augment resource."""
-    return _gene_expression_profile(context, box)
+    return _downsample(box)
 
 
-@augment((JSON,))
+@augment((JSON, PICKLED), static=_gene_expression_profile)
 def replicate_gene_expression_profile(context, box):
     """Augment resource."""
-    return _gene_expression_profile(context, box)
+    return _downsample(box)
 
 
-@augment((JSON,))
+@augment((JSON, PICKLED), static=_gene_expression_profile)
 def lane_gene_expression_profile(context, box):
     """Augment resource."""
-    return _gene_expression_profile(context, box)
+    return _downsample(box)
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def experiment_gene_expression_levels(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def replicate_gene_expression_levels(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def lane_gene_expression_levels(context, box):
     """Augment resource."""
     title(box)
@@ -812,6 +995,7 @@ def lane_gene_expression_levels(context, box):
 def experiment_top_genes(context, box):
     """Augment resource."""
     title(box)
+    _top(box)
     return _thousands_formatter(context, box)
 
 
@@ -819,6 +1003,7 @@ def experiment_top_genes(context, box):
 def replicate_top_genes(context, box):
     """Augment resource."""
     title(box)
+    _top(box)
     return _thousands_formatter(context, box)
 
 
@@ -826,6 +1011,7 @@ def replicate_top_genes(context, box):
 def lane_top_genes(context, box):
     """Augment resource."""
     title(box)
+    _top(box)
     return _thousands_formatter(context, box)
 
 
@@ -833,6 +1019,7 @@ def lane_top_genes(context, box):
 def experiment_top_transcripts(context, box):
     """Augment resource."""
     title(box)
+    _top(box)
     return _thousands_formatter(context, box)
 
 
@@ -840,6 +1027,7 @@ def experiment_top_transcripts(context, box):
 def replicate_top_transcripts(context, box):
     """Augment resource."""
     title(box)
+    _top(box)
     return _thousands_formatter(context, box)
 
 
@@ -847,6 +1035,7 @@ def replicate_top_transcripts(context, box):
 def lane_top_transcripts(context, box):
     """Augment resource."""
     title(box)
+    _top(box)
     return _thousands_formatter(context, box)
 
 
@@ -854,6 +1043,7 @@ def lane_top_transcripts(context, box):
 def experiment_top_exons(context, box):
     """Augment resource."""
     title(box)
+    _top(box)
     return _thousands_formatter(context, box)
 
 
@@ -861,6 +1051,7 @@ def experiment_top_exons(context, box):
 def replicate_top_exons(context, box):
     """Augment resource."""
     title(box)
+    _top(box)
     return _thousands_formatter(context, box)
 
 
@@ -868,173 +1059,153 @@ def replicate_top_exons(context, box):
 def lane_top_exons(context, box):
     """Augment resource."""
     title(box)
+    _top(box)
     return _thousands_formatter(context, box)
 
 
-@augment((JSON,))
+@augment((JSON, PICKLED), static=_exon_inclusion_profile)
 def experiment_exon_inclusion_profile(context, box):
     """Augment resource."""
-    return _exon_inclusion_profile(context, box)
+    return _downsample(box)
 
 
-@augment((JSON,))
+@augment((JSON, PICKLED), static=_exon_inclusion_profile)
 def replicate_exon_inclusion_profile(context, box):
     """Augment resource."""
-    return _exon_inclusion_profile(context, box)
+    return _downsample(box)
 
 
-@augment((JSON,))
+@augment((JSON, PICKLED), static=_exon_inclusion_profile)
 def lane_exon_inclusion_profile(context, box):
     """Augment resource."""
-    return _exon_inclusion_profile(context, box)
+    return _downsample(box)
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def experiment_reads_supporting_exon_inclusions(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def replicate_reads_supporting_exon_inclusions(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def lane_reads_supporting_exon_inclusions(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def experiment_novel_junctions_from_annotated_exons(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def replicate_novel_junctions_from_annotated_exons(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def lane_novel_junctions_from_annotated_exons(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def experiment_novel_junctions_from_unannotated_exons(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def replicate_novel_junctions_from_unannotated_exons(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-@augment((JSON,))
+@augment((JSON,), passthrough=True)
 def lane_novel_junctions_from_unannotated_exons(context, box):
     """Augment resource."""
     title(box)
     return box
 
 
-def _exon_inclusion_profile(context, box):
-    """Augment resource."""
-    golden(box, 900)
-    font_size(box)
-    title(box)
-    top_legend(box)
-    option = "{left:'20%', right:'10%', width:'70%', height:'62%'}"
-    box['chartoptions']['chartArea'] = option
-    option = "{minValue:'0'}"
-    box['chartoptions']['hAxis'] = option
-    option = "{minValue:'0', logScale:true}"
-    box['chartoptions']['vAxis'] = option
-    return box
-
+def _number_formatters(column_types):
+    """Generate the formatting of the number columns"""
+    javascript = "thousandsformatter.format(data, %s);\n"
+    return ''.join([javascript % index
+                    for index, column_type in enumerate(column_types)
+                    if column_type == 'number'])
 
-def _gene_expression_profile(context, box):
-    """Augment resource."""
-    area = '''{left:"10%",right:"30%",width:"60%"}'''
-    box['chartoptions']['chartArea'] = area
-    golden(box, 900)
-    font_size(box)
-    title(box)
-    top_legend(box)
-    option = "{left:'20%', right:'10%', width:'70%', height:'62%'}"
-    box['chartoptions']['chartArea'] = option
-    option = "{minValue:'0', logScale:true}"
-    box['chartoptions']['hAxis'] = option
-    option = "{minValue:'0', logScale:true}"
-    box['chartoptions']['vAxis'] = option
-    return box
 
+def _top(box):
+    """Keep the topn rows of a table with the largest values in the
+    sortcolumn of its box in boxes.ini.
 
-def _custom_spaced_chart(context, box):
-    """Augment resource."""
-    box['chartoptions']['hAxis'] = '''{minValue:'0', maxValue:'100'}'''
-    golden(box, 900)
-    font_size(box)
-    title(box)
-    no_legend(box)
-    option = "{left:'20%', right:'10%', width:'70%', height:'62%'}"
-    box['chartoptions']['chartArea'] = option
+    Tables that are not flat are kept as they are. Raises ValueError if the
+    sortcolumn is not a number column of the table, rather than sorting on
+    the wrong column.
+    """
+    if not 'topn' in box or not box.get(PICKLED):
+        return box
+    description = box[PICKLED].get('table_description', None)
+    columns = parse_description(description)
+    if columns is None:
+        return box
+    sortcolumn = box.get('sortcolumn', None)
+    index = find_column(description, sortcolumn)
+    if columns[index][1] != 'number':
+        raise ValueError("Sort column %s is not a number column: %s" %
+                         (sortcolumn, columns[index][0]))
+    table = top_rows(box[PICKLED], int(box['topn']), index)
+    if table is not box[PICKLED]:
+        box[PICKLED] = table
+        box[JSON] = to_json(table)
+    return box
 
 
 def _thousands_formatter(context, box):
     """Augment resource."""
-    javascript = "thousandsformatter.format(data, %s);\n"
     table = box[PICKLED]
-    index = 0
-    column_types = [desc[1] for desc in table['table_description']]
-    for column_type in column_types:
-        if column_type == 'number':
-            box['javascript'] += javascript % index
-        index += 1
+    column_types = tuple([desc[1] for desc in table['table_description']])
+    javascript = SNIPPETS.get(('number_formatters', column_types),
+                              _number_formatters, column_types)
+    if javascript:
+        box['javascript'] += javascript
     return box
 
 
+def _lane_formatters(column_number):
+    """Generate the formatting of the expression values of the lanes"""
+    formatter = """thousandsformatter.format(data, %s);\n"""
+    return ''.join([formatter % index for index in range(1, column_number)])
+
+
 def _detected_genes(context, box):
     """Augment resource."""
-    box['javascript'] = ""
     table = box[PICKLED]
+    column_number = len(table['table_description'])
     # Add formatting for expression values of lanes
-    for index in range(1, len(table['table_description'])):
-        formatter = """thousandsformatter.format(data, %s);\n""" % index
-        box['javascript'] += formatter
+    box['javascript'] = SNIPPETS.get(('lane_formatters', column_number),
+                                     _lane_formatters, column_number)
     title(box)
     return box
 
 
-def _mapped_reads(context, box):
-    """Augment resource."""
-    option = '{minValue:0}'
-    box['chartoptions']['hAxis'] = option
-    golden(box, 900)
-    font_size(box)
-    title(box)
-    option = "{left:'20%', right:'20%', width:'60%', height:'62%'}"
-    box['chartoptions']['chartArea'] = option
-    option = "{minValue:'0'}"
-    box['chartoptions']['hAxis'] = option
-    option = "{minValue:'0'}"
-    box['chartoptions']['vAxis'] = option
-
-
 def _percentage_of_reads_with_ambiguous_bases(context, box):
     """Augment resource."""
     table = box[PICKLED]
@@ -1044,20 +1215,6 @@ def _percentage_of_reads_with_ambiguous_bases(context, box):
     return box
 
 
-def _position(context, box):
-    """Augment resource."""
-    golden(box, 900)
-    font_size(box)
-    title(box)
-    top_legend(box)
-    option = "{left:'20%', right:'10%', width:'70%', height:'62%'}"
-    box['chartoptions']['chartArea'] = option
-    option = "{minValue:'0'}"
-    box['chartoptions']['hAxis'] = option
-    option = "{minValue:'0', logScale:true}"
-    box['chartoptions']['vAxis'] = option
-
-
 def golden(box, width):
     """Use the golden ratio"""
     box['chartoptions']['width'] = str(width)
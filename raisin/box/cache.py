@@ -0,0 +1,200 @@
+"""Cache of augmented boxes
+
+The augmenters only depend on the box configuration and on the fetched
+resources, which hardly ever change. An AugmentCache remembers what each
+augmenter changed in a box, keyed by the box name and a hash of the JSON and
+PICKLED resources, and applies the changes again when the same resources
+come back:
+
+    cache = AugmentCache(max_entries=1000, max_size=32 * 1024 * 1024)
+    box = cache.augment(context, 'lane_read_distribution', box,
+                        project='ENCODE')
+
+The least recently used boxes are dropped when there are more than
+max_entries of them, or when the changes take more than max_size bytes
+pickled. Boxes can also be dropped for a project with invalidate.
+"""
+
+import copy
+import hashlib
+import cPickle
+import threading
+from collections import Mapping
+from raisin.box import RESOURCES_REGISTRY
+from raisin.box.batch import decode
+from raisin.box.config import JSON
+from raisin.box.config import PICKLED
+from raisin.box.lru import LruDict
+
+# The resources that are part of the key of a box
+RESOURCES = (JSON, PICKLED)
+
+# Marks the keys that the augmenter removed from the box
+REMOVED = object()
+
+
+def get_hash(box):
+    """Get a hash of the resources of a box.
+
+    Resources that are still pickled are hashed as they are, which is much
+    faster than pickling the decoded ones again.
+    """
+    sha1 = hashlib.sha1()
+    for resource in RESOURCES:
+        if resource in box:
+            payload = box[resource]
+            if not isinstance(payload, str):
+                payload = cPickle.dumps(payload, cPickle.HIGHEST_PROTOCOL)
+            sha1.update(resource)
+            sha1.update(str(len(payload)))
+            sha1.update(payload)
+    return sha1.hexdigest()
+
+
+def to_plain(value):
+    """Copy a value of a box into plain dictionaries and lists.
+
+    The sections of boxes.ini, like chartoptions, reach the whole
+    configuration through their parent, which copying or pickling them
+    would take along.
+    """
+    if isinstance(value, Mapping):
+        return dict([(key, to_plain(item)) for key, item in value.items()])
+    if isinstance(value, list):
+        return [to_plain(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple([to_plain(item) for item in value])
+    return copy.deepcopy(value)
+
+
+def get_changes(before, after, resources=None):
+    """Get a copy of what an augmenter changed in a box, as plain data.
+
+    The resources are left out, unless the augmenter replaced them, like the
+    top rows or the downsampled tables do. The resources maps them to the
+    payloads they had before the augmenter.
+    """
+    if resources is None:
+        resources = {}
+    changes = {}
+    for key, value in after.items():
+        if key in RESOURCES:
+            if value is not resources.get(key, None):
+                changes[key] = to_plain(value)
+        elif not key in before or before[key] != value:
+            changes[key] = to_plain(value)
+    for key in before:
+        if not key in after:
+            changes[key] = REMOVED
+    return changes
+
+
+def apply_changes(box, changes):
+    """Apply the changes an augmenter made to a box before"""
+    for key, value in changes.items():
+        if value is REMOVED:
+            box.pop(key, None)
+        else:
+            box[key] = copy.deepcopy(value)
+    return box
+
+
+class AugmentCache(object):
+    """Least recently used cache of augmented boxes"""
+
+    def __init__(self, max_entries=1000, max_size=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        # key: (changes, size, project)
+        self._entries = LruDict()
+        self._projects = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def augment(self, context, name, box, project=None):
+        """Augment the box, or apply the changes of the same box from before.
+
+        The project is remembered for invalidating the box later on. Boxes
+        whose JSON is passed through are augmented right away, as that is
+        cheaper than hashing their JSON. Returns the augmented box.
+        """
+        if RESOURCES_REGISTRY.passthrough(name):
+            RESOURCES_REGISTRY.method(name)(context, box)
+            return box
+        key = (name, get_hash(box))
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is not None:
+            decode(box)
+            apply_changes(box, entry[0])
+            return box
+        registered = RESOURCES_REGISTRY.get(name)
+        if registered is None:
+            return box
+        before = dict([(k, to_plain(v)) for (k, v) in box.items()
+                       if not k in RESOURCES])
+        decode(box)
+        resources = dict([(k, box[k]) for k in RESOURCES if k in box])
+        registered[1](context, box)
+        changes = get_changes(before, box, resources)
+        size = len(cPickle.dumps(changes, cPickle.HIGHEST_PROTOCOL))
+        self._add(key, changes, size, project)
+        return box
+
+    def _add(self, key, changes, size, project):
+        """Add the changes of a box, dropping the least recently used ones"""
+        if size > self.max_size:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (changes, size, project)
+            self.size += size
+            self._projects.setdefault(project, set()).add(key)
+            while (len(self._entries) > self.max_entries or
+                   self.size > self.max_size):
+                self._remove(iter(self._entries).next())
+                self.evictions += 1
+
+    def _remove(self, key):
+        """Remove a box, the lock being held"""
+        changes, size, project = self._entries.pop(key)
+        self.size -= size
+        keys = self._projects[project]
+        keys.discard(key)
+        if not keys:
+            del self._projects[project]
+
+    def invalidate(self, project):
+        """Drop all the boxes of a project. Returns how many were dropped."""
+        with self._lock:
+            keys = list(self._projects.get(project, ()))
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        """Drop all the boxes"""
+        with self._lock:
+            self._entries.clear()
+            self._projects.clear()
+            self.size = 0
+
+    def stats(self):
+        """Get the counters of the cache"""
+        with self._lock:
+            return {'entries': len(self._entries),
+                    'size': self.size,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions}
@@ -0,0 +1,178 @@
+"""Client fetching the resources given in resources.ini
+
+All the resources come from the same backend, so the client keeps the
+connections to it open and reuses them for the next requests:
+
+    client = ResourceClient(pool_size=8, timeout=10)
+    content = client.fetch('project_info', {'project_name': 'ENCODE'}, JSON)
+
+The uri of a resource is a template filled in with the parameters, see
+raisin.box.uris, and the format is requested with the Accept header.
+"""
+
+import socket
+import httplib
+import urlparse
+import threading
+from raisin.box import RESOURCES
+from raisin.box.config import JSON
+from raisin.box.uris import TEMPLATES
+from raisin.box.uris import UriTemplates
+
+
+class ResourceError(Exception):
+    """Raised when a resource could not be fetched"""
+
+    def __init__(self, uri, status, reason):
+        Exception.__init__(self, "%s %s: %s" % (status, reason, uri))
+        self.uri = uri
+        self.status = status
+        self.reason = reason
+
+
+class ConnectionPool(object):
+    """Keep-alive connections to one host.
+
+    At most size connections are open at the same time. Requests wait for a
+    free connection when all of them are in use.
+    """
+
+    def __init__(self, host, port, size=8, timeout=None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.created = 0
+        self._idle = []
+        self._lock = threading.Lock()
+        self._available = threading.Semaphore(size)
+
+    def _get(self):
+        """Get an idle connection, or a new one"""
+        self._available.acquire()
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+            self.created += 1
+        return httplib.HTTPConnection(self.host, self.port,
+                                      timeout=self.timeout), False
+
+    def _put(self, connection):
+        """Give back a connection that can be reused"""
+        with self._lock:
+            self._idle.append(connection)
+        self._available.release()
+
+    def _discard(self, connection):
+        """Close a connection that can not be reused"""
+        connection.close()
+        self._available.release()
+
+    def request(self, path, headers, timeout=None):
+        """Get the response to a GET request as (status, reason, content).
+
+        A request on a reused connection that the server has closed in the
+        meantime is sent again on a new connection. The connection is always
+        given back, or closed if it can not be reused, whatever happens.
+        """
+        while True:
+            connection, reused = self._get()
+            reusable = False
+            try:
+                if timeout is None:
+                    timeout = self.timeout
+                if connection.sock is None:
+                    connection.timeout = timeout
+                else:
+                    connection.sock.settimeout(timeout)
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                content = response.read()
+                reusable = not response.will_close
+            except (httplib.HTTPException, socket.error), error:
+                if reused and not isinstance(error, socket.timeout):
+                    continue
+                raise
+            finally:
+                if reusable:
+                    self._put(connection)
+                else:
+                    self._discard(connection)
+            return response.status, response.reason, content
+
+    def close(self):
+        """Close the idle connections"""
+        with self._lock:
+            while self._idle:
+                self._idle.pop().close()
+
+
+class ResourceClient(object):
+    """Fetch resources over pooled keep-alive connections"""
+
+    def __init__(self, pool_size=8, timeout=30, resources=RESOURCES):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.resources = resources
+        if resources is RESOURCES:
+            self.templates = TEMPLATES
+        else:
+            self.templates = UriTemplates(resources)
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def get_uri(self, name, parameters):
+        """Fill in the uri template of a resource with the parameters.
+
+        Raises raisin.box.uris.MissingParameters if a parameter is missing.
+        """
+        return self.templates.expand(name, parameters)
+
+    def get_uris(self, names, parameters):
+        """Fill in the uri templates of resources with the parameters.
+
+        Returns the uris by name. Raises raisin.box.uris.MissingParameters
+        for all the missing parameters before filling in any template.
+        """
+        return self.templates.expand_many(names, parameters)
+
+    def get_pool(self, host, port):
+        """Get the connection pool for a host"""
+        with self._lock:
+            if not (host, port) in self._pools:
+                self._pools[(host, port)] = ConnectionPool(host,
+                                                           port,
+                                                           self.pool_size,
+                                                           self.timeout)
+            return self._pools[(host, port)]
+
+    def fetch_uri(self, uri, media_type=JSON, timeout=None):
+        """Fetch a uri in the given format"""
+        parts = urlparse.urlsplit(uri)
+        if parts.scheme != 'http':
+            raise ValueError("Only http is supported: %s" % uri)
+        path = parts.path or '/'
+        if parts.query:
+            path = "%s?%s" % (path, parts.query)
+        pool = self.get_pool(parts.hostname, parts.port or 80)
+        status, reason, content = pool.request(path,
+                                               {'Accept': media_type},
+                                               timeout)
+        if status != 200:
+            raise ResourceError(uri, status, reason)
+        return content
+
+    def fetch(self, name, parameters, media_type=JSON, timeout=None):
+        """Fetch a resource given in resources.ini in the given format.
+
+        The parameters fill in the uri template of the resource. The timeout
+        in seconds defaults to the timeout of the client.
+        """
+        return self.fetch_uri(self.get_uri(name, parameters),
+                              media_type,
+                              timeout)
+
+    def close(self):
+        """Close the idle connections of all pools"""
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
@@ -0,0 +1,77 @@
+"""Cache of the generated JavaScript snippets
+
+Some augmenters generate JavaScript that only depends on the shape of the
+table, like its number of columns or the types of its columns, and not on
+its data. The snippets are generated once for each shape and kept in a
+least recently used cache:
+
+    javascript = SNIPPETS.get(('experiment_link', column_number),
+                              _experiment_link, column_number)
+
+The key is made of the name of the snippet and of the shape it was
+generated for, and the generating function is called with the other
+arguments on a miss.
+"""
+
+import threading
+from raisin.box.lru import LruDict
+
+
+class SnippetCache(object):
+    """Least recently used cache of generated snippets, by shape"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = LruDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, generate, *args):
+        """Get the snippet of a shape, generating it on first use"""
+        with self._lock:
+            snippet = self._entries.get(key, None)
+            if snippet is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                return snippet
+        snippet = generate(*args)
+        with self._lock:
+            self._entries[key] = snippet
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem()
+                self.evictions += 1
+        return snippet
+
+    def clear(self):
+        """Drop all the snippets"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Get the counters of the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            hit_rate = 0.0
+            if lookups:
+                hit_rate = float(self.hits) / lookups
+            return {'entries': len(self._entries),
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'hit_rate': hit_rate}
+
+    def reset(self):
+        """Set the counters back to 0"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+# The snippets of the augmenters in raisin.box.boxes
+SNIPPETS = SnippetCache()
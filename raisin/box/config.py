@@ -2,3 +2,6 @@
 
 JSON = 'application/json'
 PICKLED = 'text/x-python-pickled-dict'
+# Tables in the binary format of raisin.box.binary, accepted in place of
+# PICKLED
+TABLE = 'application/x-raisin-table'
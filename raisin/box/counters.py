@@ -0,0 +1,52 @@
+"""Counters that can be read while the application is running
+
+    DECODING.add('resources')
+    DECODING.snapshot()
+    {'resources': 1}
+"""
+
+import threading
+
+
+class Counters(object):
+    """Named counters, safe to update from several threads"""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, count=1):
+        """Add to a counter"""
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + count
+
+    def get(self, name):
+        """Get the value of a counter"""
+        with self._lock:
+            return self._counts.get(name, 0)
+
+    def snapshot(self):
+        """Get the values of all the counters"""
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        """Set all the counters back to 0"""
+        with self._lock:
+            self._counts.clear()
+
+
+# How the PICKLED resources were decoded:
+#     resources: resources decoded by raisin.box.batch.decode
+#     unpickled: pickled resources, which are always unpickled in full
+#     tables_read: binary tables whose table_data was used
+#     columns_read: columns read from binary tables
+DECODING = Counters()
+
+
+def get_avoided():
+    """Get the number of resources that were never fully decoded"""
+    counts = DECODING.snapshot()
+    return (counts.get('resources', 0) -
+            counts.get('unpickled', 0) -
+            counts.get('tables_read', 0))
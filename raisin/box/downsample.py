@@ -0,0 +1,147 @@
+"""Downsampling of the scatter charts
+
+Some scatter charts, like the gene expression profiles, can have tens of
+thousands of points, which are all sent to the browser although most of them
+are drawn over each other. The points of each series are downsampled with
+the largest triangle three buckets algorithm (LTTB), which keeps the shape
+of the series: the points are split into buckets, and the point kept for a
+bucket is the one making the largest triangle with the point kept for the
+previous bucket and the average of the next bucket. The lowest and highest
+point of each series are always kept as well.
+
+    table = downsample(table, 2000, log_x=True, log_y=True)
+
+The first column of the table is the x axis, and each of the other columns
+is a series. When an axis has a log scale, the triangles are measured on the
+log of the values, as they are drawn.
+"""
+
+import math
+
+
+def lttb(xs, ys, threshold):
+    """Get the indexes of the points kept by the largest triangle three
+    buckets algorithm.
+
+    The points are given sorted by x. The first and last points are always
+    kept, and threshold points are kept in all.
+    """
+    length = len(xs)
+    if threshold >= length or threshold < 3:
+        return range(0, length)
+    every = float(length - 2) / (threshold - 2)
+    kept = [0]
+    previous = 0
+    for bucket in range(0, threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, length)
+        next_xs = xs[end:next_end]
+        next_ys = ys[end:next_end]
+        average_x = sum(next_xs) / len(next_xs)
+        average_y = sum(next_ys) / len(next_ys)
+        x, y = xs[previous], ys[previous]
+        # Twice the area of the triangle with the previous point and the
+        # average of the next bucket, for each point of the bucket
+        dx = average_x - x
+        dy = average_y - y
+        areas = [abs(dx * (point_y - y) - (point_x - x) * dy)
+                 for point_x, point_y in zip(xs[start:end], ys[start:end])]
+        previous = start + areas.index(max(areas))
+        kept.append(previous)
+    kept.append(length - 1)
+    return kept
+
+
+def _values(column):
+    """Get the values of a column whose cells are given as values or as
+    (value, formatted) tuples"""
+    values = list(column)
+    if tuple in set(map(type, values)):
+        for index, cell in enumerate(values):
+            if isinstance(cell, tuple):
+                values[index] = cell[0]
+    return values
+
+
+def _scale(values, log):
+    """Get the values as drawn on a linear or log scale.
+
+    The values that can not be drawn on a log scale are taken as the
+    smallest value that can.
+    """
+    values = map(float, values)
+    if not log:
+        return values
+    positive = [value for value in values if value > 0]
+    if not positive:
+        return [0.0] * len(values)
+    smallest = min(positive)
+    return map(math.log10, [max(value, smallest) for value in values])
+
+
+def _series(order, xs, values, log_y, threshold):
+    """Get the indexes of the rows kept for the series of a column.
+
+    The rows having an x value are given in the order of their x value,
+    with their x values as drawn.
+    """
+    indexes = [index for index in order if values[index] is not None]
+    if len(indexes) <= threshold:
+        return set(indexes)
+    ys = _scale([values[index] for index in indexes], log_y)
+    kept = set([indexes[point] for point in
+                lttb([xs[index] for index in indexes], ys, threshold)])
+    # The extremes of the series stand out, so they are always kept
+    kept.add(indexes[ys.index(min(ys))])
+    kept.add(indexes[ys.index(max(ys))])
+    return kept
+
+
+def downsample(table, max_points, log_x=False, log_y=False):
+    """Downsample the series of a scatter chart table to about max_points
+    points in all.
+
+    The table is given as a dictionary with the table_description and the
+    table_data, or as a raisin.box.table.Table. Returns the table as it is
+    when it has no more than max_points points, or a new dictionary with the
+    rows keeping a point. The cells of the points that were not kept are
+    None in these rows.
+    """
+    description = table['table_description']
+    width = len(description)
+    series = width - 1
+    rows = table['table_data']
+    if series < 1 or len(rows) * series <= max_points:
+        return table
+    threshold = max(max_points // series, 3)
+    # The series are downsampled column by column
+    columns = zip(*[len(row) < width and
+                    list(row) + [None] * (width - len(row)) or row
+                    for row in rows])
+    x_values = _values(columns[0])
+    order = [index for index in sorted(range(0, len(rows)),
+                                       key=x_values.__getitem__)
+             if x_values[index] is not None]
+    xs = [None] * len(rows)
+    for index, x in zip(order, _scale([x_values[index] for index in order],
+                                      log_x)):
+        xs[index] = x
+    kept = [_series(order, xs, _values(column), log_y, threshold)
+            for column in columns[1:]]
+    data = []
+    for index in sorted(set().union(*kept)):
+        row = rows[index]
+        cells = [row[0]]
+        for column, indexes in enumerate(kept):
+            if index in indexes:
+                cells.append(row[column + 1])
+            else:
+                cells.append(None)
+        data.append(cells)
+    return {'table_description': description, 'table_data': data}
+
+
+def is_log_scale(option):
+    """Check whether an axis option of the chart options has a log scale"""
+    return 'logScale:true' in option.replace(' ', '')
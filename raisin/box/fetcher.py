@@ -0,0 +1,168 @@
+"""Fetching all the resources of a page at the same time
+
+The resources of a page come from the same backend, but each of them takes
+its own time. Fetching them one after the other makes the page as slow as
+all of them together, while fetching them at the same time makes it only as
+slow as the slowest one:
+
+    fetcher = PageFetcher(concurrency=8)
+    results, timings = fetcher.augment(context, boxes, parameters)
+
+The parameters are the ones of the url, like project_name, parameter_list,
+replicate_name or lane_name. The formats of each resource are the ones its
+augmenter is registered with.
+
+When an augmenter needs both JSON and PICKLED, only PICKLED is fetched, and
+the JSON is made from it, so that the table is only transferred once. When
+PICKLED turns out to be empty, or not a flat table, the JSON is fetched
+afterwards. This can be turned off with derive_json=False.
+
+With binary_tables=True, the tables are asked for in the binary format of
+raisin.box.binary first, and pickled only if the backend does not have it.
+"""
+
+import sys
+import Queue
+import threading
+from collections import Mapping
+from raisin.box import RESOURCES_REGISTRY
+from raisin.box.batch import augment_many
+from raisin.box.batch import decode
+from raisin.box.client import ResourceClient
+from raisin.box.config import JSON
+from raisin.box.config import PICKLED
+from raisin.box.config import TABLE
+from raisin.box.gviz import to_json
+from raisin.box.table import parse_description
+
+
+def is_flat_table(payload):
+    """Check whether a decoded PICKLED resource is a non-empty flat table"""
+    return (bool(payload) and
+            isinstance(payload, Mapping) and
+            'table_data' in payload and
+            'table_description' in payload and
+            parse_description(payload['table_description']) is not None)
+
+
+class PageFetcher(object):
+    """Fetch resources in parallel, with at most concurrency at a time"""
+
+    def __init__(self, client=None, concurrency=8, derive_json=True,
+                 binary_tables=False):
+        if client is None:
+            client = ResourceClient(pool_size=concurrency)
+        self.client = client
+        self.concurrency = concurrency
+        self.derive_json = derive_json
+        self.binary_tables = binary_tables
+
+    def derives_json(self, name):
+        """Check whether the JSON of a resource is made from PICKLED"""
+        if not self.derive_json:
+            return False
+        registered = RESOURCES_REGISTRY.get(name)
+        return (registered is not None and
+                JSON in registered[2] and
+                PICKLED in registered[2])
+
+    def get_accept(self, media_type):
+        """Get the Accept header used for fetching a format"""
+        if self.binary_tables and media_type == PICKLED:
+            return '%s, %s;q=0.5' % (TABLE, PICKLED)
+        return media_type
+
+    def get_requests(self, names):
+        """Get the (name, format) pairs to fetch for the resources.
+
+        Resources without augmenter are fetched as JSON.
+        """
+        requests = set()
+        for media_type, registered in RESOURCES_REGISTRY.fetch_plan(
+                names).items():
+            for name in registered:
+                if media_type != JSON or not self.derives_json(name):
+                    requests.add((name, media_type))
+        for name in names:
+            if RESOURCES_REGISTRY.get(name) is None:
+                requests.add((name, JSON))
+        return sorted(requests)
+
+    def fetch(self, names, parameters):
+        """Fetch the resources at the same time.
+
+        Returns a dictionary mapping each (name, format) pair to the content.
+        Parameters missing for any of the resources are reported before
+        fetching, with raisin.box.uris.MissingParameters. When fetching
+        fails, the first error is raised once all the other requests are
+        done.
+        """
+        return self.fetch_requests(self.get_requests(names), parameters)
+
+    def fetch_requests(self, planned, parameters):
+        """Fetch (name, format) pairs at the same time, as fetch does"""
+        requests = Queue.Queue()
+        uris = self.client.get_uris(sorted(set([name for name, media_type
+                                                in planned])),
+                                    parameters)
+        for request in planned:
+            requests.put(request)
+        results = {}
+        errors = []
+
+        def work():
+            """Fetch resources until there are none left"""
+            while True:
+                try:
+                    name, media_type = requests.get_nowait()
+                except Queue.Empty:
+                    return
+                try:
+                    results[(name, media_type)] = self.client.fetch_uri(
+                        uris[name], self.get_accept(media_type))
+                # pylint: disable=W0703
+                # The error is raised again in the calling thread
+                except Exception:
+                    errors.append(sys.exc_info())
+
+        workers = [threading.Thread(target=work)
+                   for worker in range(0, min(self.concurrency,
+                                              requests.qsize()))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        if errors:
+            error_type, error, traceback = errors[0]
+            raise error_type, error, traceback
+        return results
+
+    def augment(self, context, boxes, parameters):
+        """Fetch the resources of the boxes and augment them.
+
+        The boxes are given as for augment_many, by name. Returns the
+        augmented boxes, and the time spent augmenting each of them.
+        """
+        if hasattr(boxes, 'items'):
+            boxes = boxes.items()
+        results = self.fetch([name for name, box in boxes], parameters)
+        contents = {}
+        for (name, media_type), content in results.items():
+            contents.setdefault(name, {})[media_type] = content
+        decoded = {}
+        missing = {}
+        for name, box in boxes:
+            box.update(contents.get(name, {}))
+            if self.derives_json(name):
+                decode(box, decoded)
+                if is_flat_table(box.get(PICKLED, None)):
+                    box[JSON] = to_json(box[PICKLED])
+                else:
+                    missing[name] = box
+        if missing:
+            results = self.fetch_requests([(name, JSON) for name
+                                           in sorted(missing)],
+                                          parameters)
+            for (name, media_type), content in results.items():
+                missing[name][JSON] = content
+        return augment_many(context, boxes)
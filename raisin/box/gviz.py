@@ -0,0 +1,366 @@
+"""Google Visualization encoding of the pickled tables
+
+The JSON representation of a table is the pickled table_description and
+table_data encoded with gviz_api, as done by the backend. It can be made
+here from the PICKLED representation instead of being fetched as well.
+
+Building a gviz_api.DataTable copies every cell into a dictionary before
+encoding it, so the JSON is written here straight from the table instead,
+one column at a time, and exactly as DataTable.ToJSon writes it:
+
+    json = to_json(table)
+    for chunk in iter_json(table):
+        response.write(chunk)
+
+Tables that are not handled here, like those with nested descriptions, are
+still encoded with gviz_api, which also raises the same errors as before
+for invalid tables.
+"""
+
+import json
+import decimal
+import numbers
+import datetime
+from json.encoder import encode_basestring
+from json.encoder import encode_basestring_ascii
+from raisin.box.table import Row
+from raisin.box.table import Table
+
+# The column types of gviz_api
+TYPES = ('string', 'number', 'boolean', 'date', 'datetime', 'timeofday')
+
+NULL = 'null'
+
+# Encodes the custom properties as gviz_api does
+PROPERTIES_ENCODER = json.JSONEncoder(separators=(',', ':'),
+                                      ensure_ascii=False)
+
+# The separator between two rows in the chunks of iter_json
+ROW_SEPARATOR = ','
+
+
+class Unsupported(Exception):
+    """Raised for tables that are left to gviz_api"""
+
+
+def _key_order(*keys):
+    """Get the order in which json writes the keys of a dictionary.
+
+    The keys are given in the order gviz_api adds them to the dictionary.
+    """
+    return list(dict([(key, None) for key in keys]))
+
+
+def _object(pairs):
+    """Write a JSON object from (key, JSON text) pairs in the given order"""
+    return '{%s}' % ','.join(['"%s":%s' % pair for pair in pairs])
+
+
+COLUMN_KEYS = _key_order('id', 'label', 'type')
+COLUMN_PROPERTIES_KEYS = _key_order('id', 'label', 'type', 'p')
+CELL_KEYS = dict([(keys, _key_order(*keys))
+                  for keys in (('v', 'f'), ('v', 'p'), ('v', 'f', 'p'))])
+TABLE_KEYS = _key_order('cols', 'rows')
+
+
+def _float(value):
+    """Write a float as json does"""
+    if value != value:
+        return 'NaN'
+    if value == float('inf'):
+        return 'Infinity'
+    if value == -float('inf'):
+        return '-Infinity'
+    return repr(value)
+
+
+def _string(value):
+    """Write a value of a string column, coerced as gviz_api does"""
+    if isinstance(value, unicode):
+        return encode_basestring(value)
+    if isinstance(value, str):
+        try:
+            return encode_basestring(value.decode('utf-8'))
+        except UnicodeDecodeError:
+            raise Unsupported("String not in UTF-8")
+    return encode_basestring(unicode(value))
+
+
+def _text(value):
+    """Write a string that gviz_api passes on as it is, like a label.
+
+    Strings with other bytes than ASCII are left to gviz_api, as json writes
+    them as they are.
+    """
+    if isinstance(value, str):
+        try:
+            value.decode('ascii')
+        except UnicodeDecodeError:
+            raise Unsupported("String with bytes other than ASCII")
+    return encode_basestring(value)
+
+
+def _number(value):
+    """Write a value of a number column"""
+    value_type = type(value)
+    if value_type is int or value_type is long:
+        return str(value)
+    if value_type is float:
+        return _float(value)
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    if isinstance(value, (numbers.Real, decimal.Decimal)):
+        return _float(float(value))
+    raise Unsupported("Not a number: %r" % (value,))
+
+
+def _boolean(value):
+    """Write a value of a boolean column"""
+    if value:
+        return 'true'
+    return 'false'
+
+
+def _date(value):
+    """Write a value of a date column"""
+    if isinstance(value, datetime.date):
+        return '"Date(%d,%d,%d)"' % (value.year, value.month - 1, value.day)
+    raise Unsupported("Not a date: %r" % (value,))
+
+
+def _datetime(value):
+    """Write a value of a datetime column"""
+    if not isinstance(value, datetime.datetime):
+        raise Unsupported("Not a datetime: %r" % (value,))
+    if value.microsecond == 0:
+        return '"Date(%d,%d,%d,%d,%d,%d)"' % (
+            value.year, value.month - 1, value.day,
+            value.hour, value.minute, value.second)
+    return '"Date(%d,%d,%d,%d,%d,%d,%d)"' % (
+        value.year, value.month - 1, value.day,
+        value.hour, value.minute, value.second,
+        value.microsecond // 1000)
+
+
+def _timeofday(value):
+    """Write a value of a timeofday column"""
+    if isinstance(value, (datetime.datetime, datetime.time)):
+        return '[%d,%d,%d]' % (value.hour, value.minute, value.second)
+    raise Unsupported("Not a time of day: %r" % (value,))
+
+# Write the value of a cell for each column type
+WRITERS = {'string': _string,
+           'number': _number,
+           'boolean': _boolean,
+           'date': _date,
+           'datetime': _datetime,
+           'timeofday': _timeofday}
+
+
+def _cell(value, write):
+    """Write a cell given as a value, or as a (value, formatted) tuple"""
+    if value is None:
+        return NULL
+    if not isinstance(value, tuple):
+        return '{"v":%s}' % write(value)
+    if len(value) not in (2, 3) or isinstance(value[0], tuple):
+        raise Unsupported("Unsupported cell: %r" % (value,))
+    if value[0] is None:
+        pairs = {'v': NULL}
+    else:
+        pairs = {'v': write(value[0])}
+    if value[1] is not None:
+        if not isinstance(value[1], basestring):
+            raise Unsupported("Formatted value is not a string")
+        pairs['f'] = _text(value[1])
+    if len(value) == 3:
+        if not isinstance(value[2], dict):
+            raise Unsupported("Custom properties are not a dictionary")
+        pairs['p'] = _properties(value[2])
+    if len(pairs) == 1:
+        return '{"v":%s}' % pairs['v']
+    keys = CELL_KEYS[tuple([key for key in ('v', 'f', 'p') if key in pairs])]
+    return _object([(key, pairs[key]) for key in keys])
+
+
+def _properties(properties):
+    """Write custom properties"""
+    try:
+        return PROPERTIES_ENCODER.encode(properties)
+    except (TypeError, ValueError):
+        raise Unsupported("Custom properties that json can not encode")
+
+
+def _is_ascii(values):
+    """Check whether all the values are ASCII strings"""
+    strings = [value for value in values if type(value) is str]
+    texts = [value for value in values if type(value) is unicode]
+    if len(strings) + len(texts) != len(values):
+        return False
+    try:
+        ''.join(strings).decode('ascii')
+        u''.join(texts).encode('ascii')
+    except UnicodeError:
+        return False
+    return True
+
+
+def _write_column(values, column_type):
+    """Write the cells of a column.
+
+    The columns holding a single type of plain values are written in one go,
+    the others cell by cell.
+    """
+    types = set(map(type, values))
+    if column_type == 'string' and _is_ascii(values):
+        # The ASCII strings are written the same with the escapes for ASCII
+        # output, which are done in C
+        return ['{"v":%s}' % value
+                for value in map(encode_basestring_ascii, values)]
+    if column_type == 'number':
+        if types <= set([int, long]):
+            return ['{"v":%d}' % value for value in values]
+        if (types == set([float]) and
+                all([value - value == 0 for value in values])):
+            return ['{"v":%r}' % value for value in values]
+    if column_type == 'boolean' and types == set([bool]):
+        return [value and '{"v":true}' or '{"v":false}' for value in values]
+    write = WRITERS[column_type]
+    return [_cell(value, write) for value in values]
+
+
+def parse_columns(table_description):
+    """Parse a flat table description into (id, label, type, properties)
+    tuples, as gviz_api does.
+
+    Raises Unsupported for other descriptions.
+    """
+    if not isinstance(table_description, list) or not table_description:
+        raise Unsupported("Not a flat table description")
+    columns = []
+    for column in table_description:
+        if isinstance(column, basestring):
+            column = (column,)
+        if not isinstance(column, tuple) or not 0 < len(column) <= 4:
+            raise Unsupported("Unsupported column: %r" % (column,))
+        for element in column[:3]:
+            if not isinstance(element, basestring):
+                raise Unsupported("Unsupported column: %r" % (column,))
+        column_type = 'string'
+        if len(column) > 1:
+            column_type = column[1].lower()
+        if not column_type in TYPES:
+            raise Unsupported("Unsupported column type: %s" % column_type)
+        label = column[0]
+        if len(column) > 2:
+            label = column[2]
+        properties = {}
+        if len(column) > 3:
+            if not isinstance(column[3], dict):
+                raise Unsupported("Unsupported column: %r" % (column,))
+            properties = column[3]
+        columns.append((column[0], label, column_type, properties))
+    if len(set([column[0] for column in columns])) != len(columns):
+        raise Unsupported("Columns with the same id")
+    return columns
+
+
+def _get_values(table, width):
+    """Get the values of each column of a table"""
+    if isinstance(table, Table):
+        if len(table.columns) != width:
+            raise Unsupported("Columns not matching the description")
+        return table.columns
+    table_data = table['table_data']
+    if not table_data:
+        return [[] for column in range(0, width)]
+    rows = []
+    add = rows.append
+    for row in table_data:
+        if not isinstance(row, (list, tuple, Row)) or len(row) > width:
+            raise Unsupported("Unsupported row: %r" % (row,))
+        if len(row) < width:
+            row = list(row) + [None] * (width - len(row))
+        add(row)
+    return zip(*rows)
+
+
+def _write_header(columns):
+    """Write the column objects"""
+    objects = []
+    for column_id, label, column_type, properties in columns:
+        pairs = {'id': _text(column_id),
+                 'label': _text(label),
+                 'type': '"%s"' % column_type}
+        keys = COLUMN_KEYS
+        if properties:
+            pairs['p'] = _properties(properties)
+            keys = COLUMN_PROPERTIES_KEYS
+        objects.append(_object([(key, pairs[key]) for key in keys]))
+    return '[%s]' % ','.join(objects)
+
+
+def _encode(text):
+    """Give the UTF-8 bytes of a chunk"""
+    if isinstance(text, unicode):
+        return text.encode('utf-8')
+    return text
+
+
+def iter_json(table):
+    """Write a pickled table as Google Visualization JSON, in chunks.
+
+    The table is a dictionary with the table_description and table_data,
+    or a raisin.box.table.Table. The chunks are UTF-8 encoded, and there is
+    a chunk for each row. Raises Unsupported for tables that have to be
+    encoded by gviz_api, before anything is written.
+    """
+    columns = parse_columns(table['table_description'])
+    values = _get_values(table, len(columns))
+    cells = [_write_column(column_values, column[2])
+             for column, column_values in zip(columns, values)]
+    header = _encode(_write_header(columns))
+    return _iter_chunks(header, cells)
+
+
+def _iter_chunks(header, cells):
+    """Write the JSON of a table from its header and the cells of each
+    column"""
+    for index, key in enumerate(TABLE_KEYS):
+        if index:
+            yield ','
+        else:
+            yield '{'
+        if key == 'cols':
+            yield '"cols":'
+            yield header
+        else:
+            yield '"rows":['
+            first = True
+            for row in zip(*cells):
+                text = '{"c":[%s]}' % ','.join(row)
+                if first:
+                    first = False
+                    yield _encode(text)
+                else:
+                    yield ROW_SEPARATOR + _encode(text)
+            yield ']'
+    yield '}'
+
+
+def to_json(table):
+    """Encode a pickled table as Google Visualization JSON"""
+    try:
+        return ''.join(iter_json(table))
+    except Unsupported:
+        pass
+    return gviz_to_json(table)
+
+
+def gviz_to_json(table):
+    """Encode a pickled table as Google Visualization JSON with gviz_api"""
+    # Only imported when needed, as most tables are encoded here
+    from gvizapi import gviz_api
+    data_table = gviz_api.DataTable(table['table_description'],
+                                    table['table_data'])
+    return data_table.ToJSon()
@@ -0,0 +1,103 @@
+"""Module level objects that are only loaded on first access"""
+
+import sys
+import threading
+
+
+def unwrap(value):
+    """Give back the value, used for copying and pickling proxies"""
+    return value
+
+
+def import_module(name):
+    """Import a module and return it"""
+    __import__(name)
+    return sys.modules[name]
+
+
+class LazyProxy(object):
+    """Stand in for an object that is created on first access.
+
+    The factory is called once, and everything else is passed on to the
+    object it returns. The proxy also reports the class of that object, so
+    isinstance checks keep working:
+
+        BOXES = LazyProxy(load_boxes)
+    """
+
+    __slots__ = ('_factory', '_target', '_lock')
+
+    def __init__(self, factory):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_target', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _get_target(self):
+        """Get the object, creating it on first access"""
+        factory = object.__getattribute__(self, '_factory')
+        if factory is not None:
+            lock = object.__getattribute__(self, '_lock')
+            with lock:
+                factory = object.__getattribute__(self, '_factory')
+                if factory is not None:
+                    object.__setattr__(self, '_target', factory())
+                    object.__setattr__(self, '_factory', None)
+        return object.__getattribute__(self, '_target')
+
+    # pylint: disable=E0202
+    # The class of the proxy is the class of the object
+    @property
+    def __class__(self):
+        return self._get_target().__class__
+
+    def __getattr__(self, name):
+        return getattr(self._get_target(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get_target(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._get_target(), name)
+
+    def __dir__(self):
+        return dir(self._get_target())
+
+    def __repr__(self):
+        return repr(self._get_target())
+
+    def __str__(self):
+        return str(self._get_target())
+
+    def __nonzero__(self):
+        return bool(self._get_target())
+
+    def __len__(self):
+        return len(self._get_target())
+
+    def __iter__(self):
+        return iter(self._get_target())
+
+    def __contains__(self, item):
+        return item in self._get_target()
+
+    def __getitem__(self, key):
+        return self._get_target()[key]
+
+    def __setitem__(self, key, value):
+        self._get_target()[key] = value
+
+    def __delitem__(self, key):
+        del self._get_target()[key]
+
+    def __eq__(self, other):
+        return self._get_target() == other
+
+    def __ne__(self, other):
+        return self._get_target() != other
+
+    def __hash__(self):
+        return hash(self._get_target())
+
+    def __reduce_ex__(self, protocol):
+        # Copies and pickles are made of the object itself
+        return (unwrap, (self._get_target(),))
@@ -0,0 +1,141 @@
+"""Library of the JavaScript functions used by the boxes
+
+Functions like makeExperimentLink used to be written into the javascript of
+every box using them, on every page. They are collected here into a single
+JavaScript file instead, whose name holds a hash of its content, so that
+browsers can cache it for ever. The file is written once, for example during
+a deployment:
+
+    python -m raisin.box.library /var/www/static
+
+Using the library is turned on once the pages load it, with the
+RAISIN_BOX_LIBRARY environment variable or by calling enable. The boxes
+using the library then have its file name as library, and the page showing
+them loads it before running their javascript:
+
+    <script src="/static/${box['library']}"></script>
+
+Until then, the functions are still written into the javascript of the
+boxes.
+"""
+
+import os
+import sys
+import hashlib
+
+# The functions of the library, by name
+# pylint: disable=C0301
+FUNCTIONS = (
+    ('makeExperimentLink', """
+function makeExperimentLink(dataTable, rowNum){
+    if (dataTable.getValue(rowNum, 0) != undefined) {
+        return String.fromCharCode('60') + 'a href=\"/project/' + dataTable.getValue(rowNum, 0) + '/' + dataTable.getValue(rowNum, 1) + '/' + dataTable.getValue(rowNum, 2) + '\"' + String.fromCharCode('62') + dataTable.getValue(rowNum, 2) + String.fromCharCode('60') + '/a' + String.fromCharCode('62');
+    }
+    else {
+        return '';
+    };
+}
+"""),
+    ('makeExperimentSubsetLink', """
+function makeExperimentSubsetLink(dataTable, rowNum){
+    if (dataTable.getValue(rowNum, 0) != undefined) {
+        return String.fromCharCode('60') + 'a href=\"/project/' + dataTable.getValue(rowNum, 0) + '/experiment/subset/' + dataTable.getValue(rowNum, 1) + '/' + dataTable.getValue(rowNum, 2) + '\"' + String.fromCharCode('62') + dataTable.getValue(rowNum, 4) + String.fromCharCode('60') + '/a' + String.fromCharCode('62');
+    }
+    else {
+        return '';
+    };
+}
+"""),
+    ('makeDownloadLink', """
+function makeDownloadLink(dataTable, rowNum){
+    if (dataTable.getValue(rowNum, 0) != undefined) {
+        return String.fromCharCode('60') + 'a href=\"' + dataTable.getValue(rowNum, 3) + '\"' + String.fromCharCode('62') + dataTable.getValue(rowNum, 0) + String.fromCharCode('60') + '/a' + String.fromCharCode('62');
+    }
+    else {
+        return '';
+    };
+}
+"""),
+    ('drawReadDistribution', """
+function drawReadDistribution(id, values) {
+    var table = new google.visualization.DataTable();
+    table.addColumn('number');
+    for (var i = 0; i < values.length; i++) {
+        table.addRow([values[i]]);
+    }
+    var chart = new google.visualization.ImageSparkLine(document.getElementById(id));
+    chart.draw(table, {width: 100, height: 62, showAxisLines: false,  showValueLabels: false, labelPosition: 'none'});
+}
+"""),
+    )
+
+# The source of each function, by name
+SOURCES = dict(FUNCTIONS)
+
+# The content of the library
+CONTENT = ''.join([source for name, source in FUNCTIONS])
+
+# The file name of the library, changing with its content
+FILENAME = 'raisin.box.%s.js' % hashlib.sha1(CONTENT).hexdigest()[:12]
+
+
+# Whether the pages load the library
+ENABLED = os.environ.get('RAISIN_BOX_LIBRARY', '') not in ('', '0')
+
+
+# pylint: disable=W0603
+# The library is turned on for the whole application
+def enable():
+    """Use the library, once the pages load it"""
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    """Write the functions into the javascript of the boxes again"""
+    global ENABLED
+    ENABLED = False
+
+
+def use_library(box, *names):
+    """Make the functions of the library a box calls available to its
+    javascript.
+
+    When the library is used, the box gets its file name as library.
+    Otherwise the functions are written before the javascript of the box.
+    """
+    if ENABLED:
+        box['library'] = FILENAME
+    else:
+        box['javascript'] = (''.join([SOURCES[name] for name in names]) +
+                             box.get('javascript', ''))
+    return box
+
+
+def write(directory):
+    """Write the library into a directory, unless it is already there.
+
+    Returns the path of the library.
+    """
+    path = os.path.join(directory, FILENAME)
+    if os.path.exists(path):
+        return path
+    # Write to a temporary file first, so that the library is never served
+    # partially written
+    temporary = "%s.%s.tmp" % (path, os.getpid())
+    with open(temporary, 'wb') as library_file:
+        library_file.write(CONTENT)
+    os.rename(temporary, path)
+    return path
+
+
+def main():
+    """Write the library into the directory given as argument"""
+    if len(sys.argv) != 2:
+        sys.stderr.write("Usage: %s DIRECTORY\n" % sys.argv[0])
+        sys.exit(2)
+    path = write(sys.argv[1])
+    sys.stdout.write("Wrote %s\n" % path)
+
+if __name__ == '__main__':
+    main()
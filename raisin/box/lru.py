@@ -0,0 +1,107 @@
+"""Mapping keeping its keys in the order they were last used
+
+OrderedDict is only available from Python 2.7 on, so the least recently
+used caches keep their entries in an LruDict instead, a dictionary of the
+links of a circular doubly linked list:
+
+    entries = LruDict()
+    entries['a'] = 1
+    entries['b'] = 2
+    entries.get('a')
+    entries.popitem()
+    ('b', 2)
+
+Getting or setting a key makes it the most recently used one. Iterating
+goes from the least to the most recently used key.
+"""
+
+# The positions in a link
+PREVIOUS, NEXT, KEY, VALUE = 0, 1, 2, 3
+
+
+class LruDict(object):
+    """Dictionary ordered from the least to the most recently used key"""
+
+    def __init__(self):
+        # The root of the list, linking the most and least recently used
+        self._root = root = [None, None, None, None]
+        root[PREVIOUS] = root[NEXT] = root
+        self._links = {}
+
+    def __len__(self):
+        return len(self._links)
+
+    def __contains__(self, key):
+        return key in self._links
+
+    def __iter__(self):
+        root = self._root
+        link = root[NEXT]
+        while link is not root:
+            yield link[KEY]
+            link = link[NEXT]
+
+    def _unlink(self, link):
+        """Take a link out of the list"""
+        link[PREVIOUS][NEXT] = link[NEXT]
+        link[NEXT][PREVIOUS] = link[PREVIOUS]
+
+    def _append(self, link):
+        """Put a link at the most recently used end of the list"""
+        root = self._root
+        last = root[PREVIOUS]
+        link[PREVIOUS] = last
+        link[NEXT] = root
+        last[NEXT] = root[PREVIOUS] = link
+
+    def get(self, key, default=None):
+        """Get the value of a key, making it the most recently used one"""
+        link = self._links.get(key, None)
+        if link is None:
+            return default
+        self._unlink(link)
+        self._append(link)
+        return link[VALUE]
+
+    def __getitem__(self, key):
+        link = self._links[key]
+        self._unlink(link)
+        self._append(link)
+        return link[VALUE]
+
+    def __setitem__(self, key, value):
+        link = self._links.get(key, None)
+        if link is None:
+            link = self._links[key] = [None, None, key, value]
+        else:
+            self._unlink(link)
+            link[VALUE] = value
+        self._append(link)
+
+    def __delitem__(self, key):
+        self._unlink(self._links.pop(key))
+
+    def pop(self, key, default=None):
+        """Remove a key and get its value"""
+        link = self._links.pop(key, None)
+        if link is None:
+            return default
+        self._unlink(link)
+        return link[VALUE]
+
+    def popitem(self):
+        """Remove the least recently used key and get it with its value.
+
+        Raises KeyError if there are no keys.
+        """
+        link = self._root[NEXT]
+        if link is self._root:
+            raise KeyError('popitem(): dictionary is empty')
+        del self[link[KEY]]
+        return link[KEY], link[VALUE]
+
+    def clear(self):
+        """Remove all the keys"""
+        root = self._root
+        root[PREVIOUS] = root[NEXT] = root
+        self._links.clear()
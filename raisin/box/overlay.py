@@ -0,0 +1,178 @@
+"""Boxes made of a shared base and the changes of a request
+
+The augmenters change the boxes in place, including the dictionaries in
+them like chartoptions, so each request used to deep copy the section of
+boxes.ini for its boxes. Instead, each section is frozen once into a base
+box shared by all requests, and each request gets an overlay on it:
+
+    box = new_box('lane_merged_mapped_reads')
+    box['chartoptions']['title'] = 'Mapped reads'
+
+The overlay keeps the keys written to it, and reads the other ones from the
+base. The dictionaries of the base are given as overlays too, the first
+time they are read, and the lists as copies, so that changing them does
+not change the base.
+"""
+
+import copy
+import threading
+from collections import Mapping
+from collections import MutableMapping
+from raisin.box import BOXES
+
+# Marks the keys of the base that were deleted in the overlay
+DELETED = object()
+
+
+class FrozenDict(dict):
+    """Dictionary that can not be changed"""
+
+    def _frozen(self, *args, **kwargs):
+        """Refuse to change the dictionary"""
+        raise TypeError("Frozen boxes can not be changed")
+
+    __setitem__ = __delitem__ = _frozen
+    clear = pop = popitem = setdefault = update = _frozen
+
+    def __reduce__(self):
+        # Copies and pickles are plain dictionaries
+        return (dict, (dict(self),))
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+
+class FrozenList(tuple):
+    """List of a frozen box, given as a list copy by the overlays"""
+
+
+def freeze(value):
+    """Freeze a box, a section of boxes.ini or a value in it"""
+    if isinstance(value, Mapping):
+        return FrozenDict([(key, freeze(item)) for key, item in value.items()])
+    if isinstance(value, list):
+        return FrozenList([freeze(item) for item in value])
+    return value
+
+
+class BoxOverlay(MutableMapping):
+    """Box reading the keys that were not written to it from a base"""
+
+    def __init__(self, base):
+        self.base = base
+        self.local = {}
+
+    def __getitem__(self, key):
+        local = self.local
+        if key in local:
+            value = local[key]
+            if value is DELETED:
+                raise KeyError(key)
+            return value
+        value = self.base[key]
+        if isinstance(value, FrozenDict):
+            value = local[key] = BoxOverlay(value)
+        elif isinstance(value, FrozenList):
+            value = local[key] = list(value)
+        return value
+
+    def __setitem__(self, key, value):
+        self.local[key] = value
+
+    def __delitem__(self, key):
+        if not key in self:
+            raise KeyError(key)
+        if key in self.base:
+            self.local[key] = DELETED
+        else:
+            del self.local[key]
+
+    def __contains__(self, key):
+        if key in self.local:
+            return self.local[key] is not DELETED
+        return key in self.base
+
+    def __iter__(self):
+        local = self.local
+        for key in self.base:
+            if local.get(key, None) is not DELETED:
+                yield key
+        for key, value in local.items():
+            if not key in self.base and value is not DELETED:
+                yield key
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def changes(self):
+        """Get the keys that were written, with their values.
+
+        Deleted keys have DELETED as value.
+        """
+        changes = {}
+        for key, value in self.local.items():
+            if isinstance(value, BoxOverlay):
+                if value.local and value.changes():
+                    changes[key] = value.to_dict()
+            elif key in self.base and self.base[key] == value:
+                continue
+            else:
+                changes[key] = value
+        return changes
+
+    def to_dict(self):
+        """Get the box as a plain dictionary, for example for rendering"""
+        box = {}
+        for key in self:
+            value = self[key]
+            if isinstance(value, BoxOverlay):
+                value = value.to_dict()
+            box[key] = value
+        return box
+
+    def copy(self):
+        """Get a new overlay on the same base with the same changes"""
+        overlay = BoxOverlay(self.base)
+        for key, value in self.local.items():
+            if isinstance(value, BoxOverlay):
+                value = value.copy()
+            elif isinstance(value, list):
+                value = list(value)
+            overlay.local[key] = value
+        return overlay
+
+    def __reduce__(self):
+        # Copies and pickles are plain dictionaries
+        return (dict, (self.to_dict(),))
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.to_dict(), memo)
+
+    def __repr__(self):
+        return "<BoxOverlay %r>" % (self.to_dict(),)
+
+
+# The frozen sections of boxes.ini, by box name
+BASES = {}
+BASES_LOCK = threading.Lock()
+
+
+def get_base(name, boxes=BOXES):
+    """Get the frozen section of a box, freezing it on first use"""
+    base = BASES.get(name, None)
+    if base is None:
+        base = freeze(boxes[name])
+        with BASES_LOCK:
+            base = BASES.setdefault(name, base)
+    return base
+
+
+def new_box(name):
+    """Get a box for a request, as an overlay on its section of boxes.ini"""
+    return BoxOverlay(get_base(name))
+
+
+def clear_bases():
+    """Forget the frozen sections, as when boxes.ini changed"""
+    with BASES_LOCK:
+        BASES.clear()
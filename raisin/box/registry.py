@@ -0,0 +1,185 @@
+"""Registry of the methods augmenting the boxes"""
+
+import threading
+from raisin.box.config import JSON
+
+# List methods that read the content of the registry
+ACCESSORS = ('__iter__', '__reversed__', '__len__', '__contains__',
+             '__getitem__', '__getslice__', '__repr__', '__eq__', '__ne__',
+             '__lt__', '__le__', '__gt__', '__ge__', '__add__', '__mul__',
+             'index', 'count')
+
+# List methods that change the content of the registry
+MODIFIERS = ('append', 'extend', 'insert', 'remove', 'pop', 'reverse', 'sort',
+             '__setitem__', '__delitem__', '__setslice__', '__delslice__',
+             '__iadd__', '__imul__')
+
+
+class Registry(list):
+    """A list of (name, method, formats) tuples with lookups by name.
+
+    The augment decorator appends the registered methods, and consumers can
+    still iterate over the list. Lookups by box name go through an index that
+    is built on first use and thrown away whenever the list changes.
+
+    When a name is registered more than once, the first method is used, as
+    with a scan over the list, and the formats are the union of all the
+    formats registered for the name.
+
+    The modules registering their methods can be given, and are then only
+    imported when the registry is read for the first time.
+    """
+
+    def __init__(self, iterable=(), modules=()):
+        list.__init__(self, iterable)
+        self._modules = list(modules)
+        self._loading = False
+        self._lock = threading.RLock()
+        self._index = None
+        self._plans = {}
+        self._passthrough = {}
+
+    def _load(self):
+        """Import the modules registering their methods.
+
+        The other threads wait until all the modules are imported. The
+        modules registering their methods while being imported read the
+        registry as it is, and a module that fails to import is tried again
+        on the next read.
+        """
+        if not self._modules:
+            return
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+            try:
+                while self._modules:
+                    __import__(self._modules[0])
+                    del self._modules[0]
+            finally:
+                self._loading = False
+
+    def _clear(self):
+        """Throw away the index, the fetch plans and the pass-through boxes"""
+        self._index = None
+        self._plans = {}
+        self._passthrough = {}
+
+    def _get_index(self):
+        """Get the index mapping each name to its method and formats"""
+        self._load()
+        if self._index is None:
+            index = {}
+            for name, method, formats in self:
+                if name in index:
+                    method, known = index[name]
+                    formats = known + tuple([media_type
+                                             for media_type in formats
+                                             if not media_type in known])
+                index[name] = (method, tuple(formats))
+            self._index = index
+        return self._index
+
+    def get(self, name, default=None):
+        """Get the (name, method, formats) tuple registered for a box"""
+        if name in self._get_index():
+            method, formats = self._index[name]
+            return (name, method, formats)
+        return default
+
+    def method(self, name):
+        """Get the method augmenting a box"""
+        return self._get_index()[name][0]
+
+    def formats(self, name):
+        """Get the formats that need to be fetched for a box"""
+        return self._get_index()[name][1]
+
+    def names(self):
+        """Get the names of all registered boxes"""
+        return self._get_index().keys()
+
+    def passthrough(self, name):
+        """Check whether the JSON of a box is forwarded without looking at it.
+
+        See is_passthrough. Boxes that are not registered are not passed
+        through.
+        """
+        if not name in self._passthrough:
+            registered = self.get(name)
+            self._passthrough[name] = (registered is not None and
+                                       is_passthrough(registered[1],
+                                                      registered[2]))
+        return self._passthrough[name]
+
+    def fetch_plan(self, names):
+        """Get the formats that need to be fetched for a set of boxes.
+
+        Returns a dictionary mapping each format to the sorted tuple of the
+        names of the boxes that need it. Boxes that are not registered need
+        no formats. The plan is computed once for each set of boxes, so the
+        boxes of a tab only need to be looked at once.
+        """
+        key = frozenset(names)
+        if not key in self._plans:
+            index = self._get_index()
+            plan = {}
+            for name in sorted(key):
+                if name in index:
+                    for media_type in index[name][1]:
+                        plan.setdefault(media_type, []).append(name)
+            for media_type in plan:
+                plan[media_type] = tuple(plan[media_type])
+            self._plans[key] = plan
+        return self._plans[key]
+
+
+def _accessor(name):
+    """Wrap a list method so that it loads the registry first"""
+    method = getattr(list, name)
+
+    def access(self, *args):
+        """Load the registry before reading the list"""
+        self._load()
+        return method(self, *args)
+    access.__name__ = name
+    access.__doc__ = method.__doc__
+    return access
+
+
+def _modifier(name):
+    """Wrap a list method so that it clears the index of the registry"""
+    method = getattr(list, name)
+
+    def modify(self, *args):
+        """Load the registry and clear the index before modifying the list"""
+        self._load()
+        self._clear()
+        return method(self, *args)
+    modify.__name__ = name
+    modify.__doc__ = method.__doc__
+    return modify
+
+
+def is_passthrough(method, formats):
+    """Check whether an augmenter only sets the title of a JSON box.
+
+    The JSON of these boxes is not looked at, and can be forwarded as it
+    was fetched. The augmenters are marked with passthrough=True on the
+    augment decorator of raisin.box.boxes.
+    """
+    # Timed augmenters, see raisin.box.timing, are recognised by what they
+    # time
+    method = getattr(method, 'timed', method)
+    return (tuple(formats) == (JSON,) and
+            getattr(method, 'passthrough', False) is True)
+
+
+for _name in ACCESSORS:
+    if hasattr(list, _name):
+        setattr(Registry, _name, _accessor(_name))
+
+for _name in MODIFIERS:
+    if hasattr(list, _name):
+        setattr(Registry, _name, _modifier(_name))
@@ -0,0 +1,121 @@
+"""Matching of URLs onto the path patterns of boxes.ini
+
+Each section of boxes.ini has a path pattern, made of fixed segments and of
+parameters starting with a colon:
+
+    project/:project_name/parameter_list/:parameter_values/tab/:tab_name/box/:box_name
+
+The patterns are compiled once into a trie of segments, so that matching a
+URL takes time proportional to its number of segments, whatever the number
+of sections:
+
+    ROUTER.match('project/ENCODE/parameter_list/a-b/tab/mapping/box/lane_merged_mapped_reads')
+    ('lane_merged_mapped_reads', {'project_name': 'ENCODE', ...})
+
+Many sections share a pattern. When the pattern has a box_name parameter,
+the section is the one it names, otherwise it is the first section with the
+pattern in boxes.ini. match_all gives all the sections instead.
+"""
+
+from raisin.box import BOXES
+from raisin.box.lazy import LazyProxy
+
+# The child of a trie node matching any segment, for the parameters
+PARAMETER = object()
+
+
+def split(path):
+    """Get the segments of a path, leaving out the query string"""
+    path = path.split('?', 1)[0].strip('/')
+    if not path:
+        return []
+    return path.split('/')
+
+
+class Node(object):
+    """Node of the segment trie"""
+
+    __slots__ = ('children', 'routes')
+
+    def __init__(self):
+        self.children = {}
+        # (parameter names, section names) of the patterns ending here
+        self.routes = []
+
+
+class Router(object):
+    """Segment trie of the path patterns of the boxes"""
+
+    def __init__(self, boxes=BOXES):
+        self.root = Node()
+        patterns = {}
+        for name in boxes:
+            path = boxes[name].get('path', None)
+            if path is None:
+                continue
+            if not path in patterns:
+                patterns[path] = self.add(path)
+            patterns[path].append(name)
+
+    def add(self, path):
+        """Add a path pattern and get the list of its section names"""
+        node = self.root
+        names = []
+        for segment in split(path):
+            if segment.startswith(':'):
+                names.append(segment[1:])
+                segment = PARAMETER
+            node = node.children.setdefault(segment, Node())
+        sections = []
+        node.routes.append((tuple(names), sections))
+        return sections
+
+    def _find(self, segments):
+        """Find the nodes matching the segments, trying the fixed segments
+        before the parameters. Yields the nodes with the values of the
+        parameters."""
+        length = len(segments)
+        # The parameters to try when the fixed segments lead nowhere
+        stack = [(self.root, 0, [])]
+        while stack:
+            node, index, values = stack.pop()
+            while index < length:
+                segment = segments[index]
+                children = node.children
+                parameter = children.get(PARAMETER, None)
+                if parameter is not None and segment:
+                    stack.append((parameter, index + 1, values + [segment]))
+                node = children.get(segment, None)
+                if node is None:
+                    break
+                index += 1
+            else:
+                if node.routes:
+                    yield node, values
+
+    def match_all(self, path):
+        """Get the (section name, parameters) of all the sections whose
+        pattern matches a path"""
+        matches = []
+        for node, values in self._find(split(path)):
+            for names, sections in node.routes:
+                parameters = dict(zip(names, values))
+                matches.extend([(name, parameters) for name in sections])
+        return matches
+
+    def match(self, path):
+        """Get the (section name, parameters) of the box a path refers to.
+
+        Returns None if no box matches the path.
+        """
+        for node, values in self._find(split(path)):
+            for names, sections in node.routes:
+                parameters = dict(zip(names, values))
+                if not 'box_name' in parameters:
+                    return sections[0], parameters
+                if parameters['box_name'] in sections:
+                    return parameters['box_name'], parameters
+        return None
+
+# The path patterns of boxes.ini, compiled on first use
+ROUTER = LazyProxy(Router)
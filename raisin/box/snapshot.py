@@ -0,0 +1,137 @@
+"""Compiled snapshot of the resources.ini and boxes.ini configuration
+
+Parsing the configuration files with ConfigObj is done by every process
+importing raisin.box. The parsed ConfigObj objects can be compiled into a
+snapshot file once, for example during a deployment:
+
+    python -m raisin.box.snapshot
+
+The snapshot records the version of its format and the modification time and
+SHA-1 hash of each configuration file. It is only used while it matches the
+configuration files, otherwise they are parsed with ConfigObj as before.
+
+The snapshot is written next to the configuration files, unless the
+RAISIN_BOX_SNAPSHOT environment variable gives another path.
+"""
+
+import os
+import sys
+import hashlib
+import cPickle
+from configobj import ConfigObj
+
+# Increase when the content of the snapshot changes
+VERSION = 1
+
+# The directory containing the configuration files
+DIRECTORY = os.path.dirname(__file__)
+
+# The configuration files and the options used for parsing them
+CONFIGURATIONS = (('resources.ini', {'interpolation': False}),
+                  ('boxes.ini', {}))
+
+
+def get_path():
+    """Get the path of the snapshot file"""
+    return os.environ.get('RAISIN_BOX_SNAPSHOT',
+                          os.path.join(DIRECTORY, 'config.snapshot'))
+
+
+def get_hash(path):
+    """Get the SHA-1 hash of a file"""
+    with open(path, 'rb') as config_file:
+        return hashlib.sha1(config_file.read()).hexdigest()
+
+
+def get_fingerprints(directory=DIRECTORY):
+    """Get the modification time and hash of each configuration file"""
+    fingerprints = []
+    for name, options in CONFIGURATIONS:
+        path = os.path.join(directory, name)
+        fingerprints.append((name, os.path.getmtime(path), get_hash(path)))
+    return fingerprints
+
+
+def parse(directory=DIRECTORY):
+    """Parse the configuration files with ConfigObj"""
+    configurations = []
+    for name, options in CONFIGURATIONS:
+        path = os.path.join(directory, name)
+        configurations.append(ConfigObj(path, **options))
+    return tuple(configurations)
+
+
+def is_current(fingerprints, directory=DIRECTORY):
+    """Check whether the fingerprints match the configuration files.
+
+    A file with the same modification time is taken to be unchanged. When
+    the modification time differs, the file is unchanged if it has the same
+    hash, as after a fresh checkout.
+    """
+    if len(fingerprints) != len(CONFIGURATIONS):
+        return False
+    for (name, options), fingerprint in zip(CONFIGURATIONS, fingerprints):
+        path = os.path.join(directory, name)
+        snapshot_name, mtime, sha1 = fingerprint
+        if snapshot_name != name:
+            return False
+        if os.path.getmtime(path) != mtime and get_hash(path) != sha1:
+            return False
+    return True
+
+
+def build(directory=DIRECTORY, path=None):
+    """Parse the configuration files and write the snapshot"""
+    if path is None:
+        path = get_path()
+    snapshot = (VERSION, get_fingerprints(directory), parse(directory))
+    # Write to a temporary file first, so that processes starting in the
+    # meantime never read a partial snapshot
+    temporary = "%s.%s.tmp" % (path, os.getpid())
+    with open(temporary, 'wb') as snapshot_file:
+        cPickle.dump(snapshot, snapshot_file, cPickle.HIGHEST_PROTOCOL)
+    os.rename(temporary, path)
+    return path
+
+
+def read(directory=DIRECTORY, path=None):
+    """Read the configurations from the snapshot.
+
+    Returns None if there is no snapshot, or if it is stale.
+    """
+    if path is None:
+        path = get_path()
+    try:
+        with open(path, 'rb') as snapshot_file:
+            content = snapshot_file.read()
+    except IOError:
+        return None
+    try:
+        version, fingerprints, configurations = cPickle.loads(content)
+    # pylint: disable=W0703
+    # An unreadable snapshot is just ignored
+    except Exception:
+        return None
+    if version != VERSION or not is_current(fingerprints, directory):
+        return None
+    return configurations
+
+
+def load(directory=DIRECTORY, path=None):
+    """Load the configurations from the snapshot or by parsing the files.
+
+    Returns the RESOURCES and BOXES ConfigObj objects.
+    """
+    configurations = read(directory, path)
+    if configurations is None:
+        configurations = parse(directory)
+    return configurations
+
+
+def main():
+    """Build the snapshot"""
+    path = build()
+    sys.stdout.write("Wrote %s\n" % path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Augmenters in two phases
+
+Most of what the augmenters set, like the chart options, only depends on
+the configuration of the box in boxes.ini. An augmenter can be split into a
+static phase, setting what only depends on the configuration, and a phase
+depending on the resources:
+
+    def _position(box):
+        golden(box, 900)
+        title(box)
+
+    @augment((JSON, PICKLED), static=_position)
+    def lane_quality_score_by_position(context, box):
+        return box
+
+The static phase is run once for each section of boxes.ini, on a copy of the
+section, and what it changed is kept. For each request, the kept changes are
+merged into the box before the second phase runs.
+"""
+
+import copy
+import threading
+from collections import Mapping
+from raisin.box import BOXES
+from raisin.box.config import JSON
+from raisin.box.config import PICKLED
+from raisin.box.timing import untimed
+
+# The resources of a box, which the static phase does not look at
+RESOURCES = (JSON, PICKLED)
+
+
+def get_changes(before, after):
+    """Get the keys of a box that the static phase set or changed"""
+    changes = {}
+    for key, value in after.items():
+        if not key in before or before[key] != value:
+            changes[key] = value
+    return changes
+
+
+def merge(box, changes):
+    """Merge the changes of the static phase into a box.
+
+    The changes are shared between the requests, so the dictionaries are
+    copied, one level deep, as the second phase may change them. The other
+    values are strings and numbers, and are not copied. The box can also be
+    a raisin.box.overlay.BoxOverlay.
+    """
+    for key, value in changes.iteritems():
+        if isinstance(value, dict):
+            merged = box.get(key, None)
+            if isinstance(merged, Mapping):
+                merged = dict(merged)
+                merged.update(value)
+            else:
+                merged = dict(value)
+            value = merged
+        box[key] = value
+    return box
+
+
+class StaticCache(object):
+    """The changes of the static phases, by box name"""
+
+    def __init__(self, boxes=BOXES):
+        self.boxes = boxes
+        self._changes = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, static, box):
+        """Get the changes of the static phase of a box.
+
+        They are computed on the section of the box in boxes.ini the first
+        time, and on the box itself for boxes that have no section.
+        """
+        changes = self._changes.get(name, None)
+        if changes is not None:
+            return changes
+        if not name in self.boxes:
+            before = dict([(key, value) for (key, value) in box.items()
+                           if not key in RESOURCES])
+            section = copy.deepcopy(before)
+            static(section)
+            return get_changes(before, section)
+        before = self.boxes[name].dict()
+        section = copy.deepcopy(before)
+        static(section)
+        changes = get_changes(before, section)
+        with self._lock:
+            return self._changes.setdefault(name, changes)
+
+    def prepare(self, registry):
+        """Run the static phases of all the registered boxes up front"""
+        for name, method, formats in registry:
+            method = untimed(method)
+            if isinstance(method, TwoPhase) and name in self.boxes:
+                self.get(name, method.static, self.boxes[name].dict())
+
+    def clear(self):
+        """Forget the changes, as when boxes.ini changed"""
+        with self._lock:
+            self._changes.clear()
+
+    def __len__(self):
+        return len(self._changes)
+
+# The changes of the static phases of the registered augmenters
+STATIC = StaticCache()
+
+
+class TwoPhase(object):
+    """Augmenter merging the changes of its static phase into the box,
+    and then running its second phase"""
+
+    def __init__(self, name, static, method, cache=STATIC):
+        self.__name__ = name
+        self.__doc__ = method.__doc__
+        self.static = static
+        self.method = method
+        self.cache = cache
+
+    def __call__(self, context, box):
+        merge(box, self.cache.get(self.__name__, self.static, box))
+        result = self.method(context, box)
+        if result is None:
+            return box
+        return result
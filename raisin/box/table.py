@@ -0,0 +1,468 @@
+"""Direct access to the rows of a pickled Google Visualization table.
+
+The pickled resources are dictionaries containing the table_description and
+the table_data that are passed on to gviz_api.DataTable. Reading a single
+value through a DataTable means validating and serializing the whole table,
+so the functions here map the column labels straight onto the rows.
+
+Large tables can be kept as a Table instead, which stores each column in a
+single array and gives the rows as views onto the columns:
+
+    table = Table.from_table(box[PICKLED])
+    rpkm = table.column('RPKM')
+"""
+
+import array
+import heapq
+import datetime
+import decimal
+import numbers
+from collections import Mapping
+from collections import Sequence
+
+# Column types that use the formatted value of a (value, formatted) cell
+DATE_TYPES = ('date', 'datetime', 'timeofday')
+
+# Characters that make the csv module quote a field
+CSV_QUOTED = (',', '"', '\r', '\n')
+
+
+def parse_description(table_description):
+    """Parse a flat table description into a list of (label, type) tuples.
+
+    The columns can be given as 'id', (id,), (id, type) or (id, type, label).
+    None is returned for descriptions that can not be mapped directly onto
+    the rows, like the nested dictionaries gviz_api.DataTable also accepts.
+    """
+    if not isinstance(table_description, list):
+        return None
+    columns = []
+    for column in table_description:
+        if isinstance(column, basestring):
+            column = (column,)
+        if not isinstance(column, (list, tuple)) or not column:
+            return None
+        for element in column[:3]:
+            if not isinstance(element, basestring):
+                return None
+        column_type = 'string'
+        if len(column) > 1:
+            column_type = column[1].lower()
+        if not column_type in ('string', 'number', 'boolean') + DATE_TYPES:
+            return None
+        label = column[0]
+        if len(column) > 2:
+            label = column[2]
+        if isinstance(label, unicode):
+            label = label.encode('utf-8')
+        columns.append((read_csv_field(label), column_type))
+    return columns
+
+
+def to_string(value, column_type):
+    """Give the string a DataTable uses for a value when exporting to CSV.
+
+    Raises ValueError if the value does not match the column type.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, tuple):
+        # Only dates use the formatted value
+        if column_type in DATE_TYPES:
+            value = value[1]
+            column_type = 'string'
+        else:
+            value = value[0]
+        if value is None:
+            return '(empty)'
+    if column_type == 'string':
+        if isinstance(value, str):
+            return value
+        if not isinstance(value, unicode):
+            value = unicode(value)
+        return value.encode('utf-8')
+    if column_type == 'number':
+        if isinstance(value, numbers.Integral):
+            return str(int(value))
+        if isinstance(value, (numbers.Real, decimal.Decimal)):
+            return str(float(value))
+        raise ValueError("Expected number, got %s" % type(value))
+    if column_type == 'boolean':
+        if value:
+            return 'true'
+        return 'false'
+    if column_type == 'date':
+        if isinstance(value, datetime.datetime):
+            return str(value.date())
+        if isinstance(value, datetime.date):
+            return str(value)
+    elif column_type == 'timeofday':
+        if isinstance(value, datetime.datetime):
+            return str(datetime.time(value.hour, value.minute, value.second))
+        if isinstance(value, datetime.time):
+            return str(value)
+    elif isinstance(value, datetime.datetime):
+        return str(value)
+    raise ValueError("Expected %s, got %s" % (column_type, type(value)))
+
+
+def read_csv_field(text):
+    """Give the string that is read back from a field of the CSV export.
+
+    The table is written with csv.writer and read back with
+    skipinitialspace, which strips the leading spaces of unquoted fields.
+    The line based reading drops the line feeds of quoted fields.
+    """
+    for character in CSV_QUOTED:
+        if character in text:
+            return text.replace('\n', '')
+    return text.lstrip(' ')
+
+
+def to_csv_value(value, column_type):
+    """Give the string that is read back from the CSV export of a cell."""
+    return read_csv_field(to_string(value, column_type))
+
+
+def first_row(table_description, table_data):
+    """Get the first row of a table as a dictionary keyed by column label.
+
+    The values are the strings that reading the CSV export of
+    gviz_api.DataTable with csv.DictReader would give. An empty dictionary
+    is returned for a table without rows, and None if the table can not be
+    mapped directly.
+
+    Raises ValueError if a value of the first row does not match its column
+    type. Unlike gviz_api.DataTable, the other rows are not looked at, so an
+    invalid value in them goes unnoticed.
+    """
+    columns = parse_description(table_description)
+    if columns is None:
+        return None
+    if not table_data:
+        return {}
+    row = table_data[0]
+    if not isinstance(row, (list, tuple, Row)) or len(row) > len(columns):
+        return None
+    lines = {}
+    length = len(row)
+    for index, (label, column_type) in enumerate(columns):
+        if index < length:
+            lines[label] = to_csv_value(row[index], column_type)
+        else:
+            lines[label] = ''
+    return lines
+
+
+def find_column(table_description, key=None):
+    """Get the index of a column given by label, id or index.
+
+    The index can also be given as a string, as in boxes.ini. Without key,
+    the first number column is taken. Raises ValueError if there is no such
+    column.
+    """
+    columns = parse_description(table_description)
+    if columns is None:
+        raise ValueError("Table description not flat")
+    if key is None:
+        types = [column_type for label, column_type in columns]
+        if not 'number' in types:
+            raise ValueError("No number column")
+        return types.index('number')
+    if isinstance(key, basestring) and key.isdigit():
+        key = int(key)
+    if isinstance(key, (int, long)):
+        if not 0 <= key < len(columns):
+            raise ValueError("No column %s" % key)
+        return key
+    labels = [label for label, column_type in columns]
+    if key in labels:
+        return labels.index(key)
+    ids = [_get_id(column) for column in table_description]
+    if key in ids:
+        return ids.index(key)
+    raise ValueError("No column %s" % key)
+
+
+def top_rows(table, count, column=None):
+    """Get the count rows of a table with the largest values in a column,
+    from the largest down.
+
+    The column is given as for find_column. Rows with the same value keep
+    their order, and rows without a value come last. The rows are selected
+    with a heap, in O(n log count) time, so the table does not need to be
+    sorted. Returns a dictionary with the table_description and the top
+    rows, or the table itself if its rows already are the top rows.
+    """
+    description = table['table_description']
+    index = find_column(description, column)
+    rows = table['table_data']
+    if isinstance(table, Table):
+        values = table.columns[index]
+        if not isinstance(values, array.array):
+            values = list(values)
+    else:
+        values = [None] * len(rows)
+        for position, row in enumerate(rows):
+            if len(row) > index:
+                values[position] = row[index]
+    if not isinstance(values, array.array):
+        # Cells can be given as (value, formatted) tuples
+        for position, value in enumerate(values):
+            if isinstance(value, tuple):
+                values[position] = value[0]
+    positions = [position for position in xrange(0, len(rows))
+                 if values[position] is not None]
+    top = heapq.nlargest(count, positions, key=values.__getitem__)
+    if len(top) < count and len(positions) < len(rows):
+        top.extend([position for position in xrange(0, len(rows))
+                    if values[position] is None][:count - len(top)])
+    if top == range(0, len(rows)):
+        return table
+    return {'table_description': description,
+            'table_data': [rows[position] for position in top]}
+
+
+def _get_id(column):
+    """Get the id of a column description"""
+    if isinstance(column, basestring):
+        return column
+    return column[0]
+
+
+def _get_label(column):
+    """Get the label of a column description"""
+    if isinstance(column, basestring):
+        return column
+    if len(column) > 2:
+        return column[2]
+    return column[0]
+
+
+def _array_type(values):
+    """Get the array type code that stores all the values exactly, if any"""
+    if not values:
+        return None
+    types = set(type(value) for value in values)
+    if types == set([float]):
+        return 'd'
+    if types <= set([int, long]) and array.array('l').itemsize == 8:
+        if -2 ** 63 <= min(values) and max(values) < 2 ** 63:
+            return 'l'
+    return None
+
+
+def _compact(values, strings):
+    """Store the values of a column in as little memory as possible.
+
+    Numbers of a single type are stored in an array. Equal strings are
+    stored once, taken from the strings dictionary shared by the columns.
+    """
+    code = _array_type(values)
+    if code is not None:
+        return array.array(code, values)
+    compacted = []
+    add = compacted.append
+    for value in values:
+        if isinstance(value, basestring):
+            value = strings.setdefault(value, value)
+        add(value)
+    return compacted
+
+
+class Table(object):
+    """Table storing its values by column.
+
+    It is used like the dictionary of a PICKLED resource, with the
+    table_description and the table_data. The rows of table_data are views
+    onto the columns, which compare equal to the lists they were made of.
+    """
+
+    __slots__ = ('description', 'labels', 'columns', 'length')
+
+    def __init__(self, table_description, columns, length):
+        self.description = table_description
+        self.labels = [_get_label(column) for column in table_description]
+        self.columns = columns
+        self.length = length
+
+    @classmethod
+    def from_columns(cls, table_description, columns):
+        """Make a table from the values of each column"""
+        strings = {}
+        columns = [_compact(values, strings) for values in columns]
+        length = 0
+        if columns:
+            length = len(columns[0])
+        return cls(table_description, columns, length)
+
+    @classmethod
+    def from_table(cls, table):
+        """Make a table from a dictionary with the table_description and the
+        table_data as lists of values.
+
+        Raises ValueError if the rows do not all have a value per column.
+        """
+        table_description = table['table_description']
+        table_data = table['table_data']
+        width = len(table_description)
+        for row in table_data:
+            if not isinstance(row, (list, tuple, Row)) or len(row) != width:
+                raise ValueError("Rows must have a value per column")
+        columns = [[row[index] for row in table_data]
+                   for index in range(0, width)]
+        table = cls.from_columns(table_description, columns)
+        table.length = len(table_data)
+        return table
+
+    def column(self, key):
+        """Get the values of a column given by label, id or index"""
+        if not isinstance(key, (int, long)):
+            if key in self.labels:
+                key = self.labels.index(key)
+            else:
+                ids = [_get_id(column) for column in self.description]
+                key = ids.index(key)
+        return self.columns[key]
+
+    def rows(self):
+        """Get the rows as lists"""
+        return [list(row) for row in zip(*self.columns)]
+
+    def __getitem__(self, key):
+        if key == 'table_description':
+            return self.description
+        if key == 'table_data':
+            return Rows(self)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        """Get the table_description or table_data"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        """Get the keys of the PICKLED dictionary"""
+        return ['table_description', 'table_data']
+
+    def items(self):
+        """Get the items of the PICKLED dictionary"""
+        return [(key, self[key]) for key in self.keys()]
+
+    def __contains__(self, key):
+        return key in ('table_description', 'table_data')
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return 2
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return False
+        return dict(self.items()) == dict(other.items())
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (Table, (self.description, self.columns, self.length))
+
+    def __repr__(self):
+        return "<Table of %s rows and %s columns>" % (
+            self.length, len(self.columns))
+
+Mapping.register(Table)
+
+
+class Rows(object):
+    """The rows of a Table, as views onto its columns"""
+
+    __slots__ = ('table',)
+
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return self.table.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[row] for row in xrange(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        return Row(self.table.columns, index)
+
+    def __iter__(self):
+        columns = self.table.columns
+        for index in xrange(0, self.table.length):
+            yield Row(columns, index)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, tuple, Rows)):
+            return False
+        return len(self) == len(other) and all(
+            row == other_row for row, other_row in zip(self, other))
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Copies and pickles are made of the rows as lists
+        return (list, (self.table.rows(),))
+
+    def __repr__(self):
+        return repr(self.table.rows())
+
+Sequence.register(Rows)
+
+
+class Row(object):
+    """A row of a Table, read from its columns"""
+
+    __slots__ = ('columns', 'index')
+
+    def __init__(self, columns, index):
+        self.columns = columns
+        self.index = index
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __getitem__(self, column):
+        if isinstance(column, slice):
+            return [values[self.index] for values in self.columns[column]]
+        return self.columns[column][self.index]
+
+    def __iter__(self):
+        index = self.index
+        for values in self.columns:
+            yield values[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, tuple, Row)):
+            return False
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Copies and pickles are made of the row as a list
+        return (list, (list(self),))
+
+    def __repr__(self):
+        return repr(list(self))
+
+Sequence.register(Row)
@@ -0,0 +1,91 @@
+import sys
+import json
+import cPickle
+import unittest
+from raisin.box import boxes
+from raisin.box.batch import augment_many
+from raisin.box.batch import decode
+from raisin.box.binary import encode
+from raisin.box.config import PICKLED
+from raisin.box.counters import DECODING
+from raisin.box.counters import get_avoided
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.get_lines = boxes._get_lines
+        self.calls = []
+
+        def get_lines(box):
+            self.calls.append(box)
+            return self.get_lines(box)
+        boxes._get_lines = get_lines
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        boxes._get_lines = self.get_lines
+
+    def test_augment_many(self):
+        description = [('Project Description', 'string'),
+                       ('Species', 'string')]
+        table = {'table_description': description,
+                 'table_data': [['About the project', 'Homo sapiens']]}
+        payload = cPickle.dumps(table)
+        tab = [('project_about', {PICKLED: payload, 'title': 'About'}),
+               ('project_meta', {PICKLED: payload, 'title': 'Meta'}),
+               ('unknown', {'title': 'Unknown'})]
+        results, timings = augment_many(None, tab)
+        about = results['project_about']
+        meta = results['project_meta']
+        self.failUnless(about['description'] == 'About the project')
+        self.failUnless(meta['description'] == [{'Species': 'Homo sapiens'}])
+        self.failUnless(results['unknown'] == {'title': 'Unknown'})
+        self.failUnless(about[PICKLED] is meta[PICKLED])
+        self.failUnless(len(self.calls) == 1)
+        self.failUnless(sorted(timings) == sorted(results))
+        self.failUnless(min(timings.values()) >= 0)
+        # Outside of a batch, the lines are read each time
+        boxes.get_lines(about)
+        boxes.get_lines(about)
+        self.failUnless(len(self.calls) == 3)
+
+    def test_lazy_decoding(self):
+        DECODING.reset()
+        table = {'table_description': [('Reads', 'number')],
+                 'table_data': [[1], [2]]}
+        pickled = decode({PICKLED: cPickle.dumps(table)})
+        binary = decode({PICKLED: encode(table)})
+        self.failUnless(DECODING.snapshot() == {'resources': 2,
+                                                'unpickled': 1})
+        self.failUnless(len(binary[PICKLED]['table_description']) == 1)
+        self.failUnless(get_avoided() == 1)
+        self.failUnless(type(pickled[PICKLED]) is dict)
+        self.failUnless(pickled[PICKLED] == table)
+        # The boxes can be given to json as they are
+        json.dumps(pickled)
+        self.failUnless(binary[PICKLED]['table_data'] == [[1], [2]])
+        self.failUnless(DECODING.snapshot() == {'resources': 2,
+                                                'unpickled': 1,
+                                                'tables_read': 1,
+                                                'columns_read': 1})
+        self.failUnless(get_avoided() == 0)
+        decode(pickled)
+        self.failUnless(DECODING.get('resources') == 2)
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(BatchTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,121 @@
+import sys
+import copy
+import cPickle
+import unittest
+from raisin.box import boxes
+from raisin.box.batch import decode
+from raisin.box.binary import BinaryTable
+from raisin.box.binary import encode
+from raisin.box.binary import is_binary
+from raisin.box.config import PICKLED
+
+
+class BinaryTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.table = {
+            'table_description': [('Gene', 'string'),
+                                  ('Label', 'string', u'Label \xe9'),
+                                  ['RPKM', 'number'],
+                                  ('Reads', 'number'),
+                                  ('Expressed', 'boolean'),
+                                  'Note'],
+            'table_data': [['ENSG01', u'\xe9t\xe9', 1.5, 10, True, ''],
+                           ['ENSG02', None, 2, -3, False, 'a,b'],
+                           ['ENSG03', u'', None, None, None, None]]}
+
+    def test_round_trip(self):
+        content = encode(self.table)
+        self.failUnless(is_binary(content))
+        table = BinaryTable(content)
+        self.failUnless(table == self.table)
+        for index, column in enumerate(self.table['table_description']):
+            self.failUnless(type(table['table_description'][index]) is
+                            type(column))
+        for expected, row in zip(self.table['table_data'],
+                                 table['table_data']):
+            self.failUnless([type(value) for value in row] ==
+                            [type(value) for value in expected])
+
+    def test_lazy(self):
+        table = BinaryTable(encode(self.table))
+        self.failUnless(table.column(3) == [10, -3, None])
+        self.failUnless(table.row(1) == self.table['table_data'][1])
+        table = BinaryTable(encode(self.table))
+        for index, expected in enumerate(self.table['table_data']):
+            row = table.row(index)
+            self.failUnless(row == expected)
+            self.failUnless([type(value) for value in row] ==
+                            [type(value) for value in expected])
+        self.assertRaises(IndexError, table.row, 3)
+        self.failUnless(table._columns == [None] * 6)
+        self.failUnless(table._data is None)
+        self.failUnless(len(table['table_description']) == 6)
+        self.failUnless(table._columns == [None] * 6)
+
+    def test_unsupported(self):
+        for table in ({'table_description': [('Date', 'date')],
+                       'table_data': [[None]]},
+                      {'table_description': [('RPKM', 'number')],
+                       'table_data': [[(1.5, '1.50')]]},
+                      {'table_description': [('Name', 'string')],
+                       'table_data': [['a'], [u'b']]},
+                      {'table_description': [('Name', 'string')],
+                       'table_data': [['a', 'b']]},
+                      {'table_description': [('Reads', 'number')],
+                       'table_data': [[2 ** 64]]},
+                      {'species': 'Homo sapiens'}):
+            self.assertRaises(ValueError, encode, table)
+        self.assertRaises(ValueError, BinaryTable, cPickle.dumps(self.table))
+
+    def test_corrupted(self):
+        content = encode(self.table)
+        # Every truncation is found, when decoding or reading the columns
+        for length in range(3, len(content)):
+            try:
+                table = BinaryTable(content[:length])
+                for index in range(0, len(table['table_description'])):
+                    table.column(index)
+            except ValueError:
+                pass
+            else:
+                self.fail("Truncated to %s bytes not found" % length)
+        # The strings can not go past the block
+        table = BinaryTable(content)
+        kind, flags, start, end = table.layout[0]
+        offsets = start + 4 * table.rows
+        corrupted = (content[:offsets] + '\xff\xff\xff\x00' +
+                     content[offsets + 4:])
+        self.assertRaises(ValueError, BinaryTable(corrupted).column, 0)
+
+    def test_decode(self):
+        content = encode(self.table)
+        first = decode({PICKLED: content}, {})
+        self.failUnless(isinstance(first[PICKLED], BinaryTable))
+        # The first line is read without the rows of the whole table
+        lines = boxes.get_lines(first)
+        self.failUnless(first[PICKLED]._data is None)
+        self.failUnless(first[PICKLED]._columns == [None] * 6)
+        pickled = decode({PICKLED: cPickle.dumps(self.table)})
+        self.failUnless(first[PICKLED] == pickled[PICKLED])
+        self.failUnless(lines == boxes.get_lines(pickled))
+        self.failUnless(cPickle.loads(cPickle.dumps(first[PICKLED])) ==
+                        self.table)
+        self.failUnless(copy.deepcopy(first[PICKLED]) == self.table)
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(BinaryTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
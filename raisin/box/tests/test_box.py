@@ -1,4 +1,5 @@
 import sys
+import datetime
 import unittest
 from raisin.box import boxes
 from raisin.box.config import PICKLED
@@ -20,6 +21,67 @@ class BoxTest(unittest.TestCase):
         javascript = 'thousandsformatter.format(data, 1);\n'
         self.failUnless(box['javascript'] == javascript)
 
+    def test_get_lines(self):
+        day = datetime.datetime(2012, 10, 9, 8, 7, 6)
+        description = [('Species', 'string'),
+                       ('Reads', 'number'),
+                       ('Paired', 'boolean'),
+                       ('Date', 'date'),
+                       ('Time', 'timeofday'),
+                       ('Created', 'datetime'),
+                       ('Description', 'string', 'Project Description')]
+        rows = [['Homo sapiens', 42, True, day, day, day, 'About'],
+                [u'\xe9', 0.1 + 0.2, 0, (day, 'Oct'), None, None, ' a, b'],
+                ['  x', (3, '3'), None, None, None, None, 'a\r\nb'],
+                ['Homo sapiens']]
+        for row in rows:
+            box = {PICKLED: {'table_description': description,
+                             'table_data': [row]}}
+            self.failUnless(boxes.get_lines(box) == boxes._get_csv_lines(box))
+        box = {PICKLED: {'table_description': description, 'table_data': []}}
+        self.failUnless(boxes.get_lines(box) == {})
+
+    def test_read_distribution(self):
+        data = [['R2', 'L1', 100, 1, 5],
+                ['R1', 'L2', 0, 1, 5],
+                ['R1', 'L2', 100, 1, 5],
+                ['R1', 'L1', 0, 1, 5],
+                ['R1', 'L2', 1, 1, 5]]
+        box = {PICKLED: {'table_data': data}}
+        boxes._read_distribution(None, box, 'lane')
+        javascript = box['javascript']
+        html = javascript[:javascript.index("</table>'") + 9]
+        self.failUnless(html.startswith("document.getElementById("
+                                        "'lane_read_distribution_div')"))
+        self.failUnless(html.count('<tr') == 4)
+        self.failUnless('>1 - 99</td>' in html)
+        self.failUnless('>100 - n</td>' in html)
+        self.failUnless('>R1 / L2</td>' in html)
+        self.failUnless('read_distribution_2_2_div' in html)
+        self.failIf('read_distribution_3_0_div' in html)
+        self.failUnless(javascript.count('ImageSparkLine') == 9)
+        view = ("{column: 0, value: 'R2'}, {column: 1, value: 'L1'}, "
+                "{column: 2, value: 100}]))\nview.setColumns([4])\n"
+                "var chart = new google.visualization.ImageSparkLine("
+                "document.getElementById('read_distribution_2_2_div'));")
+        self.failUnless(view in javascript)
+
+    def test_read_distribution_sliced(self):
+        data = [['R1', 'L1', 0, 1, 5],
+                ['R1', 'L1', 100, 1, 7],
+                ['R1', 'L1', 0, 2, 6],
+                ['R1', 'L2', 0, 1, 2.5]]
+        box = {PICKLED: {'table_data': data}, 'sparklines': 'sliced'}
+        boxes._read_distribution(None, box, 'lane')
+        javascript = box['javascript']
+        self.failIf('getFilteredRows' in javascript)
+        self.failUnless(javascript.count('ImageSparkLine') == 1)
+        draw = ("drawReadDistribution('read_distribution_0_0_div', [5,6]);\n"
+                "drawReadDistribution('read_distribution_0_1_div', [7]);\n"
+                "drawReadDistribution('read_distribution_1_0_div', [2.5]);\n"
+                "drawReadDistribution('read_distribution_1_1_div', []);\n")
+        self.failUnless(javascript.endswith(draw))
+
 
 # make the test suite.
 def suite():
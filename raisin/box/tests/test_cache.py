@@ -0,0 +1,111 @@
+import sys
+import cPickle
+import unittest
+from configobj import Section
+from raisin.box import BOXES
+from raisin.box.cache import AugmentCache
+from raisin.box.config import JSON
+from raisin.box.config import PICKLED
+
+
+def make_box(reads):
+    """Make a percentage of reads with ambiguous bases box"""
+    table = {'table_description': [('Lane', 'string'), ('Reads', 'number')],
+             'table_data': [['Lane %s' % lane, lane] for lane in range(reads)]}
+    return {JSON: '{"rows": %s}' % reads,
+            PICKLED: cPickle.dumps(table),
+            'title': 'Reads',
+            'chartoptions': {'width': '900'}}
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.name = 'lane_percentage_of_reads_with_ambiguous_bases'
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def test_augment(self):
+        cache = AugmentCache()
+        first = cache.augment(None, self.name, make_box(5), project='P1')
+        self.failUnless(first['chartoptions']['height'] == '300')
+        self.failUnless(first[PICKLED]['table_data'][0] == ['Lane 0', 0])
+        second = cache.augment(None, self.name, make_box(5), project='P1')
+        self.failUnless(second == first)
+        self.failIf(second['chartoptions'] is first['chartoptions'])
+        cache.augment(None, self.name, make_box(6), project='P2')
+        stats = cache.stats()
+        self.failUnless(stats['hits'] == 1)
+        self.failUnless(stats['misses'] == 2)
+        self.failUnless(stats['entries'] == 2)
+        self.failUnless(cache.invalidate('P1') == 1)
+        self.failUnless(len(cache) == 1)
+        cache.augment(None, self.name, make_box(5), project='P1')
+        self.failUnless(cache.stats()['misses'] == 3)
+
+    def test_sections(self):
+        cache = AugmentCache()
+        box = make_box(5)
+        box.update(BOXES[self.name])
+        self.failUnless(isinstance(box['chartoptions'], Section))
+        first = cache.augment(None, self.name, box)
+        # Only the changes are kept, not the whole of boxes.ini
+        self.failUnless(cache.size < 1000, cache.size)
+        box = make_box(5)
+        box.update(BOXES[self.name])
+        second = cache.augment(None, self.name, box)
+        self.failUnless(cache.stats()['hits'] == 1)
+        self.failUnless(type(second['chartoptions']) is dict)
+        self.failUnless(second['chartoptions'] == first['chartoptions'])
+
+    def test_resources(self):
+        cache = AugmentCache()
+        name = 'lane_top_genes'
+        table = {'table_description': [('Gene', 'string'),
+                                       ('RPKM', 'number')],
+                 'table_data': [['G%s' % row, float(row)]
+                                for row in range(0, 100)]}
+        augmented = []
+        for index in range(0, 2):
+            box = BOXES[name].dict()
+            box[PICKLED] = cPickle.dumps(table)
+            box[JSON] = '{"rows": 100}'
+            augmented.append(cache.augment(None, name, box))
+        self.failUnless(cache.stats()['hits'] == 1)
+        first, second = augmented
+        # The top rows replace the resources, also when cached
+        self.failUnless(len(first[PICKLED]['table_data']) == 20)
+        self.failUnless(second[PICKLED] == first[PICKLED])
+        self.failUnless(second[JSON] == first[JSON])
+        self.failIf(second[JSON] == '{"rows": 100}')
+
+    def test_eviction(self):
+        cache = AugmentCache(max_entries=2)
+        for reads in (1, 2, 1, 3):
+            cache.augment(None, self.name, make_box(reads))
+        self.failUnless(cache.stats()['evictions'] == 1)
+        # The box with 2 reads was the least recently used
+        cache.augment(None, self.name, make_box(1))
+        cache.augment(None, self.name, make_box(2))
+        self.failUnless(cache.stats()['hits'] == 2)
+        cache = AugmentCache(max_size=0)
+        cache.augment(None, self.name, make_box(1))
+        self.failUnless(len(cache) == 0)
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(CacheTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,126 @@
+import sys
+import time
+import socket
+import unittest
+import threading
+import SocketServer
+import BaseHTTPServer
+from raisin.box.client import ConnectionPool
+from raisin.box.client import ResourceClient
+from raisin.box.client import ResourceError
+from raisin.box.config import PICKLED
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Stand in for the backend, answering with the path and Accept header"""
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_GET(self):
+        if self.path.startswith('/slow'):
+            time.sleep(0.5)
+        if self.path.startswith('/missing'):
+            self.send_response(404)
+            content = ''
+        else:
+            self.send_response(200)
+            content = "%s %s" % (self.path, self.headers['Accept'])
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    connections = 0
+
+    def handle_error(self, request, client_address):
+        # The client gave up waiting for the slow resource
+        pass
+
+
+class ClientTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.setDaemon(True)
+        self.thread.start()
+        base = 'http://127.0.0.1:%s' % self.server.server_port
+        self.resources = {
+            'project_info': {'uri': base + '/project/%(project_name)s'},
+            'missing': {'uri': base + '/missing'},
+            'slow': {'uri': base + '/slow'}}
+        self.client = ResourceClient(pool_size=2,
+                                     timeout=5,
+                                     resources=self.resources)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_fetch(self):
+        for project_name in ('P1', 'P2', 'P3'):
+            content = self.client.fetch('project_info',
+                                        {'project_name': project_name},
+                                        PICKLED)
+            expected = '/project/%s %s' % (project_name, PICKLED)
+            self.failUnless(content == expected)
+        # All requests went over the same connection
+        self.failUnless(self.server.connections == 1)
+        self.assertRaises(KeyError, self.client.fetch, 'project_info', {})
+        self.assertRaises(ResourceError, self.client.fetch, 'missing', {})
+
+    def test_timeout(self):
+        self.assertRaises(socket.timeout,
+                          self.client.fetch, 'slow', {}, timeout=0.1)
+        self.failUnless(self.client.fetch('slow', {}).startswith('/slow'))
+
+    def test_reconnect(self):
+        self.client.fetch('project_info', {'project_name': 'P1'})
+        # The server closes the idle connection
+        pool = self.client.get_pool('127.0.0.1', self.server.server_port)
+        for connection in pool._idle:
+            connection.sock.shutdown(socket.SHUT_RDWR)
+        content = self.client.fetch('project_info', {'project_name': 'P2'})
+        self.failUnless(content.startswith('/project/P2'))
+        self.failUnless(pool.created == 2)
+
+    def test_release(self):
+        pool = ConnectionPool('127.0.0.1', self.server.server_port, size=1,
+                              timeout=5)
+        # Headers that are not a dictionary fail in httplib
+        for index in range(0, 3):
+            self.assertRaises(TypeError, pool.request, '/project/P1', 1)
+            # The connection was given back
+            self.failUnless(pool._available.acquire(False))
+            pool._available.release()
+        status, reason, content = pool.request('/project/P1',
+                                               {'Accept': PICKLED})
+        self.failUnless(status == 200)
+        pool.close()
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(ClientTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,82 @@
+import sys
+import unittest
+from raisin.box import RESOURCES_REGISTRY
+from raisin.box.config import PICKLED
+from raisin.box.codegen import SNIPPETS
+from raisin.box.codegen import SnippetCache
+
+
+class CodegenTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        SNIPPETS.clear()
+        SNIPPETS.reset()
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def test_cache(self):
+        cache = SnippetCache(max_entries=2)
+        calls = []
+
+        def generate(column_number):
+            calls.append(column_number)
+            return str(range(column_number))
+        self.failUnless(cache.get(('columns', 2), generate, 2) == '[0, 1]')
+        self.failUnless(cache.get(('columns', 2), generate, 2) == '[0, 1]')
+        cache.get(('columns', 3), generate, 3)
+        cache.get(('columns', 4), generate, 4)
+        cache.get(('columns', 2), generate, 2)
+        self.failUnless(calls == [2, 3, 4, 2])
+        stats = cache.stats()
+        self.failUnless(stats['entries'] == 2)
+        self.failUnless(stats['hits'] == 1)
+        self.failUnless(stats['misses'] == 4)
+        self.failUnless(stats['evictions'] == 2)
+        self.failUnless(stats['hit_rate'] == 0.2)
+        cache.reset()
+        self.failUnless(cache.stats()['hit_rate'] == 0.0)
+
+    def test_augmenters(self):
+        description = [('id', 'string'), ('reads', 'number'),
+                       ('label', 'string'), ('genes', 'number')]
+        table = {'table_description': description, 'table_data': []}
+        top_genes = RESOURCES_REGISTRY.method('lane_top_genes')
+        for index in range(0, 3):
+            box = {PICKLED: table, 'javascript': 'var x;\n', 'title': 'Top'}
+            top_genes(None, box)
+            self.failUnless(box['javascript'] == (
+                'var x;\n'
+                'thousandsformatter.format(data, 1);\n'
+                'thousandsformatter.format(data, 3);\n'))
+        detected_genes = RESOURCES_REGISTRY.method('lane_detected_genes')
+        box = {PICKLED: table, 'title': 'Detected'}
+        detected_genes(None, box)
+        self.failUnless(box['javascript'] == (
+            'thousandsformatter.format(data, 1);\n'
+            'thousandsformatter.format(data, 2);\n'
+            'thousandsformatter.format(data, 3);\n'))
+        experiments = RESOURCES_REGISTRY.method('project_experimentstable')
+        box = {PICKLED: table, 'title': 'Experiments'}
+        experiments(None, box)
+        self.failUnless("label:'Experiment'},3]);" in box['javascript'])
+        stats = SNIPPETS.stats()
+        self.failUnless(stats['misses'] == 3)
+        self.failUnless(stats['hits'] == 2)
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(CodegenTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,113 @@
+import sys
+import math
+import random
+import unittest
+from raisin.box import BOXES
+from raisin.box import RESOURCES_REGISTRY
+from raisin.box.config import JSON
+from raisin.box.config import PICKLED
+from raisin.box.downsample import downsample
+from raisin.box.downsample import is_log_scale
+from raisin.box.downsample import lttb
+from raisin.box.gviz import to_json
+
+
+class DownsampleTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        generator = random.Random(1)
+        self.data = [[float(x), generator.random(), None]
+                     for x in range(0, 5000)]
+        self.data.extend([[x + 0.5, None, math.sin(x / 100.0) + 2]
+                          for x in range(0, 5000)])
+        # An outlier of the first series
+        self.data[1234][1] = 50.0
+        description = [('x', 'number'),
+                       ('lane1', 'number'),
+                       ('lane2', 'number')]
+        self.table = {'table_description': description,
+                      'table_data': self.data}
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def test_lttb(self):
+        xs = range(0, 100)
+        ys = [0] * 100
+        ys[50] = 10
+        kept = lttb(xs, ys, 10)
+        self.failUnless(len(kept) == 10)
+        self.failUnless(kept[0] == 0 and kept[-1] == 99)
+        self.failUnless(50 in kept)
+        self.failUnless(kept == sorted(kept))
+        self.failUnless(lttb(xs, ys, 200) == xs)
+
+    def test_downsample(self):
+        table = downsample(self.table, 1000)
+        data = table['table_data']
+        first = [row for row in data if row[1] is not None]
+        second = [row for row in data if row[2] is not None]
+        self.failUnless(500 <= len(first) <= 502)
+        self.failUnless(500 <= len(second) <= 502)
+        self.failUnless(self.data[1234] in data)
+        self.failUnless(data[0] == self.data[0])
+        self.failUnless(table['table_description'] ==
+                        self.table['table_description'])
+        self.failUnless(downsample(self.table, 20000) is self.table)
+
+    def test_formatted(self):
+        data = [[(float(x), str(x)), (x % 3, 'low')] for x in range(0, 300)]
+        data.append([(300.0, '300'), (0, '0')])
+        data.append([(301.0, '301'), (9, 'high')])
+        table = {'table_description': [('x', 'number'), ('y', 'number')],
+                 'table_data': data}
+        data = downsample(table, 30)['table_data']
+        self.failUnless(len(data) <= 32)
+        self.failUnless([(301.0, '301'), (9, 'high')] in data)
+
+    def test_log_scale(self):
+        self.failUnless(is_log_scale("{minValue:'0', logScale: true}"))
+        self.failIf(is_log_scale("{minValue:'0'}"))
+        data = [[float(x), 10 ** (x % 7)] for x in range(1, 1000)]
+        data.append([1000.0, 0])
+        table = {'table_description': [('x', 'number'), ('y', 'number')],
+                 'table_data': data}
+        linear = downsample(table, 100)['table_data']
+        log = downsample(table, 100, log_x=True, log_y=True)['table_data']
+        self.failUnless(len(log) <= 102)
+        self.failUnless([1000.0, 0] in log)
+        # On a linear scale the small values hardly show
+        self.failUnless(len([row for row in log if row[1] < 100]) >
+                        len([row for row in linear if row[1] < 100]))
+
+    def test_boxes(self):
+        name = 'lane_gene_expression_profile'
+        box = BOXES[name].dict()
+        box[PICKLED] = self.table
+        box[JSON] = to_json(self.table)
+        RESOURCES_REGISTRY.method(name)(None, box)
+        self.failUnless(len(box[PICKLED]['table_data']) <= 2010)
+        self.failUnless(box[JSON] == to_json(box[PICKLED]))
+        self.failUnless(RESOURCES_REGISTRY.formats(name) == (JSON, PICKLED))
+        box = BOXES[name].dict()
+        del box['maxpoints']
+        box[PICKLED] = self.table
+        RESOURCES_REGISTRY.method(name)(None, box)
+        self.failUnless(box[PICKLED] is self.table)
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(DownsampleTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,190 @@
+import sys
+import time
+import cPickle
+import unittest
+import threading
+import SocketServer
+import BaseHTTPServer
+from gvizapi import gviz_api
+from raisin.box.binary import BinaryTable
+from raisin.box.binary import encode
+from raisin.box.client import ResourceClient
+from raisin.box.config import JSON
+from raisin.box.config import PICKLED
+from raisin.box.config import TABLE
+from raisin.box.fetcher import PageFetcher
+from raisin.box.uris import MissingParameters
+
+# The delay of each resource of the stub backend
+DELAYS = {'project_about': 0.3,
+          'project_meta': 0.2,
+          'project_experimentstable': 0.1,
+          'experiment_read_summary': 0.1,
+          'lane_read_summary': 0.1,
+          'replicate_read_summary': 0.1}
+
+
+def make_table(name):
+    """Make the table of a resource of the stub backend"""
+    return {'table_description': [('Project Description', 'string'),
+                                  ('Species', 'string')],
+            'table_data': [['About %s' % name, 'Homo sapiens']]}
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Stub backend answering after the delay of the resource"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        name, project_name = self.path.split('/')[1:3]
+        self.server.requests.append((name, self.headers['Accept']))
+        time.sleep(DELAYS[name])
+        table = make_table(name)
+        # The projects without table
+        if project_name == 'None':
+            table = None
+        elif project_name == 'Empty':
+            table = {}
+        if self.headers['Accept'].startswith(TABLE):
+            content = encode(table)
+        elif self.headers['Accept'] == PICKLED:
+            content = cPickle.dumps(table)
+        else:
+            content = '{"name": "%s"}' % name
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args):
+        BaseHTTPServer.HTTPServer.__init__(self, *args)
+        self.requests = []
+
+
+class FetcherTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.setDaemon(True)
+        self.thread.start()
+        base = 'http://127.0.0.1:%s' % self.server.server_port
+        resources = {}
+        for name in DELAYS:
+            uri = '%s/%s/%%(project_name)s' % (base, name)
+            resources[name] = {'uri': uri}
+        self.client = ResourceClient(resources=resources)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_fetch(self):
+        fetcher = PageFetcher(self.client, concurrency=8)
+        start = time.time()
+        results = fetcher.fetch(DELAYS.keys(), {'project_name': 'P1'})
+        duration = time.time() - start
+        self.failUnless(sorted(results) == fetcher.get_requests(DELAYS))
+        self.failUnless(results[('lane_read_summary', JSON)] ==
+                        '{"name": "lane_read_summary"}')
+        # Only as slow as the slowest resource, not as all of them together
+        self.failUnless(duration < 0.6, duration)
+        self.assertRaises(KeyError, fetcher.fetch, ['project_about'], {})
+
+    def test_missing_parameters(self):
+        fetcher = PageFetcher(self.client)
+        try:
+            fetcher.fetch(['project_about', 'project_meta'], {})
+        except MissingParameters, error:
+            self.failUnless(error.missing ==
+                            {'project_about': set(['project_name']),
+                             'project_meta': set(['project_name'])})
+        else:
+            self.fail("Missing parameters not reported")
+        self.failUnless(self.server.requests == [])
+
+    def test_concurrency(self):
+        fetcher = PageFetcher(self.client, concurrency=1)
+        start = time.time()
+        fetcher.fetch(['project_about', 'project_meta'],
+                      {'project_name': 'P1'})
+        self.failUnless(time.time() - start >= 0.5)
+
+    def test_augment(self):
+        fetcher = PageFetcher(self.client)
+        boxes = {'project_about': {'title': 'About'},
+                 'lane_read_summary': {'title': 'Reads'}}
+        results, timings = fetcher.augment(None, boxes, {'project_name': 'P1'})
+        about = results['project_about']
+        self.failUnless(about['description'] == 'About project_about')
+        self.failUnless(results['lane_read_summary'][JSON] ==
+                        '{"name": "lane_read_summary"}')
+        self.failUnless(sorted(timings) == sorted(boxes))
+
+    def test_derive_json(self):
+        fetcher = PageFetcher(self.client)
+        name = 'project_experimentstable'
+        self.failUnless(fetcher.get_requests([name]) == [(name, PICKLED)])
+        results, timings = fetcher.augment(None, {name: {'title': 'Table'}},
+                                           {'project_name': 'P1'})
+        self.failUnless(self.server.requests == [(name, PICKLED)])
+        box = results[name]
+        table = make_table(name)
+        expected = gviz_api.DataTable(table['table_description'],
+                                      table['table_data']).ToJSon()
+        self.failUnless(box[JSON] == expected)
+        self.failUnless('makeExperimentLink' in box['javascript'])
+        fetcher = PageFetcher(self.client, derive_json=False)
+        self.failUnless(fetcher.get_requests([name]) == [(name, JSON),
+                                                         (name, PICKLED)])
+
+    def test_derive_json_empty(self):
+        fetcher = PageFetcher(self.client)
+        name = 'project_experimentstable'
+        for project_name in ('None', 'Empty'):
+            del self.server.requests[:]
+            results, timings = fetcher.augment(None,
+                                               {name: {'title': 'Table'}},
+                                               {'project_name': project_name})
+            # The JSON is fetched when there is no table to make it from
+            self.failUnless(self.server.requests == [(name, PICKLED),
+                                                     (name, JSON)])
+            self.failUnless(results[name][JSON] ==
+                            '{"name": "project_experimentstable"}')
+
+    def test_binary_tables(self):
+        fetcher = PageFetcher(self.client, binary_tables=True)
+        name = 'project_about'
+        results, timings = fetcher.augment(None, {name: {'title': 'About'}},
+                                           {'project_name': 'P1'})
+        self.failUnless(self.server.requests ==
+                        [(name, '%s, %s;q=0.5' % (TABLE, PICKLED))])
+        box = results[name]
+        self.failUnless(isinstance(box[PICKLED], BinaryTable))
+        self.failUnless(box['description'] == 'About project_about')
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(FetcherTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
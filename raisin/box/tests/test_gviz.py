@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import sys
+import random
+import decimal
+import datetime
+import unittest
+from gvizapi import gviz_api
+from raisin.box import gviz
+from raisin.box.table import Table
+
+STRINGS = ['', 'a,b', ' x', 'q"u\\o\n\t', '</script>', u'\xe9t\xe9',
+           '\xc3\xa9', u'\U0001f600']
+
+VALUES = {'string': STRINGS + [3, 2.5, True],
+          'number': [0, -1, 2 ** 40, 10 ** 30, 1.5, 0.1 + 0.2, 1e300, -0.0,
+                     float('nan'), float('-inf'), True,
+                     decimal.Decimal('1.25')],
+          'boolean': [True, False, 0, 1, '', 'x'],
+          'date': [datetime.date(2012, 12, 31),
+                   datetime.datetime(2010, 1, 1, 1, 1)],
+          'datetime': [datetime.datetime(2012, 2, 3, 4, 5, 6),
+                       datetime.datetime(2012, 2, 3, 4, 5, 6, 999999)],
+          'timeofday': [datetime.time(23, 59, 58, 10),
+                        datetime.datetime(2012, 1, 1, 3, 4, 5)]}
+
+
+def get_json(function, table):
+    """Get the JSON of a table, or the type of the error raised"""
+    try:
+        return function(table)
+    except Exception, error:
+        return type(error)
+
+
+class GvizTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.random = random.Random(0)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def make_column(self, index):
+        """Make a random column description"""
+        column_type = self.random.choice(sorted(VALUES))
+        column_id = self.random.choice(['c%s' % index, u'c\xe9%s' % index])
+        return self.random.choice([(column_id, column_type),
+                                   (column_id, column_type.upper()),
+                                   (column_id, column_type, 'Label'),
+                                   (column_id, column_type, '\xc3\xa9'),
+                                   (column_id, column_type, 'L',
+                                    {'role': 'annotation'}),
+                                   [column_id, column_type],
+                                   column_id])
+
+    def make_value(self, column):
+        """Make a random value for a column"""
+        column_type = 'string'
+        if isinstance(column, (list, tuple)):
+            column_type = column[1].lower()
+        value = self.random.choice(VALUES[column_type])
+        choice = self.random.random()
+        if choice < 0.1:
+            return None
+        if choice < 0.15:
+            return (value, self.random.choice([None, 'formatted', u'\xe9']))
+        if choice < 0.2:
+            return (value, None, {'style': 'bold'})
+        if choice < 0.22:
+            return self.random.choice(VALUES['date'] + ['x', 1])
+        return value
+
+    def test_fuzz(self):
+        for index in range(0, 1000):
+            description = [self.make_column(column)
+                           for column in range(0, self.random.randint(0, 4))]
+            data = []
+            for row in range(0, self.random.randint(0, 5)):
+                data.append([self.make_value(column)
+                             for column in description])
+                if self.random.random() < 0.1:
+                    data[-1] = data[-1][:self.random.randint(0, 4)]
+            table = {'table_description': description, 'table_data': data}
+            expected = get_json(gviz.gviz_to_json, table)
+            self.failUnless(get_json(gviz.to_json, table) == expected)
+
+    def test_columnar(self):
+        description = [('gene', 'string'), ('RPKM', 'number'),
+                       ('Reads', 'number'), ('Detected', 'boolean')]
+        data = [['ENSG%s' % row, row / 3.0, row, row % 2 == 0]
+                for row in range(0, 100)]
+        table = {'table_description': description, 'table_data': data}
+        expected = gviz_api.DataTable(description, data).ToJSon()
+        self.failUnless(gviz.to_json(table) == expected)
+        self.failUnless(gviz.to_json(Table.from_table(table)) == expected)
+        chunks = list(gviz.iter_json(table))
+        self.failUnless(len(chunks) > 100)
+        self.failUnless(''.join(chunks) == expected)
+
+    def test_unsupported(self):
+        table = {'table_description': {'a': ('number', 'A'), 'b': 'string'},
+                 'table_data': [{'a': 1, 'b': 'x'}]}
+        self.assertRaises(gviz.Unsupported, gviz.iter_json, table)
+        self.failUnless(gviz.to_json(table) == gviz.gviz_to_json(table))
+        table = {'table_description': [('a', 'number')],
+                 'table_data': [['x']]}
+        self.assertRaises(gviz.Unsupported, gviz.iter_json, table)
+        self.assertRaises(gviz_api.DataTableException, gviz.to_json, table)
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(GvizTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,75 @@
+import sys
+import copy
+import pickle
+import unittest
+import subprocess
+from configobj import ConfigObj
+from raisin.box.lazy import LazyProxy
+
+
+def modules_after(statement):
+    """Get the modules loaded after running the statement in a new process"""
+    code = "import sys; %s; print ' '.join(sys.modules)" % statement
+    output = subprocess.Popen([sys.executable, '-c', code],
+                              stdout=subprocess.PIPE).communicate()[0]
+    return output.split()
+
+
+class LazyTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def test_proxy(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return {'a': [1]}
+        proxy = LazyProxy(factory)
+        self.failIf(calls)
+        self.failUnless(isinstance(proxy, dict))
+        self.failUnless(proxy['a'] == [1])
+        self.failUnless(proxy.keys() == ['a'])
+        self.failUnless(copy.deepcopy(proxy) == {'a': [1]})
+        self.failUnless(pickle.loads(pickle.dumps(proxy)) == {'a': [1]})
+        self.failUnless(len(calls) == 1)
+
+    def test_configurations(self):
+        from raisin.box import BOXES
+        from raisin.box import RESOURCES
+        self.failUnless(isinstance(BOXES, ConfigObj))
+        self.failUnless(isinstance(copy.deepcopy(BOXES), ConfigObj))
+        self.failUnless('projects' in BOXES)
+        self.failUnless(RESOURCES['project_info']['uri'].endswith(
+            '/project/%(project_name)s'))
+
+    def test_import(self):
+        modules = modules_after('import raisin.box.config')
+        self.failIf('configobj' in modules)
+        self.failIf('raisin.box.boxes' in modules)
+        modules = modules_after('import raisin.box; raisin.box.BOXES.keys()')
+        self.failUnless('configobj' in modules)
+        self.failIf('raisin.box.boxes' in modules)
+        modules = modules_after('from raisin.box import RESOURCES_REGISTRY; '
+                                'RESOURCES_REGISTRY.get("projects")')
+        self.failUnless('raisin.box.boxes' in modules)
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(LazyTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
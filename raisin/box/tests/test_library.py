@@ -0,0 +1,87 @@
+import os
+import re
+import sys
+import shutil
+import hashlib
+import tempfile
+import unittest
+from raisin.box import boxes
+from raisin.box import library
+from raisin.box import RESOURCES_REGISTRY
+from raisin.box.config import PICKLED
+
+
+class LibraryTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.directory)
+        library.disable()
+
+    def test_write(self):
+        path = library.write(self.directory)
+        self.failUnless(os.path.basename(path) == library.FILENAME)
+        with open(path, 'rb') as library_file:
+            content = library_file.read()
+        self.failUnless(content == library.CONTENT)
+        self.failUnless(hashlib.sha1(content).hexdigest()[:12] in path)
+        self.failUnless(library.write(self.directory) == path)
+        self.failUnless(os.listdir(self.directory) == [library.FILENAME])
+
+    def test_boxes(self):
+        table = {'table_description': [('project_id', 'string')] * 5,
+                 'table_data': []}
+        names = ('project_experimentstable',
+                 'project_experiment_subset',
+                 'project_experiment_subset_selection',
+                 'project_downloads')
+        defined = set([name for name, source in library.FUNCTIONS])
+        for name in names:
+            # The functions are written into the javascript by default
+            box = {PICKLED: table, 'title': 'Table'}
+            RESOURCES_REGISTRY.method(name)(None, box)
+            self.failIf('library' in box)
+            called = set(re.findall(r'calc:(\w+)', box['javascript']))
+            self.failUnless(called and called <= defined)
+            for function in called:
+                self.failUnless('function %s(' % function in box['javascript'])
+            library.enable()
+            box = {PICKLED: table, 'title': 'Table'}
+            RESOURCES_REGISTRY.method(name)(None, box)
+            self.failUnless(box['library'] == library.FILENAME)
+            self.failIf('function' in box['javascript'])
+            library.disable()
+
+    def test_read_distribution(self):
+        data = [['R1', 'L1', 0, 1, 5]]
+        library.enable()
+        box = {PICKLED: {'table_data': data}, 'sparklines': 'sliced'}
+        boxes._read_distribution(None, box, 'lane')
+        self.failUnless(box['library'] == library.FILENAME)
+        self.failIf('function drawReadDistribution' in box['javascript'])
+        self.failUnless("drawReadDistribution('read_distribution_0_0_div', "
+                        "[5]);" in box['javascript'])
+        # The filtered sparklines do not call the library
+        box = {PICKLED: {'table_data': data}}
+        boxes._read_distribution(None, box, 'lane')
+        self.failIf('library' in box)
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(LibraryTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,55 @@
+import sys
+import unittest
+from raisin.box.lru import LruDict
+
+
+class LruDictTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.entries = LruDict()
+        for key in ('a', 'b', 'c'):
+            self.entries[key] = key.upper()
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def test_order(self):
+        entries = self.entries
+        self.failUnless(list(entries) == ['a', 'b', 'c'])
+        self.failUnless(entries.get('a') == 'A')
+        self.failUnless(entries.get('missing') is None)
+        entries['b'] = 'B2'
+        self.failUnless(list(entries) == ['c', 'a', 'b'])
+        self.failUnless(entries['c'] == 'C')
+        self.failUnless(list(entries) == ['a', 'b', 'c'])
+        self.failUnless(entries.popitem() == ('a', 'A'))
+        self.failUnless(entries.pop('c') == 'C')
+        self.failUnless(entries.pop('c', 0) == 0)
+        self.failUnless(len(entries) == 1 and 'b' in entries)
+        del entries['b']
+        self.assertRaises(KeyError, entries.popitem)
+        self.assertRaises(KeyError, entries.__getitem__, 'b')
+
+    def test_clear(self):
+        self.entries.clear()
+        self.failUnless(len(self.entries) == 0)
+        self.failUnless(list(self.entries) == [])
+        self.entries['d'] = 'D'
+        self.failUnless(list(self.entries) == ['d'])
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(LruDictTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
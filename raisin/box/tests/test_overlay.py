@@ -0,0 +1,82 @@
+import sys
+import copy
+import cPickle
+import unittest
+from raisin.box import BOXES
+from raisin.box import RESOURCES_REGISTRY
+from raisin.box.config import JSON
+from raisin.box.config import PICKLED
+from raisin.box.overlay import BoxOverlay
+from raisin.box.overlay import DELETED
+from raisin.box.overlay import freeze
+from raisin.box.overlay import new_box
+
+
+class OverlayTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.base = freeze({'title': 'Reads',
+                            'chartoptions': {'width': '600'},
+                            'columns': ['a', 'b']})
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def test_overlay(self):
+        box = BoxOverlay(self.base)
+        box['chartoptions']['title'] = box['title']
+        box['columns'].append('c')
+        box['javascript'] = ''
+        box['javascript'] += 'draw();'
+        del box['title']
+        self.failUnless(box == {'chartoptions': {'width': '600',
+                                                 'title': 'Reads'},
+                                'columns': ['a', 'b', 'c'],
+                                'javascript': 'draw();'})
+        self.failUnless(self.base == {'title': 'Reads',
+                                      'chartoptions': {'width': '600'},
+                                      'columns': ('a', 'b')})
+        self.failUnless(BoxOverlay(self.base)['columns'] == ['a', 'b'])
+        self.failUnless(box.changes() == {'chartoptions': {'width': '600',
+                                                           'title': 'Reads'},
+                                          'columns': ['a', 'b', 'c'],
+                                          'javascript': 'draw();',
+                                          'title': DELETED})
+        self.failUnless(type(copy.deepcopy(box)) is dict)
+        self.failUnless(cPickle.loads(cPickle.dumps(box, 2)) == box)
+        self.assertRaises(TypeError, self.base.__setitem__, 'title', 'x')
+        self.assertRaises(TypeError, self.base['chartoptions'].update, {})
+
+    def test_augmenters(self):
+        data = [['R1', 'L1', 0, 1, 5], ['R1', 'L1', 100, 1, 7]]
+        for name in ('lane_merged_mapped_reads', 'lane_read_distribution',
+                     'project_experimentstable'):
+            resources = {JSON: '{}',
+                         PICKLED: {'table_description': [('a', 'string')] * 5,
+                                   'table_data': data}}
+            expected = copy.deepcopy(BOXES[name].dict())
+            expected.update(resources)
+            RESOURCES_REGISTRY.method(name)(None, expected)
+            for index in range(0, 2):
+                box = new_box(name)
+                box.update(resources)
+                RESOURCES_REGISTRY.method(name)(None, box)
+                self.failUnless(box.to_dict() == expected)
+            self.failUnless(new_box(name).to_dict() == BOXES[name].dict())
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(OverlayTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
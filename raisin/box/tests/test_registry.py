@@ -0,0 +1,143 @@
+import os
+import sys
+import types
+import shutil
+import tempfile
+import unittest
+import threading
+from raisin.box import RESOURCES_REGISTRY
+from raisin.box.config import JSON
+from raisin.box.config import PICKLED
+from raisin.box.boxes import augment
+from raisin.box.registry import Registry
+
+
+def first(context, box):
+    return box
+
+
+def second(context, box):
+    return box
+
+# Module registering a method, slowly, failing the first time
+REGISTERING = """
+import time
+import registry_target
+registry_target.attempts += 1
+if registry_target.attempts == 1:
+    raise ImportError('first attempt')
+time.sleep(0.1)
+registry_target.registry.append(('slow', registry_target.method,
+                                 registry_target.formats))
+"""
+
+
+class RegistryTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.directory = tempfile.mkdtemp()
+        sys.path.insert(0, self.directory)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        sys.path.remove(self.directory)
+        shutil.rmtree(self.directory)
+        for name in ('registry_target', 'registering'):
+            sys.modules.pop(name, None)
+
+    def test_lookup(self):
+        registry = Registry()
+        registry.append(('box', first, (JSON,)))
+        registry.append(('other', second, (JSON, PICKLED)))
+        registry.append(('box', second, (PICKLED,)))
+        self.failUnless(registry.method('box') is first)
+        self.failUnless(registry.formats('box') == (JSON, PICKLED))
+        self.failUnless(registry.get('box') == ('box', first, (JSON, PICKLED)))
+        self.failUnless(registry.get('missing') is None)
+        self.assertRaises(KeyError, registry.method, 'missing')
+        del registry[0]
+        self.failUnless(registry.method('box') is second)
+        self.failUnless(registry.formats('box') == (PICKLED,))
+
+    def test_load(self):
+        path = os.path.join(self.directory, 'registering.py')
+        open(path, 'w').write(REGISTERING)
+        registry = Registry([('box', first, (JSON,))],
+                            modules=('registering',))
+        target = types.ModuleType('registry_target')
+        target.attempts = 0
+        target.method = second
+        target.formats = (JSON,)
+        target.registry = registry
+        sys.modules['registry_target'] = target
+        # The module is imported again after failing
+        self.assertRaises(ImportError, registry.get, 'slow')
+        results = []
+
+        def read():
+            results.append(registry.get('slow'))
+        threads = [threading.Thread(target=read) for index in range(0, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.failUnless(target.attempts == 2)
+        self.failUnless(results == [('slow', second, (JSON,))] * 4)
+        self.failUnless(len(registry) == 2)
+
+    def test_fetch_plan(self):
+        registry = Registry([('box', first, (JSON,))])
+        plan = registry.fetch_plan(['box', 'missing'])
+        self.failUnless(plan == {JSON: ('box',)})
+        self.failUnless(registry.fetch_plan(('missing', 'box')) is plan)
+        registry.append(('other', second, (JSON, PICKLED)))
+        plan = registry.fetch_plan(['box', 'other'])
+        self.failUnless(plan == {JSON: ('box', 'other'), PICKLED: ('other',)})
+
+    def test_resources_registry(self):
+        for name, method, formats in RESOURCES_REGISTRY:
+            self.failUnless(RESOURCES_REGISTRY.method(name) is method)
+            self.failUnless(RESOURCES_REGISTRY.formats(name) == formats)
+        method = RESOURCES_REGISTRY.method('projects')
+        self.failUnless(method.__name__ == 'projects')
+
+    def test_passthrough(self):
+        for name in ('rnadashboard', 'rnadashboard_results',
+                     'lane_read_summary', 'replicate_mapping_summary',
+                     'experiment_expression_summary'):
+            self.failUnless(RESOURCES_REGISTRY.passthrough(name))
+        for name in ('projects', 'project_experimentstable',
+                     'experiment_sample_info', 'missing'):
+            self.failIf(RESOURCES_REGISTRY.passthrough(name))
+        registry = Registry([('box', first, (JSON,))])
+        self.failIf(registry.passthrough('box'))
+
+    def test_passthrough_marker(self):
+        def title_only(context, box):
+            box['title'] = 'Title'
+            return box
+        title_only.passthrough = True
+        registry = Registry([('box', title_only, (JSON,)),
+                             ('other', title_only, (JSON, PICKLED))])
+        self.failUnless(registry.passthrough('box'))
+        # Only JSON boxes are passed through
+        self.failIf(registry.passthrough('other'))
+        self.assertRaises(ValueError, augment, (JSON, PICKLED),
+                          passthrough=True)
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(RegistryTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
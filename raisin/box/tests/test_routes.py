@@ -0,0 +1,75 @@
+import sys
+import unittest
+from raisin.box import BOXES
+from raisin.box.routes import Router
+
+
+class RoutesTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.router = Router()
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def test_match(self):
+        name = 'lane_merged_mapped_reads'
+        url = ('/project/ENCODE/parameter_list/76-K562/replicate/R1/'
+               'lane/L1/tab/mapping/box/%s?format=json' % name)
+        parameters = {'project_name': 'ENCODE',
+                      'parameter_values': '76-K562',
+                      'replicate_name': 'R1',
+                      'lane_name': 'L1',
+                      'tab_name': 'mapping',
+                      'box_name': name}
+        self.failUnless(self.router.match(url) == (name, parameters))
+        # The box has to have the path
+        self.failUnless(self.router.match(url.replace('lane/L1/', '')) is None)
+        self.failUnless(self.router.match('projects') == ('projects', {}))
+        self.failUnless(self.router.match('project/ENCODE') ==
+                        ('project_about', {'project_name': 'ENCODE'}))
+        self.failUnless(self.router.match_all('project/ENCODE') ==
+                        [('project_about', {'project_name': 'ENCODE'}),
+                         ('project_meta', {'project_name': 'ENCODE'})])
+        self.failUnless(self.router.match('project//experiments') is None)
+        self.failUnless(self.router.match('') is None)
+
+    def test_fixed_segments_first(self):
+        router = Router({'a': {'path': 'project/:project_name/downloads'},
+                         'b': {'path': 'project/:project_name/:page'},
+                         'c': {'path': 'project/:projectid/x/:y'},
+                         'd': {'path': 'project/downloads/x/:y'}})
+        self.failUnless(router.match('project/P1/downloads') ==
+                        ('a', {'project_name': 'P1'}))
+        self.failUnless(router.match('project/P1/about') ==
+                        ('b', {'project_name': 'P1', 'page': 'about'}))
+        # Backtracks from the fixed segment when it leads nowhere
+        self.failUnless(router.match('project/downloads/about') ==
+                        ('b', {'project_name': 'downloads', 'page': 'about'}))
+        self.failUnless(router.match('project/downloads/x/1') ==
+                        ('d', {'y': '1'}))
+        self.failUnless(router.match('project/P2/x/1') ==
+                        ('c', {'projectid': 'P2', 'y': '1'}))
+
+    def test_all_sections(self):
+        for name in BOXES:
+            url = BOXES[name]['path'].replace(':box_name', name)
+            matches = self.router.match_all(url)
+            self.failUnless(name in [match[0] for match in matches])
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(RoutesTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+from raisin.box import snapshot
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.directory = tempfile.mkdtemp()
+        for name, options in snapshot.CONFIGURATIONS:
+            shutil.copy(os.path.join(snapshot.DIRECTORY, name), self.directory)
+        self.path = os.path.join(self.directory, 'config.snapshot')
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.directory)
+
+    def test_build(self):
+        self.failUnless(snapshot.read(self.directory, self.path) is None)
+        snapshot.build(self.directory, self.path)
+        resources, boxes = snapshot.read(self.directory, self.path)
+        parsed_resources, parsed_boxes = snapshot.parse(self.directory)
+        self.failUnless(resources == parsed_resources)
+        self.failUnless(boxes == parsed_boxes)
+        self.failUnless(resources.interpolation is False)
+        self.failUnless(boxes['projects'].parent is boxes)
+
+    def test_stale(self):
+        snapshot.build(self.directory, self.path)
+        boxes_path = os.path.join(self.directory, 'boxes.ini')
+        # Only touching the file keeps the snapshot
+        mtime = time.time() + 10
+        os.utime(boxes_path, (mtime, mtime))
+        self.failIf(snapshot.read(self.directory, self.path) is None)
+        with open(boxes_path, 'a') as boxes_file:
+            boxes_file.write("\n[new_box]\npath = \"new\"\n")
+        self.failUnless(snapshot.read(self.directory, self.path) is None)
+        resources, boxes = snapshot.load(self.directory, self.path)
+        self.failUnless('new_box' in boxes)
+
+    def test_version(self):
+        snapshot.build(self.directory, self.path)
+        version = snapshot.VERSION
+        snapshot.VERSION = version + 1
+        try:
+            self.failUnless(snapshot.read(self.directory, self.path) is None)
+        finally:
+            snapshot.VERSION = version
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(SnapshotTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,72 @@
+import sys
+import copy
+import unittest
+from raisin.box import BOXES
+from raisin.box import RESOURCES_REGISTRY
+from raisin.box.config import JSON
+from raisin.box.static import StaticCache
+from raisin.box.static import TwoPhase
+
+
+class StaticTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.calls = []
+        self.cache = StaticCache({'chart': BOXES['lane_merged_mapped_reads']})
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def static(self, box):
+        self.calls.append(box)
+        box['chartoptions']['width'] = '900'
+        box['chartoptions']['title'] = box['title']
+
+    def test_static_once(self):
+        def method(context, box):
+            box['chartoptions']['height'] = str(len(box[JSON]))
+        augmenter = TwoPhase('chart', self.static, method, self.cache)
+        section = BOXES['lane_merged_mapped_reads'].dict()
+        first = augmenter(None, dict(section, **{JSON: '[1]'}))
+        second = augmenter(None, dict(section, **{JSON: '[1, 2]'}))
+        self.failUnless(len(self.calls) == 1)
+        self.failUnless(first['chartoptions']['height'] == '3')
+        self.failUnless(second['chartoptions']['height'] == '6')
+        self.failUnless(second['chartoptions']['title'] == section['title'])
+        self.failIf(first['chartoptions'] is second['chartoptions'])
+        self.failIf('height' in self.cache.get('chart', None, None))
+        # Boxes without section have their static phase run each time
+        augmenter = TwoPhase('other', self.static, method, self.cache)
+        box = {'title': 'Other', 'chartoptions': {}, JSON: '[]'}
+        augmenter(None, box)
+        self.failUnless(box['chartoptions'] == {'width': '900',
+                                                'title': 'Other',
+                                                'height': '2'})
+        self.failUnless(len(self.calls) == 2)
+        self.failUnless(len(self.cache) == 1)
+
+    def test_registered(self):
+        for name, method, formats in RESOURCES_REGISTRY:
+            if isinstance(method, TwoPhase) and name in BOXES:
+                expected = BOXES[name].dict()
+                box = copy.deepcopy(expected)
+                method.static(expected)
+                method(None, box)
+                self.failUnless(box == expected)
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(StaticTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
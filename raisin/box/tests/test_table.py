@@ -0,0 +1,176 @@
+import sys
+import array
+import cPickle
+import datetime
+import unittest
+from raisin.box import table
+from raisin.box import boxes
+from raisin.box.batch import decode
+from raisin.box.binary import encode
+from raisin.box.config import JSON
+from raisin.box.config import PICKLED
+from raisin.box.gviz import to_json
+
+
+class TableTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def test_parse_description(self):
+        description = ['a', ('b', 'NUMBER'), ('c', 'string', 'Label C')]
+        columns = [('a', 'string'), ('b', 'number'), ('Label C', 'string')]
+        self.failUnless(table.parse_description(description) == columns)
+        self.failUnless(table.parse_description({'a': 'string'}) is None)
+        self.failUnless(table.parse_description([('a', 'blob')]) is None)
+
+    def test_to_csv_value(self):
+        self.failUnless(table.to_csv_value(None, 'number') == '')
+        self.failUnless(table.to_csv_value(True, 'number') == '1')
+        self.failUnless(table.to_csv_value(0.1 + 0.2, 'number') == '0.3')
+        self.failUnless(table.to_csv_value(0, 'boolean') == 'false')
+        self.failUnless(table.to_csv_value((3, 'three'), 'number') == '3')
+        self.failUnless(table.to_csv_value(u'\xe9', 'string') == '\xc3\xa9')
+        self.failUnless(table.to_csv_value('  x', 'string') == 'x')
+        self.failUnless(table.to_csv_value(' a,b', 'string') == ' a,b')
+        self.failUnless(table.to_csv_value('a\r\nb', 'string') == 'a\rb')
+        day = datetime.datetime(2012, 10, 9, 8, 7, 6)
+        self.failUnless(table.to_csv_value(day, 'date') == '2012-10-09')
+        self.failUnless(table.to_csv_value(day, 'timeofday') == '08:07:06')
+        self.failUnless(table.to_csv_value((day, 'Oct'), 'date') == 'Oct')
+        self.assertRaises(ValueError, table.to_csv_value, 'x', 'number')
+
+    def test_first_row(self):
+        description = [('Species', 'string'), ('Reads', 'number')]
+        data = [['Homo sapiens', 42], ['Mus musculus', 7]]
+        lines = {'Species': 'Homo sapiens', 'Reads': '42'}
+        self.failUnless(table.first_row(description, data) == lines)
+        self.failUnless(table.first_row(description, []) == {})
+        lines = {'Species': 'Homo sapiens', 'Reads': ''}
+        self.failUnless(table.first_row(description,
+                                        [['Homo sapiens']]) == lines)
+        self.failUnless(table.first_row(description, [[1, 2, 3]]) is None)
+        # Only the first row is checked
+        self.failUnlessRaises(ValueError, table.first_row, description,
+                              [['Homo sapiens', 'many']])
+        lines = {'Species': 'Homo sapiens', 'Reads': '42'}
+        self.failUnless(table.first_row(description,
+                                        [['Homo sapiens', 42],
+                                         ['Mus musculus', 'many']]) == lines)
+
+    def test_table(self):
+        description = [('gene', 'string', 'Gene'), ('RPKM', 'number'),
+                       ('Reads', 'number'), ('Detected', 'boolean')]
+        data = [['ENSG01', 1.5, 10, True],
+                ['ENSG02', 0.0, 3, False],
+                ['ENSG01', 2.5, None, None]]
+        pickled = {'table_description': description, 'table_data': data}
+        columnar = table.Table.from_table(pickled)
+        self.failUnless(columnar == pickled)
+        self.failUnless(columnar['table_data'] == data)
+        self.failUnless(columnar['table_data'][-1] == data[-1])
+        self.failUnless(columnar['table_data'][1][1:3] == [0.0, 3])
+        self.failUnless(isinstance(columnar.column('RPKM'), array.array))
+        self.failUnless(columnar.column('Reads') == [10, 3, None])
+        self.failUnless(columnar.column('gene') is columnar.column('Gene'))
+        gene = columnar.column(0)
+        self.failUnless(gene[0] is gene[2])
+        self.failUnless(columnar.rows() == data)
+        self.failUnless(cPickle.loads(cPickle.dumps(columnar, 2)) == pickled)
+        self.failUnless(boxes.get_lines({PICKLED: columnar}) ==
+                        boxes._get_csv_lines({PICKLED: pickled}))
+        self.failUnless(to_json(columnar) == to_json(pickled))
+
+    def test_decode_columnar(self):
+        description = [('Lane', 'string'),
+                       ('Start', 'number'),
+                       ('Reads', 'number')]
+        pickled = {'table_description': description,
+                   'table_data': [['L1', 0, 5], ['L1', 100, 7], ['L2', 0, 2]]}
+        for payload in (cPickle.dumps(pickled), encode(pickled)):
+            box = decode({PICKLED: payload}, columnar=True)
+            self.failUnless(isinstance(box[PICKLED], table.Table))
+            self.failUnless(box[PICKLED] == pickled)
+        box = decode({PICKLED: cPickle.dumps({'species': 'Homo sapiens'})},
+                     columnar=True)
+        self.failUnless(box[PICKLED] == {'species': 'Homo sapiens'})
+
+    def test_top_rows(self):
+        description = [('Gene', 'string'), ('RPKM', 'number', 'Expression')]
+        data = [['G%s' % index, (index * 7) % 50] for index in range(0, 50)]
+        data[3] = ['G3', None]
+        data[4] = ['G4', (1000.5, '1,000.5')]
+        pickled = {'table_description': description, 'table_data': data}
+        expected = [data[4]] + sorted([row for row in data[:3] + data[5:]],
+                                      key=lambda row: -row[1])[:4]
+        for pickled in (pickled, table.Table.from_table(pickled)):
+            for column in (None, 1, '1', 'RPKM', 'Expression'):
+                top = table.top_rows(pickled, 5, column)
+                self.failUnless(top['table_data'] == expected)
+                self.failUnless(top['table_description'] == description)
+        self.failUnless(table.top_rows(pickled, 50)['table_data'][-1] ==
+                        ['G3', None])
+        # Rows with the same value keep their order
+        ties = {'table_description': description,
+                'table_data': [['A', 1], ['B', 2], ['C', 1]]}
+        self.failUnless(table.top_rows(ties, 2)['table_data'] ==
+                        [['B', 2], ['A', 1]])
+        ties['table_data'] = [['B', 2], ['A', 1], ['C', 1]]
+        self.failUnless(table.top_rows(ties, 3) is ties)
+        self.failUnlessRaises(ValueError, table.top_rows, ties, 2, 'Reads')
+
+    def test_top_boxes(self):
+        description = [('Gene', 'string'), ('RPKM', 'number')]
+        data = [['G%s' % index, float(index % 97)] for index in range(0, 500)]
+        box = {PICKLED: {'table_description': description,
+                         'table_data': data},
+               'topn': '20', 'sortcolumn': '1', 'title': 'Top genes',
+               'javascript': ''}
+        boxes.RESOURCES_REGISTRY.method('lane_top_genes')(None, box)
+        top = box[PICKLED]['table_data']
+        self.failUnless(len(top) == 20)
+        self.failUnless([row[1] for row in top] == [96.0] * 5 + [95.0] * 5 +
+                        [94.0] * 5 + [93.0] * 5)
+        self.failUnless(box[JSON] == to_json(box[PICKLED]))
+
+    def test_top_boxes_kept(self):
+        nested = {'table_description': {('Gene', 'string'):
+                                        [('RPKM', 'number')]},
+                  'table_data': {'G1': [[1.5]], 'G2': [[2.5]]}}
+        flat = {'table_description': [('Gene', 'string'), ('RPKM', 'number')],
+                'table_data': [['G1', 1.5], ['G2', 2.5], ['G3', 0.5]]}
+        method = boxes.RESOURCES_REGISTRY.method('lane_top_genes')
+        box = {PICKLED: nested, JSON: '{}', 'topn': '2', 'sortcolumn': '1',
+               'title': 'Top genes', 'javascript': ''}
+        method(None, box)
+        self.failUnless(box[PICKLED] is nested)
+        self.failUnless(box[JSON] == '{}')
+        # Without the sortcolumn, or not sorting on numbers
+        for sortcolumn in ('5', '0', 'Reads'):
+            box = {PICKLED: flat, JSON: '{}', 'topn': '2',
+                   'sortcolumn': sortcolumn, 'title': 'Top genes',
+                   'javascript': ''}
+            self.failUnlessRaises(ValueError, method, None, box)
+        box['sortcolumn'] = 'RPKM'
+        method(None, box)
+        self.failUnless(box[PICKLED]['table_data'] == [['G2', 2.5],
+                                                       ['G1', 1.5]])
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(TableTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,109 @@
+import sys
+import time
+import cPickle
+import unittest
+import threading
+from raisin.box import RESOURCES_REGISTRY
+from raisin.box.binary import BinaryTable
+from raisin.box.binary import encode
+from raisin.box.config import JSON
+from raisin.box.config import PICKLED
+from raisin.box.registry import is_passthrough
+from raisin.box.timing import Timed
+from raisin.box.timing import Timings
+from raisin.box.timing import get_bucket
+from raisin.box.timing import get_bucket_time
+from raisin.box.timing import get_cells
+from raisin.box.timing import untimed
+
+
+class TimingTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.timings = Timings(enabled=True)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def test_buckets(self):
+        for seconds in (1e-7, 3e-6, 0.0042, 1.5):
+            bucket_time = get_bucket_time(get_bucket(seconds))
+            self.failUnless(seconds <= bucket_time <= max(seconds * 1.1,
+                                                          1e-6))
+
+    def test_record(self):
+        def augmenter(context, box):
+            time.sleep(box['sleep'])
+            return box
+        timed = Timed('slow_box', augmenter, self.timings)
+        table = {'table_description': [('a', 'string'), ('b', 'number')],
+                 'table_data': [['x', 1], ['y', 2], ['z', 3]]}
+        for index in range(0, 98):
+            timed(None, {'sleep': 0, PICKLED: table})
+
+        def work():
+            timed(None, {'sleep': 0.05})
+        threads = [threading.Thread(target=work) for index in range(0, 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = self.timings.snapshot()['slow_box']
+        self.failUnless(snapshot['calls'] == 100)
+        self.failUnless(snapshot['cells'] == 98 * 6)
+        self.failUnless(snapshot['total'] >= 0.1)
+        self.failUnless(snapshot['p50'] < 0.01)
+        self.failUnless(snapshot['p95'] < 0.01)
+        self.failUnless(0.05 <= snapshot['p99'] < 0.06)
+        self.timings.reset()
+        self.failUnless(self.timings.snapshot() == {})
+        timed(None, {'sleep': 0})
+        self.failUnless(self.timings.snapshot()['slow_box']['calls'] == 1)
+        self.timings.disable()
+        timed(None, {'sleep': 0})
+        self.failUnless(self.timings.snapshot()['slow_box']['calls'] == 1)
+        self.failUnless(untimed(timed) is augmenter)
+        self.failUnless(untimed(augmenter) is augmenter)
+
+    def test_cells(self):
+        table = {'table_description': [('a', 'string')],
+                 'table_data': [['x'], ['y']]}
+        self.failUnless(get_cells({PICKLED: table}) == 2)
+        self.failUnless(get_cells({PICKLED: cPickle.dumps(table)}) == 0)
+        self.failUnless(get_cells({PICKLED: {'species': 'Mouse'}}) == 0)
+        binary = BinaryTable(encode(table))
+        self.failUnless(get_cells({PICKLED: binary}) == 2)
+        self.failUnless(binary._columns == [None])
+        self.failUnless(get_cells({JSON: '{}'}) == 0)
+
+        def top(context, box):
+            box[PICKLED] = {'table_description': [('a', 'string')],
+                            'table_data': []}
+            return box
+        # The cells of the table given to the augmenter are counted
+        Timed('top_box', top, self.timings)(None, {PICKLED: table})
+        self.failUnless(self.timings.snapshot()['top_box']['cells'] == 2)
+
+    def test_passthrough(self):
+        name = 'lane_read_summary'
+        method = RESOURCES_REGISTRY.method(name)
+        self.failUnless(RESOURCES_REGISTRY.passthrough(name))
+        timed = Timed(name, untimed(method), self.timings)
+        self.failUnless(is_passthrough(timed, (JSON,)))
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(TimingTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
@@ -0,0 +1,79 @@
+import sys
+import unittest
+from raisin.box import RESOURCES
+from raisin.box.uris import MissingParameters
+from raisin.box.uris import UriTemplate
+from raisin.box.uris import UriTemplates
+
+
+class UrisTest(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.parameters = {'project_name': 'ENCODE',
+                           'parameter_list': 'read_length',
+                           'parameter_values': '76',
+                           'replicate_name': 'R1',
+                           'lane_name': 'L1',
+                           'hgversion': 'hg19'}
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def test_template(self):
+        template = UriTemplate('http://host/%(a)s/100%%/%(b)s?x=%(a)s')
+        self.failUnless(template.parameters == frozenset(['a', 'b']))
+        self.failUnless(template.expand({'a': 'A', 'b': 2}) ==
+                        'http://host/A/100%/2?x=A')
+        self.failUnless(UriTemplate('http://host/').expand({}) ==
+                        'http://host/')
+        self.assertRaises(MissingParameters, template.expand, {'a': 'A'})
+        self.assertRaises(KeyError, template.expand, {'a': 'A'})
+        for template in ('http://host/%(a)d', 'http://host/%s',
+                         'http://host/100%', 'http://host/%(a)s%(b)'):
+            self.assertRaises(ValueError, UriTemplate, template)
+
+    def test_resources(self):
+        templates = UriTemplates()
+        for name in RESOURCES:
+            uri = RESOURCES[name]['uri']
+            self.failUnless(templates.expand(name, self.parameters) ==
+                            uri % self.parameters)
+
+    def test_expand_many(self):
+        templates = UriTemplates(max_entries=1)
+        names = ['project_info', 'lane_read_summary', 'experiment_about']
+        uris = templates.expand_many(names, self.parameters)
+        self.failUnless(sorted(uris) == sorted(names))
+        self.failUnless(templates.expand_many(names, self.parameters) ==
+                        uris)
+        try:
+            templates.expand_many(names, {'project_name': 'ENCODE'})
+        except MissingParameters, error:
+            self.failUnless(sorted(error.missing) == ['experiment_about',
+                                                      'lane_read_summary'])
+            self.failUnless(error.missing['lane_read_summary'] ==
+                            set(['replicate_name', 'lane_name']))
+            self.failUnless('lane_read_summary needs lane_name, '
+                            'replicate_name' in str(error))
+        else:
+            self.fail("Missing parameters not reported")
+        self.failUnless(templates.expand('project_info',
+                                         {'project_name': 'ENCODE'}) ==
+                        uris['project_info'])
+
+
+# make the test suite.
+def suite():
+    loader = unittest.TestLoader()
+    testsuite = loader.loadTestsFromTestCase(UrisTest)
+    return testsuite
+
+
+# Make the test suite; run the tests.
+def test_main():
+    testsuite = suite()
+    runner = unittest.TextTestRunner(sys.stdout, verbosity=2)
+    runner.run(testsuite)
+
+if __name__ == "__main__":
+    test_main()
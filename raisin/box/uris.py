@@ -0,0 +1,178 @@
+"""Compiled uri templates of resources.ini
+
+The uri of a resource is a template with %(name)s parameters:
+
+    http://127.0.0.1:6464/project/%(project_name)s/replicate/%(replicate_name)s
+
+Each template is compiled once into a UriTemplate, which knows the
+parameters it needs. The uris of all the resources of a page are expanded
+together, and the parameters missing for any of them are reported before
+any of them is fetched:
+
+    uris = TEMPLATES.expand_many(names, parameters)
+
+The expanded uris are remembered for the last parameter sets, as the same
+page is asked for again and again.
+"""
+
+import re
+import threading
+from raisin.box import RESOURCES
+from raisin.box.lru import LruDict
+
+# A parameter of a template, or an escaped percent sign
+PARAMETER = re.compile(r'%\((\w+)\)s|%%')
+
+
+class MissingParameters(KeyError):
+    """Raised when parameters are missing for expanding uri templates.
+
+    missing maps each resource name to the parameters it is missing.
+    """
+
+    def __init__(self, missing):
+        KeyError.__init__(self, missing)
+        self.missing = missing
+
+    def __str__(self):
+        return "Missing parameters: %s" % '; '.join(
+            ["%s needs %s" % (name, ', '.join(sorted(parameters)))
+             for name, parameters in sorted(self.missing.items())])
+
+
+class UriTemplate(object):
+    """Uri template compiled into its fixed parts and parameters.
+
+    Raises ValueError if the template has a percent sign that is neither a
+    %(name)s parameter nor an escaped %%, as filling it in with the %
+    operator did.
+    """
+
+    def __init__(self, template):
+        self.template = template
+        # The fixed parts, with the parameter names in between
+        self.parts = []
+        fixed = []
+        position = 0
+        for found in PARAMETER.finditer(template):
+            self._check(template[position:found.start()])
+            fixed.append(template[position:found.start()])
+            if found.group(1) is None:
+                fixed.append('%')
+            else:
+                self.parts.append(''.join(fixed))
+                self.parts.append(found.group(1))
+                fixed = []
+            position = found.end()
+        self._check(template[position:])
+        fixed.append(template[position:])
+        self.parts.append(''.join(fixed))
+        self.parameters = frozenset(self.parts[1::2])
+
+    def _check(self, fixed):
+        """Check that a fixed part of the template has no percent sign"""
+        if '%' in fixed:
+            raise ValueError("Unsupported format in uri template: %s" %
+                             self.template)
+
+    def get_missing(self, parameters):
+        """Get the parameters of the template that are not given"""
+        return set([name for name in self.parameters
+                    if not name in parameters])
+
+    def expand(self, parameters):
+        """Fill in the template with the parameters.
+
+        Raises MissingParameters if any of them is not given.
+        """
+        missing = self.get_missing(parameters)
+        if missing:
+            raise MissingParameters({self.template: missing})
+        return self._expand(parameters)
+
+    def _expand(self, parameters):
+        """Fill in the template, all the parameters being given"""
+        parts = self.parts
+        if len(parts) == 1:
+            return parts[0]
+        values = list(parts)
+        for index in range(1, len(parts), 2):
+            values[index] = '%s' % (parameters[parts[index]],)
+        return ''.join(values)
+
+    def __repr__(self):
+        return "<UriTemplate %s>" % self.template
+
+
+class UriTemplates(object):
+    """The compiled uri templates of the resources, by name"""
+
+    def __init__(self, resources=RESOURCES, max_entries=1000):
+        self.resources = resources
+        self.max_entries = max_entries
+        self._templates = {}
+        # The uris by name, for the last parameter sets
+        self._uris = LruDict()
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """Get the compiled template of a resource, compiling it on first
+        use"""
+        template = self._templates.get(name, None)
+        if template is None:
+            template = UriTemplate(self.resources[name]['uri'])
+            with self._lock:
+                template = self._templates.setdefault(name, template)
+        return template
+
+    def expand(self, name, parameters):
+        """Get the uri of a resource.
+
+        Raises MissingParameters if any parameter of the uri is not given.
+        """
+        return self.expand_many([name], parameters)[name]
+
+    def expand_many(self, names, parameters):
+        """Get the uris of the resources, by name.
+
+        Raises MissingParameters for all the resources missing parameters,
+        before expanding any of them.
+        """
+        uris = self._get_uris(parameters)
+        needed = [(name, self.get(name)) for name in names
+                  if not name in uris]
+        if needed:
+            missing = {}
+            for name, template in needed:
+                names_missing = template.get_missing(parameters)
+                if names_missing:
+                    missing[name] = names_missing
+            if missing:
+                raise MissingParameters(missing)
+            for name, template in needed:
+                uris[name] = template._expand(parameters)
+        return dict([(name, uris[name]) for name in names])
+
+    def _get_uris(self, parameters):
+        """Get the uris expanded before for the same parameters, by name"""
+        try:
+            key = tuple(sorted(parameters.items()))
+            hash(key)
+        except TypeError:
+            return {}
+        with self._lock:
+            uris = self._uris.get(key, None)
+            if uris is None:
+                uris = self._uris[key] = {}
+            while len(self._uris) > self.max_entries:
+                self._uris.popitem()
+        return uris
+
+    def clear(self):
+        """Forget the templates and uris, as when resources.ini changed"""
+        with self._lock:
+            self._templates.clear()
+            self._uris.clear()
+
+# The uri templates of resources.ini
+TEMPLATES = UriTemplates()
@@ -10,6 +10,9 @@ install_requires = [
 
 entry_points = """
     # -*- Entry points: -*-
+    [console_scripts]
+    raisin_box_snapshot = raisin.box.snapshot:main
+    raisin_box_library = raisin.box.library:main
     """
 
 classifiers = [